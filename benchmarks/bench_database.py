@@ -0,0 +1,366 @@
+# benchmarks/bench_database.py
+
+"""Time every public Database method, and tab refreshes, against synthetic data.
+
+Run from the repository root, standalone:
+
+    python -m benchmarks.bench_database [--exercises 100] [--logs 100000] [--output results.json]
+    python -m benchmarks.bench_database --compare baseline.json
+
+or under pytest-benchmark, sized by $BENCH_EXERCISES and $BENCH_LOGS:
+
+    python -m pytest benchmarks/bench_database.py
+
+The generated database is cached in the temp directory and every run works on a
+fresh copy of it, so results are comparable across commits. Tab refreshes need a
+display; on a headless machine run under ``xvfb-run``, otherwise they are skipped.
+With ``--compare``, exits with status 1 if any median got slower than the
+baseline by more than ``--threshold``.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from benchmarks import synthetic
+from utils import analytics
+from utils.log_store import LogStore
+from utils.database import Database
+
+try:
+    import pytest
+    import pytest_benchmark  # noqa: F401  (provides the benchmark fixture)
+except ImportError:
+    pytest = None
+
+class Case(NamedTuple):
+    """One benchmark: ``run(*setup())`` is timed, ``setup`` is not."""
+    name: str
+    run: object
+    setup: object = tuple
+
+def cached_database(exercises, logs, seed=1):
+    """Return the path of a generated database for these sizes, creating it on first use."""
+    path = os.path.join(tempfile.gettempdir(), f"workout_tracker_bench_{exercises}_{logs}_{seed}.db")
+    if not os.path.exists(path):
+        synthetic.generate(path + '.tmp', exercises, logs, seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+def working_copy(exercises, logs, directory, seed=1):
+    """Open a scratch copy of the cached database, so write benchmarks never touch the cache."""
+    path = os.path.join(directory, 'bench.db')
+    shutil.copyfile(cached_database(exercises, logs, seed), path)
+    return Database(path, performance=True)
+
+def database_cases(db):
+    """Return a Case for each public Database method, using rows sampled from db."""
+    exercise_id, exercise_name = db._fetchone("SELECT id, name FROM exercises ORDER BY id LIMIT 1")
+    strength_id = db._fetchone("SELECT exercise_id FROM pr_records ORDER BY exercise_id LIMIT 1")[0]
+    log_id, log_date = db._fetchone("SELECT id, date FROM workout_logs ORDER BY date DESC, id DESC LIMIT 1")
+    middle_log = db._fetchone("SELECT date, id FROM workout_logs ORDER BY date, id LIMIT 1 OFFSET "
+                              "(SELECT COUNT(*) / 2 FROM workout_logs)")
+    month_start = log_date[:8] + '01'
+    counter = itertools.count()
+
+    def new_exercise():
+        name = f"Bench exercise {next(counter)}"
+        db.add_exercise(name, 'Strength')
+        return name
+
+    def exercise_with_logs(count=1000):
+        """Add an exercise with logs, for the cascade delete."""
+        name = new_exercise()
+        new_id = db.get_exercise_id(name)
+        db.add_workout_logs((log_date, new_id, 30, 200, 3, 5, 100.0) for _ in range(count))
+        return (name,)
+
+    def new_log():
+        return (db.add_workout_log(log_date, strength_id, 30, 200, 3, 5, 100.0),)
+
+    def new_pr():
+        new_id = db.get_exercise_id(new_exercise())
+        db.add_or_update_pr(new_id, 100.0)
+        return (new_id,)
+
+    def loaded_analytics():
+        """Analytics with the logs already loaded, so only the metric is timed."""
+        engine = analytics.Analytics(db)
+        engine.columns()
+        return (engine,)
+
+    stores = []
+
+    def loaded_store():
+        """One LogStore shared by the cases, loaded on first use."""
+        if not stores:
+            stores.append(LogStore(db))
+        return (stores[0],)
+
+    return [
+        # Exercises
+        Case('get_all_exercises', db.get_all_exercises),
+        Case('get_exercise', db.get_exercise, lambda: (exercise_id,)),
+        Case('get_exercises_page', db.get_exercises_page),
+        Case('get_exercise_id', db.get_exercise_id, lambda: (exercise_name,)),
+        Case('get_exercise_name', db.get_exercise_name, lambda: (exercise_id,)),
+        Case('get_exercise_ids', db.get_exercise_ids),
+        Case('add_exercise', db.add_exercise, lambda: (f"Bench exercise {next(counter)}", 'Cardio')),
+        Case('add_exercises', db.add_exercises,
+             lambda: ([(f"Bench exercise {next(counter)}", 'Cardio') for _ in range(100)],)),
+        Case('update_exercise', db.update_exercise,
+             lambda: (new_exercise(), f"Bench exercise {next(counter)}", 'Sport')),
+        Case('delete_exercise (cascade, 1000 logs)', db.delete_exercise, exercise_with_logs),
+        # Personal records
+        Case('get_all_prs', db.get_all_prs),
+        Case('get_pr', db.get_pr, lambda: (strength_id,)),
+        Case('get_prs_page', db.get_prs_page),
+        Case('add_or_update_pr', db.add_or_update_pr, lambda: (strength_id, 150.0)),
+        Case('upsert_prs', db.upsert_prs, lambda: ([(strength_id, 150.0)],)),
+        Case('delete_pr', db.delete_pr, new_pr),
+        Case('get_best_prs', db.get_best_prs, lambda: (strength_id,)),
+        Case('get_prs_for_log', db.get_prs_for_log, lambda: (log_id,)),
+        Case('get_pr_history', db.get_pr_history, lambda: (strength_id,)),
+        Case('get_pr_data', db.get_pr_data),
+        # Workout logs
+        Case('get_all_workout_logs', db.get_all_workout_logs),
+        Case('get_workout_log', db.get_workout_log, lambda: (log_id,)),
+        Case('get_workout_logs_page (first)', db.get_workout_logs_page),
+        Case('get_workout_logs_page (middle)', db.get_workout_logs_page, lambda: (middle_log,)),
+        Case('get_workout_logs_between (month)', db.get_workout_logs_between, lambda: (month_start, log_date)),
+        Case('query_workout_logs (exercise)', lambda: db.query_workout_logs(exercise_id=exercise_id)),
+        Case('query_workout_logs (type, month)', lambda: db.query_workout_logs(
+            exercise_type='Cardio', start=month_start, end=log_date)),
+        Case('query_workout_logs (search)', lambda: db.query_workout_logs(search='hill')),
+        Case('iter_workout_logs', lambda: sum(len(chunk) for chunk in db.iter_workout_logs())),
+        Case('add_workout_log', db.add_workout_log, lambda: (log_date, strength_id, 30, 200, 3, 5, 100.0)),
+        Case('add_workout_logs (1000)', db.add_workout_logs,
+             lambda: ([(log_date, strength_id, 30, 200, 3, 5, 100.0)] * 1000,)),
+        Case('update_workout_log', db.update_workout_log, lambda: (*new_log(), log_date, strength_id, 45, 300)),
+        Case('delete_workout_log', db.delete_workout_log, new_log),
+        # Aggregates
+        Case('get_calories_over_time', db.get_calories_over_time),
+        Case('get_totals (week)', db.get_totals, lambda: ('week',)),
+        Case('get_totals (exercise, month)', db.get_totals, lambda: ('month', exercise_id)),
+        Case('get_exercise_totals', db.get_exercise_totals),
+        Case('verify_aggregates', db.verify_aggregates),
+        # Analytics
+        Case('analytics load_columns', analytics.load_columns, lambda: (db,)),
+        Case('analytics training_load', lambda engine: engine.training_load(end=log_date), loaded_analytics),
+        Case('analytics weekly_volume', lambda engine: engine.weekly_volume(), loaded_analytics),
+        Case('analytics streaks', lambda engine: engine.streaks(end=log_date), loaded_analytics),
+        Case('analytics e1rm_trends', lambda engine: engine.e1rm_trends(end=log_date), loaded_analytics),
+        # In-memory log store
+        Case('log_store load', lambda store: store.load(), loaded_store),
+        Case('log_store totals (day)', lambda store: store.totals('day'), loaded_store),
+        Case('log_store totals (exercise, month)', lambda store: store.totals('month', exercise_id), loaded_store),
+        Case('log_store rows_between (month)', lambda store: store.rows_between(month_start, log_date), loaded_store),
+        Case('log_store exercise_totals', lambda store: store.exercise_totals(), loaded_store),
+    ]
+
+class ImmediateRunner:
+    """Stands in for BackgroundRunner and runs jobs inline, so a refresh is timed to completion."""
+
+    def submit(self, key, fn, callback, *args, error_callback=None, delay_ms=0):
+        callback(fn(*args))
+
+    def cancel(self, key):
+        pass
+
+    def is_busy(self, key):
+        return False
+
+    def shutdown(self):
+        pass
+
+def tab_cases(db):
+    """Return (root, cases) timing each tab's refresh, or (None, []) without a display."""
+    import tkinter as tk
+    from importlib import import_module
+    from gui.chart_render import ChartCache
+    from main import TABS
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None, []
+    root.withdraw()
+    runner = ImmediateRunner()
+    cases = []
+    for title, module_name, class_name in TABS:
+        tab = getattr(import_module(module_name), class_name)(root, db, runner)
+        tab.pack()
+        # The charts tab has no tree; load_data prepares and draws the selected chart
+        refresh = getattr(tab, 'refresh_treeview', tab.load_data)
+
+        def run(refresh=refresh):
+            refresh()
+            root.update()
+        cases.append(Case(f"{class_name} refresh", run))
+        if hasattr(tab, 'cache'):
+            # The charts tab serves repeat draws from its render cache; time a cold draw too
+            def run_uncached(tab=tab):
+                tab.cache = ChartCache()
+                tab.load_data()
+                root.update()
+            cases.append(Case(f"{class_name} refresh (uncached)", run_uncached))
+    return root, cases
+
+def measure(case, rounds):
+    """Time `rounds` calls of a case and return its summary in milliseconds."""
+    times = []
+    for _ in range(rounds):
+        args = case.setup()
+        started = time.perf_counter()
+        case.run(*args)
+        times.append((time.perf_counter() - started) * 1000)
+    return {
+        'rounds': rounds,
+        'min_ms': min(times),
+        'median_ms': statistics.median(times),
+        'mean_ms': statistics.fmean(times),
+        'max_ms': max(times),
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold, min_ms):
+    """Print median ratios against a baseline; return the names that regressed."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        slower = ratio > threshold and result['median_ms'] - before['median_ms'] > min_ms
+        if slower:
+            regressions.append(name)
+        print(f"{name:45} {before['median_ms']:10.3f} -> {result['median_ms']:10.3f} ms "
+              f"x{ratio:5.2f}{'  REGRESSION' if slower else ''}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_database',
+                                     description=__doc__.splitlines()[0])
+    parser.add_argument('--exercises', type=int, default=100)
+    parser.add_argument('--logs', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--no-tabs', action='store_true', help="skip tab refresh benchmarks")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="slowdown ratio counted as a regression (default: %(default)s)")
+    parser.add_argument('--min-ms', type=float, default=0.5,
+                        help="ignore slowdowns smaller than this many milliseconds (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = working_copy(args.exercises, args.logs, directory, args.seed)
+        root = None
+        try:
+            cases = database_cases(db)
+            if not args.no_tabs:
+                root, more = tab_cases(db)
+                if root is None:
+                    print("No display; skipping tab refresh benchmarks", file=sys.stderr)
+                cases += more
+
+            results = {}
+            for case in cases:
+                if args.filter and args.filter not in case.name:
+                    continue
+                results[case.name] = measure(case, args.rounds)
+                print(f"{case.name:45} {results[case.name]['median_ms']:10.3f} ms")
+        finally:
+            if root is not None:
+                root.destroy()
+            db.close()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'exercises': args.exercises,
+            'logs': args.logs,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if (baseline['meta']['exercises'], baseline['meta']['logs']) != (args.exercises, args.logs):
+            print("Warning: baseline was run with different data sizes", file=sys.stderr)
+        regressions = compare(results, baseline['results'], args.threshold, args.min_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond x{args.threshold}", file=sys.stderr)
+            return 1
+    return 0
+
+if pytest is not None:
+    BENCH_EXERCISES = int(os.environ.get('BENCH_EXERCISES', 100))
+    BENCH_LOGS = int(os.environ.get('BENCH_LOGS', 100_000))
+
+    @pytest.fixture(scope='module')
+    def bench_db(tmp_path_factory):
+        db = working_copy(BENCH_EXERCISES, BENCH_LOGS, tmp_path_factory.mktemp('bench'))
+        yield db
+        db.close()
+
+    @pytest.fixture(scope='module')
+    def bench_tabs(bench_db):
+        root, cases = tab_cases(bench_db)
+        yield {case.name: case for case in cases}
+        if root is not None:
+            root.destroy()
+
+    def pytest_generate_tests(metafunc):
+        # Cases need the benchmark database, so collection names them from a small one
+        if metafunc.function.__name__ == 'test_database':
+            db = Database(cached_database(10, 1000))
+            try:
+                names = [case.name for case in database_cases(db)]
+            finally:
+                db.close()
+            metafunc.parametrize('case_name', names)
+        elif metafunc.function.__name__ == 'test_tab_refresh':
+            from main import TABS
+            metafunc.parametrize('case_name', [f"{class_name} refresh" for _, _, class_name in TABS])
+
+    def _pedantic(benchmark, case):
+        benchmark.pedantic(case.run, setup=lambda: (case.setup(), {}), rounds=5)
+
+    def test_database(benchmark, bench_db, case_name):
+        _pedantic(benchmark, {case.name: case for case in database_cases(bench_db)}[case_name])
+
+    def test_tab_refresh(benchmark, bench_tabs, case_name):
+        if case_name not in bench_tabs:
+            pytest.skip("needs a display")
+        _pedantic(benchmark, bench_tabs[case_name])
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# benchmarks/load_test.py
+
+"""Load-test the HTTP service with many simulated kiosks: requests per second and latency percentiles.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test [--kiosks 32] [--athletes 8] [--seconds 10] [--writes 0.5]
+    python -m benchmarks.load_test --url http://127.0.0.1:8080
+
+Without --url a server is started in a subprocess on a free port, with its data in
+a temporary directory. Each kiosk keeps one connection open and sends requests
+back to back: a workout log for a random athlete with probability --writes,
+otherwise that athlete's latest logs. Exits with status 1 if any request failed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+EXERCISES = [('Squat', 'Strength'), ('Bench Press', 'Strength'), ('Deadlift', 'Strength'), ('Running', 'Cardio')]
+
+class Client:
+    """One keep-alive HTTP/1.1 connection sending JSON requests."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        """Send a request and return (status, decoded JSON)."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode() if body is not None else b''
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while (line := await self.reader.readline()) not in (b'\r\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+async def prepare(host, port, athletes):
+    """Give every athlete the exercises the kiosks log."""
+    client = Client(host, port)
+    for athlete in athletes:
+        for name, type_ in EXERCISES:
+            status, _ = await client.request('POST', f"/athletes/{athlete}/exercises", {'name': name, 'type': type_})
+            if status not in (201, 409):
+                raise RuntimeError(f"Could not add exercise {name} for {athlete}: HTTP {status}")
+    await client.close()
+
+async def kiosk(host, port, athletes, write_ratio, deadline, rng, latencies, errors):
+    client = Client(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            athlete = rng.choice(athletes)
+            started = time.perf_counter()
+            if rng.random() < write_ratio:
+                name, _ = rng.choice(EXERCISES)
+                status, _ = await client.request('POST', f"/athletes/{athlete}/logs", {
+                    'date': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", 'exercise': name,
+                    'duration': rng.randint(10, 90), 'calories': rng.randint(50, 900),
+                    'sets': 5, 'reps': rng.randint(1, 10), 'weight': rng.randint(20, 200),
+                })
+                ok = status == 201
+            else:
+                status, _ = await client.request('GET', f"/athletes/{athlete}/logs?limit=20")
+                ok = status == 200
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors[status] = errors.get(status, 0) + 1
+    finally:
+        await client.close()
+
+async def run(host, port, kiosks, athletes, seconds, write_ratio, seed):
+    names = [f"athlete-{index}" for index in range(athletes)]
+    await prepare(host, port, names)
+    latencies, errors = [], {}
+    started = time.perf_counter()
+    deadline = started + seconds
+    await asyncio.gather(*(kiosk(host, port, names, write_ratio, deadline, random.Random(seed + index),
+                                 latencies, errors) for index in range(kiosks)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    quantile = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': quantile(0.50),
+        'p95_ms': quantile(0.95),
+        'p99_ms': quantile(0.99),
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+def start_server(data_dir):
+    """Start the service on a free port in a subprocess; return (process, port)."""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'workout_tracker.server', '--port', '0', '--data-dir', data_dir],
+        stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    line = process.stdout.readline()    # "Serving on http://host:port"
+    if not line:
+        raise RuntimeError("Server exited before it started listening")
+    return process, urlsplit(line.split()[-1]).port
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.load_test', description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="server to test (default: start one on a free port)")
+    parser.add_argument('--kiosks', type=int, default=32, help="concurrent connections")
+    parser.add_argument('--athletes', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--writes', type=float, default=0.5, help="share of requests that log a workout")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        process = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            process, port = start_server(data_dir)
+            host = '127.0.0.1'
+        try:
+            results = asyncio.run(run(host, port, args.kiosks, args.athletes, args.seconds, args.writes, args.seed))
+        finally:
+            if process is not None:
+                process.send_signal(signal.SIGINT)    # Lets the server close its shards
+                process.wait()
+
+    print(f"{results['requests']} requests in {results['seconds']:.1f} s: {results['requests_per_second']:.0f}/s, "
+          f"p50 {results['p50_ms']:.2f} ms, p95 {results['p95_ms']:.2f} ms, p99 {results['p99_ms']:.2f} ms, "
+          f"max {results['max_ms']:.2f} ms")
+    if results['errors']:
+        print(f"Errors by HTTP status: {results['errors']}", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'settings': vars(args), 'results': results}, file, indent=2)
+    return 1 if results['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
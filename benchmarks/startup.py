@@ -0,0 +1,63 @@
+# benchmarks/startup.py
+
+"""Measure time to first window paint against a large database.
+
+Run from the repository root in a fresh interpreter (imports are part of what is
+measured):
+
+    python -m benchmarks.startup [--rows 100000] [--target-ms 300]
+
+Exits with status 1 if the first paint misses the target or if a heavy module
+(matplotlib, tkcalendar) was imported before the first paint. Needs a display.
+"""
+
+import time
+
+START = time.perf_counter()
+
+import argparse
+import os
+import sys
+import tempfile
+
+HEAVY_MODULES = ('matplotlib', 'tkcalendar')
+
+def fill_database(db_file, rows, exercises=50, seed=1):
+    """Create a database with deterministic exercises and workout logs, if it doesn't exist yet."""
+    if os.path.exists(db_file):
+        return
+    from benchmarks.synthetic import generate
+
+    generate(db_file, exercises, rows, seed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--target-ms', type=float, default=300.0)
+    parser.add_argument('--db', help="database file (default: a cached file in the temp directory)")
+    args = parser.parse_args(argv)
+
+    db_file = args.db or os.path.join(tempfile.gettempdir(), f"workout_tracker_bench_{args.rows}.db")
+    fill_started = time.perf_counter()
+    fill_database(db_file, args.rows)
+    fill_time = time.perf_counter() - fill_started
+
+    import main as app
+
+    db = app.init_db(db_file)
+    root, runner = app.create_app(db)
+    root.update()
+    elapsed_ms = (time.perf_counter() - START - fill_time) * 1000
+    heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    runner.shutdown()
+    root.destroy()
+    db.close()
+
+    print(f"First paint: {elapsed_ms:.1f} ms (target {args.target_ms:.0f} ms, {args.rows} logs)")
+    if heavy:
+        print(f"Imported before first paint: {', '.join(heavy)}")
+    return 0 if elapsed_ms <= args.target_ms and not heavy else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
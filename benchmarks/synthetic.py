@@ -0,0 +1,102 @@
+# benchmarks/synthetic.py
+
+"""Deterministic synthetic workout data for benchmarks.
+
+The same seed and sizes always produce the same database, so timings from
+different commits are comparable:
+
+    python -m benchmarks.synthetic data/workout_tracker.db --exercises 100 --logs 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from utils.database import Database
+
+EXERCISE_TYPES = ('Strength', 'Cardio', 'Mobility', 'Sport')
+NOTES = ('felt strong', 'easy recovery session', 'hill repeats', 'new shoes', 'tired legs',
+         'tempo work', 'deload week', 'paused reps')
+FIRST_DAY = date(2015, 1, 1)
+DAYS = 3650
+CHUNK_SIZE = 50_000     # Logs per transaction, which bounds memory for 10M-row databases
+
+def exercise_rows(count, seed=1):
+    """Return `count` deterministic (name, type) exercises."""
+    rng = random.Random(seed)
+    return [(f"Exercise {i}", rng.choice(EXERCISE_TYPES)) for i in range(count)]
+
+def log_rows(count, exercise_ids, strength_ids=(), seed=1):
+    """Yield `count` deterministic workout logs for add_workout_logs, oldest days spread evenly.
+
+    Strength exercises get sets, reps and weight; about one log in ten has notes.
+    """
+    rng = random.Random(seed)
+    strength_ids = set(strength_ids)
+    days = [(FIRST_DAY + timedelta(days=offset)).isoformat() for offset in range(DAYS)]
+    for _ in range(count):
+        exercise_id = rng.choice(exercise_ids)
+        day = rng.choice(days)
+        notes = rng.choice(NOTES) if rng.random() < 0.1 else None
+        if exercise_id in strength_ids:
+            yield (day, exercise_id, rng.randint(10, 90), rng.randint(50, 600),
+                   rng.randint(1, 6), rng.randint(1, 15), float(rng.randrange(20, 200, 5)), notes)
+        else:
+            yield (day, exercise_id, rng.randint(10, 120), rng.randint(50, 900), None, None, None, notes)
+
+def generate(db_file, exercises=100, logs=100_000, seed=1, progress=None):
+    """Fill db_file with synthetic exercises, workout logs and PRs.
+
+    Rows are added to whatever the file already holds; start from a missing file
+    for reproducible contents. `progress(logs_written)` is called after each chunk.
+    """
+    db = Database(db_file, performance=True)
+    try:
+        types = dict(exercise_rows(exercises, seed))
+        db.add_exercises(types.items())
+        ids = db.get_exercise_ids()
+        exercise_ids = sorted(ids[name] for name in types)
+        strength_ids = [ids[name] for name, type_ in types.items() if type_ == 'Strength']
+
+        rows = log_rows(logs, exercise_ids, strength_ids, seed)
+        written = 0
+        while written < logs:
+            chunk = [row for _, row in zip(range(CHUNK_SIZE), rows)]
+            written += db.add_workout_logs(chunk)
+            if progress:
+                progress(written)
+
+        rng = random.Random(seed)
+        db.upsert_prs((exercise_id, float(rng.randrange(40, 250, 5))) for exercise_id in strength_ids)
+    finally:
+        db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.synthetic', description=generate.__doc__.splitlines()[0])
+    parser.add_argument('database', help="database file to create")
+    parser.add_argument('--exercises', type=int, default=100, help="10 to 10,000 (default: %(default)s)")
+    parser.add_argument('--logs', type=int, default=100_000, help="1,000 to 10,000,000 (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--force', action='store_true', help="replace the database file if it exists")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.database):
+        if not args.force:
+            parser.error(f"{args.database} exists; pass --force to replace it")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.database + suffix):
+                os.remove(args.database + suffix)
+    directory = os.path.dirname(os.path.abspath(args.database))
+    os.makedirs(directory, exist_ok=True)
+
+    started = time.perf_counter()
+    generate(args.database, args.exercises, args.logs, args.seed,
+             progress=lambda written: print(f"\r{written:,} / {args.logs:,} logs", end='', file=sys.stderr))
+    print(f"\nCreated {args.database} in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
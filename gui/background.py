@@ -0,0 +1,118 @@
+# gui/background.py
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+class BackgroundRunner:
+    """Runs slow work on worker threads and hands results back to the Tk main loop.
+
+    Every job has a key. Submitting a job whose key is already running or queued
+    supersedes the earlier request: at most one job per key runs at a time, only
+    the newest queued request runs next, and callbacks of superseded or cancelled
+    requests are dropped. A burst of refreshes therefore costs one reload.
+    Results are collected by polling with ``after()``, so worker threads never
+    touch Tk.
+    """
+
+    def __init__(self, widget, max_workers=2, poll_ms=25):
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tk-worker')
+        self._results = queue.SimpleQueue()
+        self._generations = {}   # key -> newest generation submitted
+        self._running = {}       # key -> future
+        self._pending = {}       # key -> queued job, waiting for the running one
+        self._timers = {}        # key -> after() id for delayed submits
+        self._polling = False
+        self._closed = False
+
+    def submit(self, key, fn, callback, *args, error_callback=None, delay_ms=0):
+        """Run ``fn(*args)`` off the main loop and call ``callback(result)`` on it.
+
+        ``delay_ms`` debounces: the job starts only after no newer submit with the
+        same key has arrived for that long.
+        """
+        if self._closed:
+            return
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        job = (generation, fn, args, callback, error_callback)
+
+        timer = self._timers.pop(key, None)
+        if timer:
+            self.widget.after_cancel(timer)
+        if delay_ms:
+            self._timers[key] = self.widget.after(delay_ms, self._enqueue, key, job)
+        else:
+            self._enqueue(key, job)
+
+    def cancel(self, key):
+        """Drop any queued or running job for ``key``; its callback will not run."""
+        self._generations[key] = self._generations.get(key, 0) + 1
+        self._pending.pop(key, None)
+        timer = self._timers.pop(key, None)
+        if timer:
+            self.widget.after_cancel(timer)
+        future = self._running.get(key)
+        if future:
+            future.cancel()
+
+    def is_busy(self, key):
+        """Return True if a job for ``key`` is running or waiting."""
+        return key in self._running or key in self._pending or key in self._timers
+
+    def shutdown(self):
+        """Stop accepting work and discard anything not yet started."""
+        self._closed = True
+        for timer in self._timers.values():
+            self.widget.after_cancel(timer)
+        self._timers.clear()
+        self._pending.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _enqueue(self, key, job):
+        self._timers.pop(key, None)
+        if key in self._running:
+            self._pending[key] = job
+        else:
+            self._start(key, job)
+
+    def _start(self, key, job):
+        generation, fn, args, callback, error_callback = job
+        future = self.executor.submit(fn, *args)
+        self._running[key] = future
+        future.add_done_callback(
+            lambda done: self._results.put((key, generation, done, callback, error_callback)))
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                key, generation, future, callback, error_callback = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._running.pop(key, None)
+            job = self._pending.pop(key, None)
+            if job and not self._closed:
+                self._start(key, job)
+
+            if future.cancelled() or generation != self._generations.get(key):
+                continue
+            error = future.exception()
+            if error is None:
+                callback(future.result())
+            elif error_callback:
+                error_callback(error)
+            else:
+                self.widget.after_idle(self._reraise, error)
+
+        if self._running and not self._closed:
+            self.widget.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    @staticmethod
+    def _reraise(error):
+        raise error  # Reported through Tk's callback exception handler
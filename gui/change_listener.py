@@ -0,0 +1,51 @@
+# gui/change_listener.py
+
+class ChangeListener:
+    """Collects database change events for a widget and applies them in batches.
+
+    Events arriving within ``delay_ms`` of each other are handed to
+    ``apply(events)`` together, so a burst of writes costs one refresh. The
+    subscription ends when the widget is destroyed. Writes must happen on the
+    Tk main thread, as they do in the GUI.
+    """
+
+    def __init__(self, widget, db, tables, apply, delay_ms=50):
+        self.widget = widget
+        self.apply = apply
+        self.delay_ms = delay_ms
+        self._events = []
+        self._timer = None
+        self._unsubscribe = db.changes.subscribe(self._on_changes, tables)
+        widget.bind('<Destroy>', self._on_destroy, add='+')
+
+    def _on_changes(self, events):
+        self._events.extend(events)
+        if self._timer is None:
+            self._timer = self.widget.after(self.delay_ms, self._flush)
+
+    def _flush(self):
+        events, self._events = self._events, []
+        self._timer = None
+        self.apply(events)
+
+    def _on_destroy(self, event):
+        if event.widget is self.widget:
+            self.close()
+
+    def close(self):
+        self._unsubscribe()
+        if self._timer is not None:
+            self.widget.after_cancel(self._timer)
+            self._timer = None
+
+def keys_by_op(events, table):
+    """Group the keys of one table's events into {op: [keys]}, keeping only each key's latest op."""
+    latest = {}
+    for event in events:
+        if event.table == table:
+            latest.pop(event.key, None)   # Re-insert, so the dict keeps the latest order
+            latest[event.key] = event.op
+    grouped = {}
+    for key, op in latest.items():
+        grouped.setdefault(op, []).append(key)
+    return grouped
@@ -0,0 +1,259 @@
+# gui/chart_render.py
+
+"""Chart drawing shared by ProgressChartsTab and its render process, and a cache of rendered charts.
+
+A Rendering is a chart's RGBA bitmap plus the subplot margins tight_layout chose
+for it, so the tab can show the bitmap and lay out its live figure to match
+without drawing it. Renderings are keyed on (chart, width, height, dpi) and carry
+a digest of the data they show: an entry whose digest differs from the current
+data is stale, still worth showing until a fresh one is rendered.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from utils.downsample import minmax
+
+PR_CHARTS = ["Bar", "Line"]
+PR_HISTORY_CHART = "PR history (estimated 1RM)"
+MAX_HISTORY_LINES = 10
+
+# Time-series charts: option label -> (series name, y-axis label, colour)
+TIME_SERIES_CHARTS = {
+    "Calories over time": ('calories', 'Calories Burned', 'tab:orange'),
+    "Duration over time": ('duration', 'Duration (min)', 'tab:blue'),
+}
+
+MEMORY_LIMIT = 64 * 1024 * 1024     # Bytes of bitmaps kept in memory
+DISK_LIMIT = 64 * 1024 * 1024       # Bytes of compressed bitmaps kept on disk
+SUBPLOT_PARAMS = ('left', 'bottom', 'right', 'top', 'wspace', 'hspace')
+
+class Rendering(NamedTuple):
+    digest: str           # data_digest() of the data drawn
+    pixels: np.ndarray    # uint8, shape (height, width, 4)
+    layout: tuple         # Figure subplot parameters, in SUBPLOT_PARAMS order
+
+def data_digest(data):
+    """Hash prepared chart data (arrays, sequences, dicts and scalars)."""
+    hasher = hashlib.blake2b(digest_size=16)
+    _feed(hasher, data)
+    return hasher.hexdigest()
+
+def _feed(hasher, value):
+    if isinstance(value, np.ndarray):
+        hasher.update(f"array{value.dtype.str}{value.shape}".encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"seq{len(value)}".encode())
+        for item in value:
+            _feed(hasher, item)
+    elif isinstance(value, dict):
+        hasher.update(f"dict{len(value)}".encode())
+        for key in sorted(value):
+            _feed(hasher, key)
+            _feed(hasher, value[key])
+    else:
+        hasher.update(f"{type(value).__name__}:{value!r};".encode())
+
+# --- Drawing ---
+
+def draw(ax, chart, data):
+    """Draw a chart on empty axes. Returns the (x, y) series of a time-series chart, else None.
+
+    The series line itself is left to the caller, which samples it to the axes' width.
+    """
+    if not data:
+        message = 'No Workout Data Available' if chart in TIME_SERIES_CHARTS else 'No PR Data Available'
+        ax.text(0.5, 0.5, message, horizontalalignment='center', verticalalignment='center')
+    elif chart in TIME_SERIES_CHARTS:
+        name, label, _ = TIME_SERIES_CHARTS[chart]
+        set_date_axis(ax)
+        ax.set_ylabel(label)
+        ax.set_title(chart)
+        set_limits(ax, *data[name])
+        return data[name]
+    elif chart == PR_HISTORY_CHART:
+        for exercise, x, y in data:
+            ax.step(x, y, where='post', marker='o', markersize=3, label=exercise)
+        set_date_axis(ax)
+        ax.set_ylabel('Estimated 1RM')
+        ax.set_title('PR Progression')
+        ax.legend(loc='upper left', fontsize='small')
+    else:
+        exercises, max_lifts = data
+        if chart == "Bar":
+            ax.bar(exercises, max_lifts, color='skyblue')
+        elif chart == "Line":
+            ax.plot(exercises, max_lifts, marker='o', linestyle='-', color='green')
+        ax.set_ylabel('Max Lift')
+        ax.set_title('Personal Records')
+        ax.set_xlabel('Exercise')
+        ax.tick_params(axis='x', rotation=45)
+    return None
+
+def set_date_axis(ax):
+    locator = mdates.AutoDateLocator()
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
+def set_limits(ax, x, y):
+    ax.set_xlim(x[0] - 1, x[-1] + 1)
+    ax.set_ylim(min(0, y.min()), y.max() * 1.05 or 1)
+
+def layout(figure):
+    return tuple(float(getattr(figure.subplotpars, name)) for name in SUBPLOT_PARAMS)
+
+def default_layout():
+    """Subplot parameters of a new figure; tight_layout starts from these in every process."""
+    return tuple(float(rcParams[f'figure.subplot.{name}']) for name in SUBPLOT_PARAMS)
+
+def apply_layout(figure, params):
+    figure.subplots_adjust(**dict(zip(SUBPLOT_PARAMS, params)))
+
+def render(chart, data, width, height, dpi):
+    """Draw a chart off-screen with Agg; returns (pixels, layout). Runs in the render process."""
+    figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    series = draw(ax, chart, data)
+    figure.tight_layout()
+    line = None
+    if series is not None:
+        x, y = series
+        line, = ax.plot(*minmax(x, y, max(int(ax.bbox.width), 1) // 2), color=TIME_SERIES_CHARTS[chart][2],
+                        linewidth=1, animated=True)
+    canvas.draw()
+    if line is not None:
+        ax.draw_artist(line)    # On top of the finished figure, as the tab blits it
+    return np.array(canvas.buffer_rgba()), layout(figure)
+
+class RenderWorker:
+    """A single spawned process that renders charts, started on first use.
+
+    ``render`` blocks until the bitmap is ready, so call it from a worker thread.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def render(self, chart, data, width, height, dpi):
+        with self._lock:
+            if self._executor is None:
+                # Spawned, not forked: the parent holds Tk and the SQLite connections
+                self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+            executor = self._executor
+        return executor.submit(render, chart, data, width, height, dpi).result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# --- Cache ---
+
+class ChartCache:
+    """LRU of Renderings capped at ``max_bytes``, optionally backed by files in ``directory``.
+
+    Thread-safe; ``save`` compresses and writes a file, so call it off the main loop.
+    """
+
+    def __init__(self, max_bytes=MEMORY_LIMIT, directory=None, max_disk_bytes=DISK_LIMIT):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()   # key -> Rendering, least recently used first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the Rendering for a key from memory or disk, or None."""
+        with self._lock:
+            rendering = self._entries.get(key)
+            if rendering is not None:
+                self._entries.move_to_end(key)
+                return rendering
+        rendering = self._load(key)
+        if rendering is not None:
+            self.put(key, rendering)
+        return rendering
+
+    def put(self, key, rendering):
+        """Keep a Rendering in memory, evicting the least recently used past the cap."""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.pixels.nbytes
+            self._entries[key] = rendering
+            self.bytes += rendering.pixels.nbytes
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.pixels.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    # --- Disk ---
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(repr(key).encode()).hexdigest() + '.npz')
+
+    def save(self, key, rendering):
+        """Write a Rendering to the cache directory, then trim the directory to its cap."""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as file:
+            np.savez_compressed(file, digest=np.array(rendering.digest), pixels=rendering.pixels,
+                                layout=np.array(rendering.layout))
+        os.replace(temp_path, path)    # Readers never see a partial file
+        self._trim()
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as stored:
+                rendering = Rendering(str(stored['digest']), stored['pixels'], tuple(stored['layout'].tolist()))
+            os.utime(path)     # Trimming removes the least recently used files first
+            return rendering
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None    # Unreadable; the next save replaces it
+
+    def _trim(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
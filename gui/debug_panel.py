@@ -0,0 +1,96 @@
+# gui/debug_panel.py
+
+import tkinter as tk
+from tkinter import ttk, filedialog
+from utils import profiling
+
+REFRESH_MS = 1000
+
+STATEMENT_COLUMNS = ('Calls', 'Total (ms)', 'Mean (ms)', 'p95 (ms)', 'Max (ms)', 'Rows', 'Nested', 'Statement')
+SPAN_COLUMNS = ('Span', 'Calls', 'Total (ms)', 'Mean (ms)', 'p95 (ms)', 'Max (ms)')
+
+class DebugPanel(ttk.Frame):
+    """Live view of the profiler: slowest SQL statements with their plans, and GUI spans."""
+
+    def __init__(self, parent, db, runner=None):
+        super().__init__(parent)
+        self.db = db
+        self.profiler = profiling.active()
+        self.plans = {}    # Statement iid -> (sql, plan)
+        self.create_widgets()
+        if self.profiler:
+            self.refresh()
+
+    def create_widgets(self):
+        if self.profiler is None:
+            ttk.Label(self, text="Profiling is off. Start the app with WORKOUT_TRACKER_PROFILE=1 to enable it.").pack(
+                padx=10, pady=10)
+            return
+
+        btn_frame = ttk.Frame(self)
+        btn_frame.pack(fill='x', padx=10, pady=5)
+        ttk.Button(btn_frame, text="Reset", command=self.reset).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Save JSON...", command=lambda: self.save('.json')).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Save Prometheus...", command=lambda: self.save('.prom')).pack(side='left', padx=5)
+
+        panes = ttk.PanedWindow(self, orient='vertical')
+        panes.pack(fill='both', expand=True, padx=10, pady=5)
+
+        self.statements = self.make_tree(panes, STATEMENT_COLUMNS, stretch='Statement')
+        self.statements.bind('<<TreeviewSelect>>', self.show_plan)
+        self.spans = self.make_tree(panes, SPAN_COLUMNS, stretch='Span')
+
+        self.plan_text = tk.Text(panes, height=8, wrap='none')
+        panes.add(self.plan_text, weight=1)
+
+    def make_tree(self, panes, columns, stretch):
+        tree = ttk.Treeview(panes, columns=columns, show='headings', height=8)
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=400 if column == stretch else 80, stretch=column == stretch,
+                        anchor='w' if column == stretch else 'e')
+        panes.add(tree, weight=2)
+        return tree
+
+    def refresh(self):
+        """Redraw the tables, then poll again while the panel exists."""
+        if self.winfo_ismapped():
+            dump = self.profiler.to_dict()
+            selected = self.statements.selection()
+            self.statements.delete(*self.statements.get_children())
+            self.plans.clear()
+            for index, stats in enumerate(dump['statements']):
+                iid = str(index)
+                self.plans[iid] = (stats['sql'], stats['plan'])
+                self.statements.insert('', 'end', iid=iid, values=(
+                    stats['count'], f"{stats['sum_ms']:.1f}", f"{stats['mean_ms']:.2f}",
+                    f"{stats['p95_ms']:.2f}", f"{stats['max_ms']:.2f}", stats['rows'], stats['nested'], stats['sql'],
+                ))
+            if selected and self.statements.exists(selected[0]):
+                self.statements.selection_set(selected[0])
+
+            self.spans.delete(*self.spans.get_children())
+            for name, span in dump['spans'].items():
+                self.spans.insert('', 'end', values=(
+                    name, span['count'], f"{span['sum_ms']:.1f}", f"{span['mean_ms']:.2f}",
+                    f"{span['p95_ms']:.2f}", f"{span['max_ms']:.2f}",
+                ))
+        self.after(REFRESH_MS, self.refresh)
+
+    def show_plan(self, _=None):
+        selected = self.statements.selection()
+        if not selected or selected[0] not in self.plans:
+            return
+        sql, plan = self.plans[selected[0]]
+        self.plan_text.delete('1.0', tk.END)
+        self.plan_text.insert(tk.END, f"{sql}\n\nQUERY PLAN\n{plan or '(none)'}")
+
+    def reset(self):
+        self.profiler.reset()
+        self.plan_text.delete('1.0', tk.END)
+
+    def save(self, extension):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=extension,
+                                            filetypes=[("Profile", f"*{extension}")])
+        if path:
+            self.profiler.dump(path)
@@ -1,14 +1,24 @@
 # gui/exercise_tab.py
 
+import queue
 import tkinter as tk
 from tkinter import ttk, messagebox
+from gui.paged_treeview import PagedTreeview
+from gui.background import BackgroundRunner
+from gui.change_listener import ChangeListener, keys_by_op
+from utils.database import UNDO_WINDOW
+from utils.profiling import traced
+
+PURGE_POLL_MS = 500
 
 class ExerciseTab(ttk.Frame):
-    def __init__(self, parent, db):
+    def __init__(self, parent, db, runner=None):
         super().__init__(parent)
         self.db = db
+        self.runner = runner or BackgroundRunner(self)
         self.create_widgets()
         self.load_data()
+        self.listener = ChangeListener(self, db, ('exercises',), self.apply_changes)
 
     def create_widgets(self):
         # Frame for form inputs
@@ -27,10 +37,16 @@ class ExerciseTab(ttk.Frame):
         self.add_button.grid(row=2, column=0, columnspan=2, pady=10)
 
         # Treeview for displaying exercises
-        self.tree = ttk.Treeview(self, columns=('Name', 'Type'), show='headings')
-        self.tree.heading('Name', text='Name')
-        self.tree.heading('Type', text='Type')
-        self.tree.pack(fill='both', expand=True, padx=10, pady=10)
+        self.view = PagedTreeview(
+            self, columns=('Name', 'Type'), headings=('Name', 'Type'),
+            fetch_page=self.db.get_exercises_page,
+            key_of=lambda row: (row[1], row[0]),
+            iid_of=lambda row: row[0],
+            values_of=lambda row: row[1:],
+            runner=self.runner,
+        )
+        self.view.pack(fill='both', expand=True, padx=10, pady=10)
+        self.tree = self.view.tree
 
         # Buttons for Update and Delete
         btn_frame = ttk.Frame(self)
@@ -42,15 +58,41 @@ class ExerciseTab(ttk.Frame):
         self.delete_button = ttk.Button(btn_frame, text="Delete Selected", command=self.delete_exercise)
         self.delete_button.pack(side='left', padx=5)
 
+        # Shown after a delete: an Undo button while it can be undone, then the purge's progress
+        self.status_frame = ttk.Frame(self)
+        self.status_frame.pack(fill='x', padx=10, pady=(0, 5))
+        self.status_label = ttk.Label(self.status_frame, text="")
+        self.status_label.pack(side='left')
+        self.undo_button = ttk.Button(self.status_frame, text="Undo", command=self.undo_delete)
+        self.deleted_name = None
+        self.undo_after = None
+        self.poll_after = None
+        self.purge_errors = queue.SimpleQueue()    # Filled by the purge thread, shown by show_purge_progress
+
+    @traced
     def load_data(self):
-        exercises = self.db.get_all_exercises()
-        self.refresh_treeview(exercises)
+        self.refresh_treeview()
+
+    def refresh_treeview(self):
+        self.view.reload()
 
-    def refresh_treeview(self, exercises):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for name, type_ in exercises:
-            self.tree.insert('', 'end', values=(name, type_))
+    def apply_changes(self, events):
+        """Update only the rows whose exercises changed, or reload after a large burst."""
+        changed = keys_by_op(events, 'exercises')
+        if sum(map(len, changed.values())) > self.view.page_size:
+            self.refresh_treeview()
+            return
+        for exercise_id in changed.get('delete', ()):
+            self.view.remove(exercise_id)
+        for exercise_id in changed.get('insert', []) + changed.get('update', []):
+            self.refresh_row(exercise_id)
+
+    def refresh_row(self, exercise_id):
+        row = self.db.get_exercise(exercise_id)
+        if row:
+            self.view.upsert(row)
+        else:
+            self.view.remove(exercise_id)
 
     def add_exercise(self):
         name = self.name_entry.get().strip()
@@ -62,7 +104,6 @@ class ExerciseTab(ttk.Frame):
 
         success = self.db.add_exercise(name, type_)
         if success:
-            self.load_data()
             self.clear_form()
         else:
             messagebox.showwarning("Duplicate Entry", "Exercise already exists.")
@@ -73,8 +114,8 @@ class ExerciseTab(ttk.Frame):
             messagebox.showwarning("Selection Error", "Please select an exercise to update.")
             return
 
-        selected_item = self.tree.item(selected[0])
-        old_name, old_type = selected_item['values']
+        exercise_id = int(selected[0])
+        old_name, old_type = self.db.catalog.get(exercise_id)  # Tk turns numeric-looking values into ints
 
         # Pop-up window for updating
         update_window = tk.Toplevel(self)
@@ -100,7 +141,6 @@ class ExerciseTab(ttk.Frame):
 
             success = self.db.update_exercise(old_name, new_name, new_type)
             if success:
-                self.load_data()
                 update_window.destroy()
             else:
                 messagebox.showwarning("Duplicate Entry", "Exercise name already exists.")
@@ -114,16 +154,50 @@ class ExerciseTab(ttk.Frame):
             messagebox.showwarning("Selection Error", "Please select an exercise to delete.")
             return
 
-        selected_item = self.tree.item(selected[0])
-        name = selected_item['values'][0]
+        name = self.db.catalog.name_of(int(selected[0]))
 
         confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete '{name}'?")
         if confirm:
             success = self.db.delete_exercise(name)
-            if success:
-                self.load_data()
-            else:
+            if not success:
                 messagebox.showwarning("Error", "Failed to delete exercise.")
+                return
+            self.offer_undo(name)
+            self.db.purger.start(error=self.purge_errors.put)
+            if self.poll_after is None:
+                self.poll_after = self.after(PURGE_POLL_MS, self.show_purge_progress)
+
+    def offer_undo(self, name):
+        """Show an Undo button for name until UNDO_WINDOW has passed."""
+        if self.undo_after:
+            self.after_cancel(self.undo_after)
+        self.deleted_name = name
+        self.status_label.config(text=f"Deleted '{name}'.")
+        self.undo_button.pack(side='left', padx=5)
+        self.undo_after = self.after(int(UNDO_WINDOW.total_seconds() * 1000), self.hide_undo)
+
+    def hide_undo(self):
+        self.undo_after = None
+        self.deleted_name = None
+        self.undo_button.pack_forget()
+        self.status_label.config(text="")
+
+    def undo_delete(self):
+        name = self.deleted_name
+        if self.undo_after:
+            self.after_cancel(self.undo_after)
+        self.hide_undo()
+        if name and not self.db.restore_exercise(name):
+            messagebox.showwarning("Undo", f"'{name}' can no longer be restored.")
+
+    def show_purge_progress(self):
+        """Poll the background purge, showing how far it has got once the undo window is over."""
+        purger = self.db.purger
+        while not self.purge_errors.empty():
+            messagebox.showerror("Purge failed", str(self.purge_errors.get()))
+        if self.deleted_name is None:
+            self.status_label.config(text=str(purger.progress) if purger.running() and purger.progress else "")
+        self.poll_after = self.after(PURGE_POLL_MS, self.show_purge_progress) if purger.running() else None
 
     def clear_form(self):
         self.name_entry.delete(0, tk.END)
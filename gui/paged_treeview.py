@@ -0,0 +1,148 @@
+# gui/paged_treeview.py
+
+from bisect import bisect_left
+from tkinter import ttk
+from utils.profiling import traced
+
+class _Descending:
+    """Sort wrapper that inverts the ordering of a key."""
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+class PagedTreeview(ttk.Frame):
+    """Treeview that loads rows a page at a time and applies single-row changes in place.
+
+    Rows are fetched with keyset pagination: ``fetch_page(after, limit)`` must return
+    rows ordered by ``key_of(row)`` (descending when ``descending`` is set), starting
+    strictly after the ``after`` key. Keys must be unique. Only the rows that have
+    been scrolled into view are held in the widget.
+
+    With a ``runner`` (a gui.background.BackgroundRunner), pages are fetched on a
+    worker thread and appended when they arrive. ``tags_of(row)``, if given,
+    returns Treeview tags for a row, e.g. to find every row of one exercise.
+    """
+
+    def __init__(self, parent, columns, headings, fetch_page, key_of, iid_of, values_of,
+                 descending=False, page_size=200, runner=None, tags_of=None):
+        super().__init__(parent)
+        self.runner = runner
+        self.fetch_page = fetch_page
+        self.key_of = key_of
+        self.iid_of = iid_of
+        self.values_of = values_of
+        self.tags_of = tags_of or (lambda row: ())
+        self.descending = descending
+        self.page_size = page_size
+
+        self._keys = []        # loaded keys, in display order
+        self._key_by_iid = {}
+        self._exhausted = False
+        self._loading = False
+        self._removed_while_loading = set()
+
+        self.tree = ttk.Treeview(self, columns=columns, show='headings')
+        for column, heading in zip(columns, headings):
+            self.tree.heading(column, text=heading)
+
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+
+    # --- Loading ---
+
+    def reload(self):
+        """Drop every loaded row and fetch the first page again."""
+        self.tree.delete(*self.tree.get_children())
+        self._keys = []
+        self._key_by_iid = {}
+        self._exhausted = False
+        self._loading = False
+        self.load_more()
+
+    def load_more(self):
+        """Fetch and append the next page of rows."""
+        if self._exhausted or self._loading:
+            return
+        self._loading = True
+        self._removed_while_loading.clear()
+        after = self._last_key()
+        if self.runner is None:
+            self._on_page(self.fetch_page(after, self.page_size))
+        else:
+            # Reusing the key supersedes a page still in flight from before a reload
+            self.runner.submit(('page', str(self)), self.fetch_page, self._on_page,
+                               after, self.page_size, error_callback=self._on_page_error)
+
+    @traced
+    def _on_page(self, rows):
+        self._loading = False
+        for row in rows:
+            if str(self.iid_of(row)) not in self._removed_while_loading:
+                self._append(row)
+        if len(rows) < self.page_size:
+            self._exhausted = True
+
+    def _on_page_error(self, error):
+        self._loading = False
+        raise error
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if not self._exhausted and float(last) >= 0.9:
+            self.after_idle(self.load_more)
+
+    def _last_key(self):
+        return self._keys[-1] if self._keys else None
+
+    def _index(self, key):
+        if self.descending:
+            return bisect_left(self._keys, _Descending(key), key=_Descending)
+        return bisect_left(self._keys, key)
+
+    def _append(self, row):
+        key = self.key_of(row)
+        iid = str(self.iid_of(row))
+        if iid in self._key_by_iid:
+            return
+        self._keys.append(key)
+        self._key_by_iid[iid] = key
+        self.tree.insert('', 'end', iid=iid, values=self.values_of(row), tags=self.tags_of(row))
+
+    # --- Single-row diffs ---
+
+    def upsert(self, row):
+        """Insert or move a row to its sorted position, if it falls inside the loaded window."""
+        iid = str(self.iid_of(row))
+        self._detach(iid)
+
+        key = self.key_of(row)
+        index = self._index(key)
+        if not self._exhausted and index == len(self._keys):
+            return  # Past the loaded window; it will arrive with a later page
+
+        self._keys.insert(index, key)
+        self._key_by_iid[iid] = key
+        self.tree.insert('', index, iid=iid, values=self.values_of(row), tags=self.tags_of(row))
+
+    def remove(self, iid):
+        """Remove a row if it is loaded."""
+        iid = str(iid)
+        if self._loading:
+            self._removed_while_loading.add(iid)  # Don't let an in-flight page bring it back
+        self._detach(iid)
+
+    def _detach(self, iid):
+        key = self._key_by_iid.pop(iid, None)
+        if key is None:
+            return
+        del self._keys[self._index(key)]
+        self.tree.delete(iid)
+
+    def __contains__(self, iid):
+        return str(iid) in self._key_by_iid
@@ -2,13 +2,21 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+from gui.paged_treeview import PagedTreeview
+from gui.background import BackgroundRunner
+from gui.change_listener import ChangeListener, keys_by_op
+from utils.profiling import traced
+from utils.records import PR_KINDS
 
 class PRTab(ttk.Frame):
-    def __init__(self, parent, db):
+    def __init__(self, parent, db, runner=None):
         super().__init__(parent)
         self.db = db
+        self.runner = runner or BackgroundRunner(self)
+        self.names_version = None  # Catalog version the exercise combobox shows
         self.create_widgets()
         self.load_data()
+        self.listener = ChangeListener(self, db, ('exercises', 'pr_records'), self.apply_changes)
 
     def create_widgets(self):
         # Frame for form inputs
@@ -27,25 +35,72 @@ class PRTab(ttk.Frame):
         self.add_button.grid(row=2, column=0, columnspan=2, pady=10)
 
         # Treeview for displaying PRs
-        self.tree = ttk.Treeview(self, columns=('Exercise', 'Max Lift'), show='headings')
-        self.tree.heading('Exercise', text='Exercise')
-        self.tree.heading('Max Lift', text='Max Lift')
-        self.tree.pack(fill='both', expand=True, padx=10, pady=10)
+        # Detected records come from the in-memory running maxima, not extra queries
+        self.view = PagedTreeview(
+            self,
+            columns=('Exercise', 'Max Lift', *PR_KINDS),
+            headings=('Exercise', 'Max Lift', *PR_KINDS.values()),
+            fetch_page=self.fetch_page,
+            key_of=lambda row: (row[1], row[0]),
+            iid_of=lambda row: row[0],
+            values_of=self.display_values,
+            runner=self.runner,
+        )
+        self.view.pack(fill='both', expand=True, padx=10, pady=10)
+        self.tree = self.view.tree
 
         # Button to delete PR
         self.delete_button = ttk.Button(self, text="Delete Selected PR", command=self.delete_pr)
         self.delete_button.pack(pady=5)
 
+    @traced
     def load_data(self):
-        self.exercise_combo['values'] = [exercise[0] for exercise in self.db.get_all_exercises()]
-        prs = self.db.get_all_prs()
-        self.refresh_treeview(prs)
-
-    def refresh_treeview(self, prs):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for exercise, max_lift in prs:
-            self.tree.insert('', 'end', values=(exercise, max_lift))
+        self.load_exercise_names()
+        self.refresh_treeview()
+
+    def load_exercise_names(self):
+        """Refresh the exercise combobox from the catalog, unless it is already current."""
+        if self.names_version != self.db.catalog.version:
+            self.runner.submit(('exercise names', str(self)), self.db.catalog.snapshot, self.set_exercise_names)
+
+    def set_exercise_names(self, snapshot):
+        self.names_version, self.exercise_combo['values'] = snapshot
+
+    def refresh_treeview(self):
+        self.view.reload()
+
+    def fetch_page(self, after, limit):
+        return [self.with_records(row) for row in self.db.get_prs_page(after, limit)]
+
+    def with_records(self, row):
+        return (*row, self.db.get_best_prs(row[0]))
+
+    def display_values(self, row):
+        _, exercise, max_lift, records = row
+        return (exercise, max_lift, *(f"{records[kind]:g}" if kind in records else '' for kind in PR_KINDS))
+
+    def apply_changes(self, events):
+        """Update only the PRs that changed, or reload after a large burst."""
+        if any(event.table == 'exercises' for event in events):
+            self.load_exercise_names()
+        changed = keys_by_op(events, 'pr_records')
+        # Renamed exercises move to a new sorted position
+        renamed = [exercise_id for exercise_id in keys_by_op(events, 'exercises').get('update', ())
+                   if exercise_id in self.view]
+        if sum(map(len, changed.values())) + len(renamed) > self.view.page_size:
+            self.refresh_treeview()
+            return
+        for exercise_id in changed.get('delete', ()):
+            self.view.remove(exercise_id)
+        for exercise_id in changed.get('insert', []) + changed.get('update', []) + renamed:
+            self.refresh_row(exercise_id)
+
+    def refresh_row(self, exercise_id):
+        row = self.db.get_pr(exercise_id)
+        if row:
+            self.view.upsert(self.with_records(row))
+        else:
+            self.view.remove(exercise_id)
 
     def add_update_pr(self):
         exercise = self.exercise_combo.get()
@@ -67,7 +122,6 @@ class PRTab(ttk.Frame):
             return
 
         self.db.add_or_update_pr(exercise_id, max_lift)
-        self.load_data()
         self.clear_form()
 
     def delete_pr(self):
@@ -76,15 +130,12 @@ class PRTab(ttk.Frame):
             messagebox.showwarning("Selection Error", "Please select a PR to delete.")
             return
 
-        selected_item = self.tree.item(selected[0])
-        exercise = selected_item['values'][0]
+        exercise_id = int(selected[0])
+        exercise = self.tree.item(selected[0])['values'][0]
 
         confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete PR for '{exercise}'?")
         if confirm:
-            exercise_id = self.db.get_exercise_id(exercise)
-            if exercise_id:
-                self.db.delete_pr(exercise_id)
-                self.load_data()
+            self.db.delete_pr(exercise_id)
 
     def clear_form(self):
         self.exercise_combo.set('')
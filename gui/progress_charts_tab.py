@@ -1,16 +1,49 @@
 # gui/progress_charts_tab.py
 
+import os
 import tkinter as tk
 from tkinter import ttk
+import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from gui import chart_render
+from gui.background import BackgroundRunner
+from gui.chart_render import PR_CHARTS, PR_HISTORY_CHART, MAX_HISTORY_LINES, TIME_SERIES_CHARTS
+from gui.change_listener import ChangeListener
+from utils.downsample import minmax
+from utils.profiling import traced
+
+# Data sources each table feeds, for refetching only the charts a change affects
+SOURCES_BY_TABLE = {
+    'workout_logs': ('totals', 'history'),
+    'pr_records': ('prs', 'history'),
+    'exercises': ('prs', 'history'),
+}
+
+def chart_cache_dir(db):
+    """Rendered charts are kept on disk next to the database (data/chart_cache), unless it is in memory."""
+    if db.db_path == ':memory:':
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(db.db_path)), 'chart_cache')
 
 class ProgressChartsTab(ttk.Frame):
-    def __init__(self, parent, db):
+    def __init__(self, parent, db, runner=None):
         super().__init__(parent)
         self.db = db
+        self.runner = runner or BackgroundRunner(self)
+        self.cache = chart_render.ChartCache(directory=chart_cache_dir(db))
+        self.worker = chart_render.RenderWorker()
+        self.chart_data = {}       # data source ('prs', 'history' or 'totals') -> prepared data
+        self.digests = {}          # data source -> chart_render.data_digest() of its data
+        self.shown_chart = None    # chart type the axes are currently set up for
+        self.series = None         # full-resolution (x, y) of the shown time series
+        self.line = None           # animated Line2D drawn by blitting
+        self.background = None
+        self.sampled_width = 0
         self.create_widgets()
         self.load_data()
+        self.listener = ChangeListener(self, db, tuple(SOURCES_BY_TABLE), self.apply_changes, delay_ms=500)
+        self.bind('<Destroy>', self.on_destroy, add='+')
 
     def create_widgets(self):
         # Frame for chart type selection
@@ -20,38 +53,235 @@ class ProgressChartsTab(ttk.Frame):
         ttk.Label(control_frame, text="Select Chart Type:").pack(side='left', padx=5)
 
         self.chart_type = tk.StringVar(value="Bar")
-        chart_options = ["Bar", "Line"]
+        chart_options = PR_CHARTS + list(TIME_SERIES_CHARTS) + [PR_HISTORY_CHART]
         chart_menu = ttk.OptionMenu(control_frame, self.chart_type, chart_options[0], *chart_options, command=self.plot_chart)
         chart_menu.pack(side='left', padx=5)
 
-        # Canvas for the chart
+        # Canvas for the chart, with zoom and pan
         self.figure = plt.Figure(figsize=(6,5), dpi=100)
         self.ax = self.figure.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.figure, self)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        toolbar = NavigationToolbar2Tk(self.canvas, self, pack_toolbar=False)
+        toolbar.pack(side='bottom', fill='x')
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
 
+    # --- Data ---
+
+    def data_source(self, chart):
+        if chart in TIME_SERIES_CHARTS:
+            return 'totals'
+        return 'history' if chart == PR_HISTORY_CHART else 'prs'
+
+    @traced
     def load_data(self):
+        self.chart_data.clear()
+        self.digests.clear()
         self.plot_chart()
 
-    def plot_chart(self, _=None):
-        self.ax.clear()
-        prs = self.db.get_pr_data()
+    def apply_changes(self, events):
+        """Drop the chart data the changes affect and refetch it if that chart is shown."""
+        stale = {source for event in events for source in SOURCES_BY_TABLE[event.table]}
+        for source in stale:
+            self.chart_data.pop(source, None)
+            self.digests.pop(source, None)
+        source = self.data_source(self.chart_type.get())
+        if source in stale:
+            self.fetch(source)
+
+    def fetch(self, source):
+        self.runner.submit(('chart', source, str(self)), self.load_chart_data, self.on_chart_data, source)
+
+    def load_chart_data(self, source):
+        """Prepare a chart's data and digest it for the render cache; runs on a worker thread."""
+        source, data = self.prepare_chart_data(source)
+        return source, data, chart_render.data_digest(data)
+
+    @traced
+    def prepare_chart_data(self, source):
+        """Fetch and shape a chart's series; runs on a worker thread."""
+        if source == 'prs':
+            prs = self.db.get_pr_data()
+            return source, tuple(zip(*prs)) if prs else None
 
-        if not prs:
-            self.ax.text(0.5, 0.5, 'No PR Data Available', horizontalalignment='center', verticalalignment='center')
+        if source == 'history':
+            series = {}
+            for _, exercise, day, _, value in self.db.get_pr_history(kind='e1rm'):
+                series.setdefault(exercise, []).append((day, value))
+            # Exercises with the most progression first
+            ranked = sorted(series.items(), key=lambda item: len(item[1]), reverse=True)[:MAX_HISTORY_LINES]
+            return source, [
+                (exercise, np.array([day for day, _ in points], dtype='datetime64[D]').astype(np.float64),
+                 np.array([value for _, value in points], dtype=np.float64))
+                for exercise, points in ranked
+            ]
+
+        totals = self.db.log_store.totals('day')   # Served from memory, no SQL
+        if not totals:
+            return source, None
+        days = np.array([row[0] for row in totals], dtype='datetime64[D]')
+        x = days.astype(np.float64)  # Matplotlib date numbers: days since 1970-01-01
+        return source, {
+            'duration': (x, np.array([row[2] for row in totals], dtype=np.float64)),
+            'calories': (x, np.array([row[3] for row in totals], dtype=np.float64)),
+        }
+
+    def on_chart_data(self, result):
+        source, data, digest = result
+        self.chart_data[source] = data
+        self.digests[source] = digest
+        chart = self.chart_type.get()
+        if self.data_source(chart) != source:
+            return
+        if chart == self.shown_chart and chart in TIME_SERIES_CHARTS and data and self.line:
+            self.update_series(*data[TIME_SERIES_CHARTS[chart][0]])
         else:
-            exercises, max_lifts = zip(*prs)
-            if self.chart_type.get() == "Bar":
-                self.ax.bar(exercises, max_lifts, color='skyblue')
-                self.ax.set_ylabel('Max Lift')
-                self.ax.set_title('Personal Records')
-            elif self.chart_type.get() == "Line":
-                self.ax.plot(exercises, max_lifts, marker='o', linestyle='-', color='green')
-                self.ax.set_ylabel('Max Lift')
-                self.ax.set_title('Personal Records')
-
-            self.ax.set_xlabel('Exercise')
-            self.ax.tick_params(axis='x', rotation=45)
-
-        self.figure.tight_layout()
+            self.draw_chart()
+
+    # --- Drawing ---
+
+    @traced
+    def plot_chart(self, _=None):
+        chart = self.chart_type.get()
+        source = self.data_source(chart)
+        if source in self.chart_data:
+            self.draw_chart()
+        else:
+            # Show the last rendering of this chart, if any, while its data loads
+            cached = self.cache.get(self.render_key(chart))
+            if cached:
+                self.show(cached)
+            self.fetch(source)
+
+    def render_key(self, chart):
+        """Cache key of a chart at the canvas's current size."""
+        width, height = self.figure.bbox.size
+        return (chart, round(width), round(height), self.figure.dpi)
+
+    @traced
+    def draw_chart(self):
+        """Show the current chart, from the render cache when possible.
+
+        A cached rendering of the same data is shown as is. A stale one is shown
+        while the render process draws a fresh one. Only without any rendering
+        is the chart drawn here, on the main loop.
+        """
+        chart = self.chart_type.get()
+        source = self.data_source(chart)
+        data, digest = self.chart_data.get(source), self.digests.get(source)
+        key = self.render_key(chart)
+        cached = self.cache.get(key)
+        if cached is None:
+            self.draw_here(chart, data, key, digest)
+            return
+        self.set_up_axes(chart, data, cached.layout)
+        if not self.show(cached):
+            self.draw_here(chart, data, key, digest)
+        elif cached.digest != digest:
+            self.runner.submit(('chart render', str(self)), self.render_elsewhere, self.on_rendered,
+                               chart, data, key, digest,
+                               error_callback=lambda error: self.on_render_failed(chart, key, digest))
+
+    def set_up_axes(self, chart, data, layout=None):
+        """Draw the chart's artists onto fresh axes and lay them out, without rendering."""
+        # New axes rather than ax.clear(), which keeps tick settings and callbacks, so
+        # the figure matches one the render process draws from scratch
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111)
+        self.shown_chart = chart
+        self.series = self.line = self.background = None
+        self.series = chart_render.draw(self.ax, chart, data)
+        chart_render.apply_layout(self.figure, layout or chart_render.default_layout())
+        if layout is None:
+            self.figure.tight_layout()
+        if self.series is not None:
+            color = TIME_SERIES_CHARTS[chart][2]
+            self.line, = self.ax.plot([], [], color=color, linewidth=1, animated=True)
+            # Zooming or panning re-samples the visible range before the redraw
+            self.ax.callbacks.connect('xlim_changed', self.resample)
+            self.resample()
+
+    def draw_here(self, chart, data, key, digest):
+        """Render the chart on the main loop and cache the result."""
+        self.set_up_axes(chart, data)
         self.canvas.draw()
+        rendering = chart_render.Rendering(
+            digest, np.array(self.canvas.get_renderer().buffer_rgba()), chart_render.layout(self.figure))
+        self.cache.put(key, rendering)
+        if self.cache.directory:
+            self.runner.submit(('chart save', key), self.cache.save, lambda _: None, key, rendering)
+
+    def render_elsewhere(self, chart, data, key, digest):
+        """Render in the render process and cache the result; runs on a worker thread."""
+        pixels, layout = self.worker.render(chart, data, *key[1:])
+        rendering = chart_render.Rendering(digest, pixels, layout)
+        self.cache.put(key, rendering)
+        self.cache.save(key, rendering)
+        return chart, key, rendering
+
+    def on_rendered(self, result):
+        """Swap a fresh rendering in if its chart, size and data are still the ones shown."""
+        chart, key, rendering = result
+        if self.is_current(chart, key, rendering.digest):
+            self.set_up_axes(chart, self.chart_data[self.data_source(chart)], rendering.layout)
+            if not self.show(rendering):
+                self.canvas.draw_idle()
+
+    def on_render_failed(self, chart, key, digest):
+        if self.is_current(chart, key, digest):
+            self.draw_here(chart, self.chart_data[self.data_source(chart)], key, digest)
+
+    def is_current(self, chart, key, digest):
+        return (chart == self.chart_type.get() == self.shown_chart and key == self.render_key(chart)
+                and digest == self.digests.get(self.data_source(chart)))
+
+    def show(self, rendering):
+        """Copy a rendering into the canvas; False if it was rendered at another size."""
+        pixels = np.asarray(self.canvas.get_renderer().buffer_rgba())
+        if pixels.shape != rendering.pixels.shape:
+            return False
+        pixels[...] = rendering.pixels
+        self.background = None   # The bitmap includes the series line
+        self.canvas.blit()
+        return True
+
+    def resample(self, _=None):
+        """Downsample the visible part of the series to the axes' pixel width."""
+        x, y = self.series
+        low, high = self.ax.get_xlim()
+        start, stop = np.searchsorted(x, (low, high))
+        start, stop = max(start - 1, 0), min(stop + 1, len(x))
+        self.sampled_width = max(int(self.ax.bbox.width), 1)
+        self.line.set_data(*minmax(x[start:stop], y[start:stop], self.sampled_width // 2))
+
+    def update_series(self, x, y):
+        """Swap in new data for the shown series, blitting when the axes limits still fit."""
+        old_x, old_y = self.series
+        self.series = (x, y)
+        if x[0] < old_x[0] or x[-1] > old_x[-1] or y.max() > self.ax.get_ylim()[1]:
+            chart_render.set_limits(self.ax, x, y)
+            self.resample()
+            self.canvas.draw_idle()
+            return
+
+        self.resample()
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.figure.bbox)
+
+    def on_destroy(self, event):
+        if event.widget is self:
+            self.worker.shutdown()
+
+    def on_draw(self, _event):
+        """After each full redraw, keep a copy of the static background and blit the series on top."""
+        if self.line is None:
+            return
+        if int(self.ax.bbox.width) != self.sampled_width:
+            self.resample()  # The canvas was resized
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.figure.bbox)
@@ -3,14 +3,34 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkcalendar import Calendar
-from datetime import datetime
+from datetime import datetime, date as date_type
+from gui.paged_treeview import PagedTreeview
+from gui.background import BackgroundRunner
+from gui.change_listener import ChangeListener, keys_by_op
+from utils.database import normalize_date
+from utils.profiling import traced
+from utils.records import PR_KINDS
+
+SEARCH_DELAY_MS = 250  # Typing pause before a filter change queries the database
+
+def parse_load(sets, reps, weight):
+    """Parse the optional sets, reps and weight fields; blank fields become None."""
+    sets, reps, weight = (value.strip() for value in (sets, reps, weight))
+    return (int(sets) if sets else None,
+            int(reps) if reps else None,
+            float(weight) if weight else None)
 
 class WorkoutLogTab(ttk.Frame):
-    def __init__(self, parent, db):
+    def __init__(self, parent, db, runner=None):
         super().__init__(parent)
         self.db = db
+        self.runner = runner or BackgroundRunner(self)
+        self.names_version = None  # Catalog version the exercise combobox shows
+        self.filters = {}          # Keyword arguments for Database.query_workout_logs
+        self._filter_timer = None
         self.create_widgets()
         self.load_data()
+        self.listener = ChangeListener(self, db, ('exercises', 'workout_logs'), self.apply_changes)
 
     def create_widgets(self):
         # Frame for form inputs
@@ -38,18 +58,75 @@ class WorkoutLogTab(ttk.Frame):
         self.calories_entry = ttk.Entry(form_frame)
         self.calories_entry.grid(row=3, column=1, padx=5, pady=5)
 
+        # Optional load, used for personal record detection
+        ttk.Label(form_frame, text="Sets:").grid(row=1, column=2, padx=5, pady=5, sticky='e')
+        self.sets_entry = ttk.Entry(form_frame, width=8)
+        self.sets_entry.grid(row=1, column=3, padx=5, pady=5, sticky='w')
+
+        ttk.Label(form_frame, text="Reps:").grid(row=2, column=2, padx=5, pady=5, sticky='e')
+        self.reps_entry = ttk.Entry(form_frame, width=8)
+        self.reps_entry.grid(row=2, column=3, padx=5, pady=5, sticky='w')
+
+        ttk.Label(form_frame, text="Weight (kg/lbs):").grid(row=3, column=2, padx=5, pady=5, sticky='e')
+        self.weight_entry = ttk.Entry(form_frame, width=8)
+        self.weight_entry.grid(row=3, column=3, padx=5, pady=5, sticky='w')
+
+        ttk.Label(form_frame, text="Notes:").grid(row=4, column=0, padx=5, pady=5, sticky='e')
+        self.notes_entry = ttk.Entry(form_frame, width=50)
+        self.notes_entry.grid(row=4, column=1, columnspan=3, padx=5, pady=5, sticky='we')
+
         # Add Button
         self.add_button = ttk.Button(form_frame, text="Add Workout", command=self.add_workout)
-        self.add_button.grid(row=4, column=0, columnspan=2, pady=10)
+        self.add_button.grid(row=5, column=0, columnspan=4, pady=10)
+
+        # Filters, applied by the database; text fields apply once typing pauses
+        filter_frame = ttk.LabelFrame(self, text="Filter")
+        filter_frame.pack(fill='x', padx=10)
+
+        ttk.Label(filter_frame, text="Search:").pack(side='left', padx=5, pady=5)
+        self.search_entry = ttk.Entry(filter_frame, width=25)
+        self.search_entry.pack(side='left', padx=5, pady=5)
+
+        ttk.Label(filter_frame, text="Exercise:").pack(side='left', padx=5, pady=5)
+        self.exercise_filter = ttk.Combobox(filter_frame, state="readonly", width=18)
+        self.exercise_filter.pack(side='left', padx=5, pady=5)
+
+        ttk.Label(filter_frame, text="Type:").pack(side='left', padx=5, pady=5)
+        self.type_filter = ttk.Combobox(filter_frame, state="readonly", width=12)
+        self.type_filter.pack(side='left', padx=5, pady=5)
+
+        ttk.Label(filter_frame, text="From:").pack(side='left', padx=5, pady=5)
+        self.start_entry = ttk.Entry(filter_frame, width=11)
+        self.start_entry.pack(side='left', padx=5, pady=5)
+
+        ttk.Label(filter_frame, text="To:").pack(side='left', padx=5, pady=5)
+        self.end_entry = ttk.Entry(filter_frame, width=11)
+        self.end_entry.pack(side='left', padx=5, pady=5)
+
+        ttk.Button(filter_frame, text="Clear", command=self.clear_filters).pack(side='left', padx=5, pady=5)
+
+        for entry in (self.search_entry, self.start_entry, self.end_entry):
+            entry.bind('<KeyRelease>', self.schedule_filter)
+            entry.bind('<Escape>', lambda event: self.clear_filters())
+        for combo in (self.exercise_filter, self.type_filter):
+            combo.bind('<<ComboboxSelected>>', lambda event: self.apply_filters())
 
         # Treeview for displaying workout logs
-        self.tree = ttk.Treeview(self, columns=('ID', 'Date', 'Exercise', 'Duration', 'Calories'), show='headings')
-        self.tree.heading('ID', text='ID')
-        self.tree.heading('Date', text='Date')
-        self.tree.heading('Exercise', text='Exercise')
-        self.tree.heading('Duration', text='Duration (min)')
-        self.tree.heading('Calories', text='Calories Burned')
-        self.tree.pack(fill='both', expand=True, padx=10, pady=10)
+        self.view = PagedTreeview(
+            self,
+            columns=('ID', 'Date', 'Exercise', 'Duration', 'Calories', 'Sets', 'Reps', 'Weight', 'Notes'),
+            headings=('ID', 'Date', 'Exercise', 'Duration (min)', 'Calories Burned', 'Sets', 'Reps', 'Weight',
+                      'Notes'),
+            fetch_page=self.db.get_workout_logs_page,
+            key_of=lambda log: (log[1], log[0]),
+            iid_of=lambda log: log[0],
+            values_of=self.display_values,
+            tags_of=lambda log: (f"exercise-{log[2]}",),
+            descending=True,
+            runner=self.runner,
+        )
+        self.view.pack(fill='both', expand=True, padx=10, pady=10)
+        self.tree = self.view.tree
 
         # Buttons for Update and Delete
         btn_frame = ttk.Frame(self)
@@ -61,19 +138,119 @@ class WorkoutLogTab(ttk.Frame):
         self.delete_button = ttk.Button(btn_frame, text="Delete Selected", command=self.delete_workout)
         self.delete_button.pack(side='left', padx=5)
 
+    @traced
     def load_data(self):
-        self.exercise_combo['values'] = [exercise[0] for exercise in self.db.get_all_exercises()]
-        workouts = self.db.get_all_workout_logs()
-        self.refresh_treeview(workouts)
-
-    def refresh_treeview(self, workouts):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for log in workouts:
-            self.tree.insert('', 'end', values=log)
+        self.load_exercise_names()
+        self.refresh_treeview()
+
+    def load_exercise_names(self):
+        """Refresh the exercise combobox from the catalog, unless it is already current."""
+        if self.names_version != self.db.catalog.version:
+            self.runner.submit(('exercise names', str(self)), self.db.catalog.snapshot, self.set_exercise_names)
+
+    def set_exercise_names(self, snapshot):
+        self.names_version, self.exercise_combo['values'] = snapshot
+        self.exercise_filter['values'] = ['', *snapshot[1]]
+        self.type_filter['values'] = ['', *self.db.catalog.types()]
+
+    # --- Filtering ---
+
+    def read_filters(self):
+        """Return query_workout_logs arguments for the filter fields, skipping incomplete dates."""
+        filters = {}
+        search = self.search_entry.get().strip()
+        if search:
+            filters['search'] = search
+        exercise = self.exercise_filter.get()
+        if exercise:
+            filters['exercise_id'] = self.db.get_exercise_id(exercise)
+        if self.type_filter.get():
+            filters['exercise_type'] = self.type_filter.get()
+        for key, entry in (('start', self.start_entry), ('end', self.end_entry)):
+            text = entry.get().strip()
+            if text:
+                try:
+                    filters[key] = normalize_date(text)
+                except ValueError:
+                    pass    # Still being typed; keep filtering on the other fields
+        return filters
+
+    def schedule_filter(self, event=None):
+        """Re-query once typing has paused for SEARCH_DELAY_MS, cancelling the previous wait."""
+        if self._filter_timer is not None:
+            self.after_cancel(self._filter_timer)
+        self._filter_timer = self.after(SEARCH_DELAY_MS, self.apply_filters)
+
+    def apply_filters(self):
+        """Reload the log list through the database query for the current filters.
+
+        The page request reuses the view's runner key, so a query still running for
+        older filters is superseded and its rows are never shown.
+        """
+        if self._filter_timer is not None:
+            self.after_cancel(self._filter_timer)
+            self._filter_timer = None
+        filters = self.read_filters()
+        if filters == self.filters:
+            return
+        self.filters = filters
+        if filters:
+            self.view.fetch_page = lambda after, limit: self.db.query_workout_logs(
+                **filters, after=after, limit=limit)
+        else:
+            self.view.fetch_page = self.db.get_workout_logs_page
+        self.refresh_treeview()
+
+    def clear_filters(self):
+        for entry in (self.search_entry, self.start_entry, self.end_entry):
+            entry.delete(0, tk.END)
+        self.exercise_filter.set('')
+        self.type_filter.set('')
+        self.apply_filters()
+
+    def display_values(self, log):
+        log_id, date, exercise_id, *rest = log
+        values = (log_id, date, self.db.get_exercise_name(exercise_id), *rest)
+        return tuple('' if value is None else value for value in values)
+
+    def refresh_treeview(self):
+        self.view.reload()
+
+    def apply_changes(self, events):
+        """Update only the logs that changed, or reload after a large burst."""
+        exercises = keys_by_op(events, 'exercises')
+        if exercises:
+            self.load_exercise_names()
+        # Renames only change the displayed name; rows carry the exercise id
+        for exercise_id in exercises.get('update', ()):
+            name = self.db.get_exercise_name(exercise_id)
+            for iid in self.tree.tag_has(f"exercise-{exercise_id}"):
+                values = list(self.tree.item(iid, 'values'))
+                values[2] = name
+                self.tree.item(iid, values=values)
+
+        changed = keys_by_op(events, 'workout_logs')
+        if sum(map(len, changed.values())) > self.view.page_size:
+            self.refresh_treeview()
+            return
+        for log_id in changed.get('delete', ()):
+            self.view.remove(log_id)
+        for log_id in changed.get('insert', []) + changed.get('update', []):
+            self.refresh_row(log_id)
+
+    def refresh_row(self, log_id):
+        if self.filters:
+            rows = self.db.query_workout_logs(**self.filters, log_ids=[log_id])
+            log = rows[0] if rows else None
+        else:
+            log = self.db.get_workout_log(log_id)
+        if log:
+            self.view.upsert(log)
+        else:
+            self.view.remove(log_id)
 
     def add_workout(self):
-        date = self.cal.get_date()
+        date = self.cal.selection_get() or datetime.now().date()
         exercise = self.exercise_combo.get()
         duration = self.duration_entry.get().strip()
         calories = self.calories_entry.get().strip()
@@ -89,14 +266,27 @@ class WorkoutLogTab(ttk.Frame):
             messagebox.showwarning("Input Error", "Duration and Calories must be numbers.")
             return
 
+        try:
+            sets, reps, weight = parse_load(self.sets_entry.get(), self.reps_entry.get(), self.weight_entry.get())
+        except ValueError:
+            messagebox.showwarning("Input Error", "Sets and Reps must be whole numbers and Weight a number.")
+            return
+
         exercise_id = self.db.get_exercise_id(exercise)
         if not exercise_id:
             messagebox.showwarning("Error", "Selected exercise does not exist.")
             return
 
-        self.db.add_workout_log(date, exercise_id, duration, calories)
-        self.load_data()
+        notes = self.notes_entry.get().strip() or None
+        log_id = self.db.add_workout_log(date, exercise_id, duration, calories, sets, reps, weight, notes)
         self.clear_form()
+        self.announce_prs(exercise, log_id)
+
+    def announce_prs(self, exercise, log_id):
+        records = self.db.get_prs_for_log(log_id)
+        if records:
+            lines = [f"{PR_KINDS[kind]}: {value:g}" for kind, value in records]
+            messagebox.showinfo("New Personal Record", f"New records for {exercise}!\n" + "\n".join(lines))
 
     def update_workout(self):
         selected = self.tree.selection()
@@ -105,7 +295,9 @@ class WorkoutLogTab(ttk.Frame):
             return
 
         selected_item = self.tree.item(selected[0])
-        log_id, date, exercise, duration, calories = selected_item['values']
+        log_id, date, exercise, duration, calories, sets, reps, weight, notes = selected_item['values']
+        if self.warn_if_archived(log_id):
+            return
 
         # Pop-up window for updating
         update_window = tk.Toplevel(self)
@@ -115,13 +307,13 @@ class WorkoutLogTab(ttk.Frame):
         cal = Calendar(update_window, selectmode='day')
         cal.grid(row=0, column=1, padx=5, pady=5)
         try:
-            cal.set_date(datetime.strptime(date, '%m/%d/%Y').date())
+            cal.set_date(date_type.fromisoformat(str(date)))
         except ValueError:
             cal.set_date(datetime.now().date())
 
         ttk.Label(update_window, text="Exercise:").grid(row=1, column=0, padx=5, pady=5, sticky='e')
         exercise_combo = ttk.Combobox(update_window, state="readonly")
-        exercise_combo['values'] = [ex[0] for ex in self.db.get_all_exercises()]
+        exercise_combo['values'] = self.exercise_combo['values']
         exercise_combo.grid(row=1, column=1, padx=5, pady=5)
         exercise_combo.set(exercise)
 
@@ -135,8 +327,21 @@ class WorkoutLogTab(ttk.Frame):
         calories_entry.grid(row=3, column=1, padx=5, pady=5)
         calories_entry.insert(0, calories)
 
+        load_entries = []
+        for row, (label, value) in enumerate((("Sets:", sets), ("Reps:", reps), ("Weight (kg/lbs):", weight)), start=4):
+            ttk.Label(update_window, text=label).grid(row=row, column=0, padx=5, pady=5, sticky='e')
+            entry = ttk.Entry(update_window)
+            entry.grid(row=row, column=1, padx=5, pady=5)
+            entry.insert(0, value)
+            load_entries.append(entry)
+
+        ttk.Label(update_window, text="Notes:").grid(row=7, column=0, padx=5, pady=5, sticky='e')
+        notes_entry = ttk.Entry(update_window, width=40)
+        notes_entry.grid(row=7, column=1, padx=5, pady=5)
+        notes_entry.insert(0, notes)
+
         def save_updates():
-            new_date = cal.get_date()
+            new_date = cal.selection_get() or datetime.now().date()
             new_exercise = exercise_combo.get()
             new_duration = duration_entry.get().strip()
             new_calories = calories_entry.get().strip()
@@ -152,20 +357,28 @@ class WorkoutLogTab(ttk.Frame):
                 messagebox.showwarning("Input Error", "Duration and Calories must be numbers.")
                 return
 
+            try:
+                new_sets, new_reps, new_weight = parse_load(*(entry.get() for entry in load_entries))
+            except ValueError:
+                messagebox.showwarning("Input Error", "Sets and Reps must be whole numbers and Weight a number.")
+                return
+
             new_exercise_id = self.db.get_exercise_id(new_exercise)
             if not new_exercise_id:
                 messagebox.showwarning("Error", "Selected exercise does not exist.")
                 return
 
-            success = self.db.update_workout_log(log_id, new_date, new_exercise_id, new_duration, new_calories)
+            # Blank load fields and notes are cleared, not kept; see Database.update_workout_log
+            success = self.db.update_workout_log(log_id, new_date, new_exercise_id, new_duration, new_calories,
+                                                 new_sets, new_reps, new_weight, notes_entry.get().strip())
             if success:
-                self.load_data()
                 update_window.destroy()
+                self.announce_prs(new_exercise, log_id)
             else:
                 messagebox.showwarning("Error", "Failed to update workout.")
 
         save_button = ttk.Button(update_window, text="Save", command=save_updates)
-        save_button.grid(row=4, column=0, columnspan=2, pady=10)
+        save_button.grid(row=8, column=0, columnspan=2, pady=10)
 
     def delete_workout(self):
         selected = self.tree.selection()
@@ -175,17 +388,30 @@ class WorkoutLogTab(ttk.Frame):
 
         selected_item = self.tree.item(selected[0])
         log_id = selected_item['values'][0]
+        if self.warn_if_archived(log_id):
+            return
 
         confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete this workout?")
         if confirm:
             success = self.db.delete_workout_log(log_id)
-            if success:
-                self.load_data()
-            else:
+            if not success:
                 messagebox.showwarning("Error", "Failed to delete workout.")
 
+    def warn_if_archived(self, log_id):
+        """Explain that archived workouts are read-only; returns True if log_id is one."""
+        if not self.db.is_archived(log_id):
+            return False
+        messagebox.showinfo("Archived Workout",
+                            "This workout has been archived and is read-only. Archived workouts cannot be "
+                            "updated or deleted.")
+        return True
+
     def clear_form(self):
         self.exercise_combo.set('')
         self.duration_entry.delete(0, tk.END)
         self.calories_entry.delete(0, tk.END)
+        self.sets_entry.delete(0, tk.END)
+        self.reps_entry.delete(0, tk.END)
+        self.weight_entry.delete(0, tk.END)
+        self.notes_entry.delete(0, tk.END)
         self.cal.set_date(datetime.now().date())
@@ -1,31 +1,39 @@
 # main.py
 
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 import os
+import queue
+from datetime import timedelta
+from importlib import import_module
 from utils.database import Database
+from gui.background import BackgroundRunner
+from utils import profiling
+from workout_tracker.service import DB_FILE   # data/workout_tracker.db unless $WORKOUT_TRACKER_DB is set
 
-from gui.exercise_tab import ExerciseTab
-from gui.pr_tab import PRTab
-from gui.workout_log_tab import WorkoutLogTab
-from gui.progress_charts_tab import ProgressChartsTab
+# (title, module, class) for each tab. Tab modules are imported the first time the
+# tab is selected, so tkcalendar and matplotlib load only when they are needed.
+TABS = [
+    ('Exercises', 'gui.exercise_tab', 'ExerciseTab'),
+    ('Personal Records (PR)', 'gui.pr_tab', 'PRTab'),
+    ('Workout Log', 'gui.workout_log_tab', 'WorkoutLogTab'),
+    ('Progress Charts', 'gui.progress_charts_tab', 'ProgressChartsTab'),
+]
+DEBUG_TAB = ('Debug', 'gui.debug_panel', 'DebugPanel')
 
-# Define paths
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, 'data')
-DB_FILE = os.path.join(DATA_DIR, 'workout_tracker.db')
+# WORKOUT_TRACKER_PROFILE=1 turns on utils.profiling and the Debug tab; a value ending
+# in .json or .prom also names a file the profile is written to on exit
+PROFILE = os.environ.get('WORKOUT_TRACKER_PROFILE', '')
 
-def init_db():
-    os.makedirs(DATA_DIR, exist_ok=True)
-    db = Database(DB_FILE)
-    db.close()  # Close immediately; tabs will manage connections as needed
+BACKUP_EVERY = timedelta(days=1)
+ERROR_POLL_MS = 500
 
-def main():
-    init_db()
-    
-    # Initialize the database instance
-    db = Database(DB_FILE)
-    
+def init_db(db_file=DB_FILE):
+    os.makedirs(os.path.dirname(db_file), exist_ok=True)
+    return Database(db_file, performance=True, profile=bool(PROFILE))
+
+def create_app(db):
+    """Build the main window with empty tab placeholders and return (root, runner)."""
     root = tk.Tk()
     root.title("Workout Tracker")
     root.geometry("800x600")
@@ -33,21 +41,60 @@ def main():
     notebook = ttk.Notebook(root)
     notebook.pack(expand=True, fill='both')
 
-    # Pass the database instance to each tab
-    exercise_tab = ExerciseTab(notebook, db)
-    pr_tab = PRTab(notebook, db)
-    workout_log_tab = WorkoutLogTab(notebook, db)
-    progress_charts_tab = ProgressChartsTab(notebook, db)
+    # Queries and chart preparation run on worker threads shared by every tab
+    runner = BackgroundRunner(root)
+
+    tabs = TABS + [DEBUG_TAB] if profiling.active() else TABS
+    placeholders = []
+    for title, _, _ in tabs:
+        placeholder = ttk.Frame(notebook)
+        notebook.add(placeholder, text=title)
+        placeholders.append(placeholder)
+
+    built = set()
 
-    notebook.add(exercise_tab, text='Exercises')
-    notebook.add(pr_tab, text='Personal Records (PR)')
-    notebook.add(workout_log_tab, text='Workout Log')
-    notebook.add(progress_charts_tab, text='Progress Charts')
+    def build_selected_tab(_=None):
+        index = notebook.index('current')
+        if index in built:
+            return
+        built.add(index)
+        _, module_name, class_name = tabs[index]
+        tab_class = getattr(import_module(module_name), class_name)
+        tab = tab_class(placeholders[index], db, runner)
+        tab.pack(expand=True, fill='both')
+
+    notebook.bind('<<NotebookTabChanged>>', build_selected_tab)
+    return root, runner
+
+def report_errors(root, errors):
+    """Show (title, exception) pairs queued by background threads; polled from the Tk main loop."""
+    while True:
+        try:
+            title, error = errors.get_nowait()
+        except queue.Empty:
+            break
+        messagebox.showerror(title, str(error), parent=root)
+    root.after(ERROR_POLL_MS, report_errors, root, errors)
+
+def main():
+    db = init_db()
+    root, runner = create_app(db)
+    errors = queue.SimpleQueue()    # Background threads never touch Tk; their errors are shown from here
+    report_errors(root, errors)
+    if db.backups.is_due(BACKUP_EVERY):
+        # Copies in small steps on its own thread and connection; the next backup removes files left by an exit mid-copy
+        db.backups.start(error=lambda e: errors.put(("Backup failed", e)))
+    if db.deleted_exercises():
+        # Finishes removing exercises deleted before the last exit
+        db.purger.start(error=lambda e: errors.put(("Purge failed", e)))
 
     root.mainloop()
+    runner.shutdown()
 
     # Close the database connection when the app closes
     db.close()
+    if PROFILE.endswith(('.json', '.prom')):
+        profiling.active().dump(PROFILE)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,18 @@
+# tests/conftest.py
+
+import pytest
+
+from utils.database import Database
+
+@pytest.fixture
+def db(tmp_path):
+    """A freshly migrated database file, closed after the test."""
+    database = Database(str(tmp_path / 'workouts.db'))
+    yield database
+    database.close()
+
+@pytest.fixture
+def squat(db):
+    """The id of a 'Squat' strength exercise."""
+    db.add_exercise('Squat', 'Strength')
+    return db.get_exercise_id('Squat')
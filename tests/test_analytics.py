@@ -0,0 +1,26 @@
+# tests/test_analytics.py
+
+import json
+
+import numpy as np
+
+from utils.analytics import rolling_mean
+from workout_tracker import cli
+
+def test_rolling_mean_averages_leading_entries_over_fewer():
+    assert rolling_mean(np.array([2.0, 4.0, 6.0, 8.0]), 3).tolist() == [2.0, 3.0, 4.0, 6.0]
+
+def test_rolling_mean_of_a_constant_series_is_constant():
+    assert rolling_mean(np.full(10, 5.0), 7).tolist() == [5.0] * 10
+
+def test_trends_with_one_day_prints_na(tmp_path, capsys):
+    path = str(tmp_path / 'workouts.db')
+    assert cli.main(['--db', path, 'add-exercise', 'Squat', 'Strength']) == 0
+    assert cli.main(['--db', path, 'log', '2024-01-01', 'Squat', '30', '100', '--reps', '5', '--weight', '100']) == 0
+    capsys.readouterr()
+    assert cli.main(['--db', path, 'trends', '--end', '2024-01-01']) == 0
+    out = capsys.readouterr().out
+    assert 'nan' not in out and 'n/a' in out
+    assert cli.main(['--db', path, 'trends', '--end', '2024-01-01', '--json']) == 0
+    trend, = json.loads(capsys.readouterr().out)['e1rm_trends']
+    assert trend['per_week'] is None
@@ -0,0 +1,66 @@
+# tests/test_archive.py
+
+import os
+
+import pytest
+
+@pytest.fixture
+def history(db, squat):
+    db.add_exercise('Run', 'Cardio')
+    run = db.get_exercise_id('Run')
+    db.add_workout_logs([(f"{year}-{month:02d}-{day:02d}", squat if day % 2 else run, day, 10 * month,
+                          3, 5, 50 + day, 'heavy' if day % 3 else None)
+                         for year in range(2020, 2025) for month in (1, 6, 12) for day in (1, 2, 3, 15, 28)])
+    return db
+
+def snapshot(db):
+    return {
+        'all': db.get_all_workout_logs(),
+        'page': db.get_workout_logs_page(limit=7),
+        'after': db.get_workout_logs_page(('2022-06-15', 10 ** 9), limit=20),
+        'between': db.get_workout_logs_between('2021-06-01', '2023-06-30'),
+        'oldest': db.query_workout_logs(order='oldest', limit=10, offset=3),
+        'search': db.query_workout_logs(search='heavy', start='2021-01-01', end='2022-12-31'),
+        'calories': db.query_workout_logs(order='calories', limit=25),
+        'iter': [row for chunk in db.iter_workout_logs(chunk_size=11) for row in chunk],
+        'totals': db.get_totals('month'),
+        'one': db.get_workout_log(1),
+    }
+
+def test_move_keeps_every_read_the_same(history):
+    before = snapshot(history)
+    moved = history.archives.move('2023-01-01', batch_size=7)
+    assert moved == 45
+    assert history._fetchone("SELECT MIN(date) FROM workout_logs")[0] == '2023-01-01'
+    assert [stats.year for stats in history.archives.stats()] == [2020, 2021, 2022]
+    assert all(os.path.exists(history.archives.path(year)) for year in (2020, 2021, 2022))
+    assert snapshot(history) == before
+    assert history.verify_aggregates() == []
+    assert history.log_store.totals('month') == before['totals']
+
+def test_archived_logs_are_read_only(history, squat):
+    history.archives.move('2021-01-01')
+    assert history.is_archived(1)
+    last = history._fetchone("SELECT MAX(id) FROM workout_logs")[0]
+    assert not history.is_archived(last)
+    assert not history.is_archived(10 ** 9)
+    assert not history.update_workout_log(1, '2020-01-01', squat, 1, 1)
+    assert not history.delete_workout_log(1)
+    assert history.get_workout_log(1) is not None
+
+def test_backdated_log_is_moved_by_the_next_move(history, squat):
+    history.archives.move('2022-01-01')
+    log_id = history.add_workout_log('2020-03-03', squat, 5, 5)
+    assert history.get_workout_logs_between('2020-03-03', '2020-03-03')[0][0] == log_id
+    assert history.archives.move('2022-01-01') == 1
+    assert history.is_archived(log_id)
+    assert history.verify_aggregates() == []
+
+def test_in_memory_database_cannot_archive():
+    from utils.database import Database
+    db = Database(':memory:')
+    try:
+        with pytest.raises(ValueError):
+            db.archives.move('2020-01-01')
+    finally:
+        db.close()
@@ -0,0 +1,81 @@
+# tests/test_log_store.py
+
+import threading
+
+from utils.log_store import LogStore
+
+def sql_totals(db, period='day'):
+    return [(start, sessions, duration, calories)
+            for start, sessions, duration, calories in db.get_totals(period)]
+
+def test_load_matches_the_database(db, squat):
+    db.add_workout_logs([(f"2024-01-{day:02d}", squat, day, 10 * day) for day in range(1, 29)])
+    store = db.log_store
+    assert store.rows == 28
+    assert store.totals('day') == sql_totals(db)
+    assert store.totals('month') == sql_totals(db, 'month')
+
+def test_changes_are_applied_incrementally(db, squat):
+    first = db.add_workout_log('2024-01-01', squat, 30, 100)
+    store = db.log_store
+    second = db.add_workout_log('2024-02-01', squat, 45, 200)
+    db.update_workout_log(first, '2024-01-05', squat, 20, 50)
+    assert tuple(store.row(first)) == (first, '2024-01-05', squat, 20.0, 50.0)
+    assert store.row(second) is not None and store.rows == 2
+    db.delete_workout_log(second)
+    assert store.row(second) is None and store.rows == 1
+    assert store.totals('month') == sql_totals(db, 'month')
+
+def test_write_committed_during_a_load_is_kept(db, squat, monkeypatch):
+    db.add_workout_logs([('2024-01-01', squat, 30, 100)] * 1000)
+    loading, written = threading.Event(), threading.Event()
+    load = LogStore._load
+
+    def slow_load(store):
+        load(store)
+        loading.set()
+        written.wait(5)
+
+    monkeypatch.setattr(LogStore, '_load', slow_load)
+    stores = []
+    worker = threading.Thread(target=lambda: stores.append(db.log_store))
+    worker.start()
+    assert loading.wait(5)
+    db.add_workout_log('2024-02-01', squat, 45, 200)     # Committed while the worker's load is running
+    written.set()
+    worker.join()
+    assert stores[0].rows == 1001
+    assert stores[0].totals('month') == sql_totals(db, 'month')
+
+def test_one_store_per_database_across_threads(db, squat, monkeypatch):
+    created = []
+    init = LogStore.__init__
+
+    def counting_init(store, database):
+        created.append(store)
+        init(store, database)
+
+    monkeypatch.setattr(LogStore, '__init__', counting_init)
+    barrier = threading.Barrier(4)
+    seen = []
+
+    def get():
+        barrier.wait()
+        seen.append(db.log_store)
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and all(store is seen[0] for store in seen)
+
+def test_restored_exercise_logs_are_stored(db, squat):
+    db.add_workout_logs([('2024-01-01', squat, 30, 100)] * 10)
+    db.add_exercise('Bench', 'Strength')
+    db.add_workout_logs([('2024-01-02', db.get_exercise_id('Bench'), 20, 80)] * 10)
+    db.delete_exercise('Squat')
+    store = db.log_store        # Loaded while Squat's logs are hidden
+    assert db.restore_exercise('Squat')
+    assert store.rows == 20
+    assert store.totals('day') == sql_totals(db)
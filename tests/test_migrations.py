@@ -0,0 +1,129 @@
+# tests/test_migrations.py
+
+import sqlite3
+
+import pytest
+
+from utils import migrations
+from utils.database import Database, normalize_date
+
+BASELINE_SCHEMA = '''
+    CREATE TABLE exercises (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        type TEXT NOT NULL
+    );
+    CREATE TABLE pr_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        exercise_id INTEGER,
+        max_lift REAL,
+        FOREIGN KEY(exercise_id) REFERENCES exercises(id) ON DELETE CASCADE
+    );
+    CREATE TABLE workout_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        exercise_id INTEGER,
+        duration REAL,
+        calories REAL,
+        FOREIGN KEY(exercise_id) REFERENCES exercises(id) ON DELETE CASCADE
+    );
+'''
+
+@pytest.fixture
+def baseline(tmp_path):
+    """A database file as the first release wrote it: unversioned, with m/d/yy dates."""
+    path = str(tmp_path / 'baseline.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany("INSERT INTO exercises (name, type) VALUES (?, ?)",
+                     [('Squat', 'Strength'), ('Morning Run', 'Cardio')])
+    conn.executemany("INSERT INTO pr_records (exercise_id, max_lift) VALUES (?, ?)",
+                     [(1, 100), (1, 120), (2, 5)])
+    conn.executemany("INSERT INTO workout_logs (date, exercise_id, duration, calories) VALUES (?, ?, ?, ?)",
+                     [('1/5/24', 1, 30, 200), ('12/31/23', 2, 45, 400), ('03/07/2024', 1, 20, 150),
+                      ('2024-02-01', 2, 60, 500), ('yesterday', 1, 10, 50)])
+    conn.commit()
+    conn.close()
+    return path
+
+def test_upgrade_from_baseline(baseline):
+    db = Database(baseline)
+    try:
+        assert migrations.get_version(db) == migrations.SCHEMA_VERSION
+        assert [row[0] for row in db._fetchall("SELECT date FROM workout_logs ORDER BY id")] == [
+            '2024-01-05', '2023-12-31', '2024-03-07', '2024-02-01', 'yesterday']
+        assert sorted(db.get_all_prs()) == [('Morning Run', 5.0), ('Squat', 120.0)]
+        assert db._fetchone("SELECT COUNT(*) FROM workout_logs WHERE uuid IS NULL")[0] == 0
+        assert db.verify_aggregates() == []
+        assert [row[0] for row in db.query_workout_logs(search='run')] == [4, 2]
+        assert [row[0] for row in db.get_workout_logs_between('2024-01-01', '2024-12-31')] == [3, 4, 1]
+        assert migrations.find_plan_regressions(db) == []
+    finally:
+        db.close()
+
+def test_reopening_applies_nothing(baseline):
+    Database(baseline).close()
+    db = Database(baseline)
+    try:
+        assert migrations.migrate(db) == migrations.SCHEMA_VERSION
+        assert db._fetchone("SELECT COUNT(*) FROM workout_logs")[0] == 5
+    finally:
+        db.close()
+
+def test_each_migration_bumps_the_version(baseline, monkeypatch):
+    seen = []
+
+    def recording(number, migration):
+        def run(db):
+            seen.append((number, migrations.get_version(db)))
+            migration(db)
+        return run
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [recording(number, migration)
+                                                   for number, migration in enumerate(migrations.MIGRATIONS)])
+    Database(baseline).close()
+    assert seen == [(number, number) for number in range(migrations.SCHEMA_VERSION)]
+
+def test_migrate_dates_resumes_in_batches(baseline):
+    db = Database(baseline)
+    try:
+        db.cursor.executemany('''
+            INSERT INTO workout_logs (date, exercise_id, duration, calories, uuid)
+            VALUES (?, 1, 1, 1, lower(hex(randomblob(16))))
+        ''', [(f"{month}/1/22",) for month in range(1, 13)])
+        db.conn.commit()
+        db.migrate_dates(batch_size=5)
+        assert db._fetchone("SELECT COUNT(*) FROM workout_logs WHERE date LIKE '%/%'")[0] == 0
+    finally:
+        db.close()
+
+@pytest.mark.parametrize('value, expected', [
+    ('1/5/24', '2024-01-05'), ('01/05/2024', '2024-01-05'), ('2024-01-05', '2024-01-05'), (' 2024-1-5 ', None),
+])
+def test_normalize_date(value, expected):
+    if expected is None:
+        with pytest.raises(ValueError):
+            normalize_date(value)
+    else:
+        assert normalize_date(value) == expected
+
+def test_shipped_change_log_triggers_predate_tombstones(baseline, monkeypatch):
+    def trigger_sql(db):
+        return db._fetchall("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'change_log_%'")
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS[:6])
+    monkeypatch.setattr(migrations, 'SCHEMA_VERSION', 6)
+    db = Database(baseline)
+    try:
+        assert len(trigger_sql(db)) == 9 and not any('deleted' in sql for _, sql in trigger_sql(db))
+    finally:
+        db.close()
+    monkeypatch.undo()
+    db = Database(baseline)
+    try:
+        assert migrations.get_version(db) == migrations.SCHEMA_VERSION
+        assert {name for name, sql in trigger_sql(db) if 'deleted IS NULL' in sql} == {
+            'change_log_pr_records_insert', 'change_log_pr_records_update', 'change_log_pr_records_delete',
+            'change_log_workout_logs_delete'}
+    finally:
+        db.close()
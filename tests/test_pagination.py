@@ -0,0 +1,53 @@
+# tests/test_pagination.py
+
+import pytest
+
+def pages(fetch_page, key_of, limit):
+    """Walk a keyset-paginated listing to the end and return every row."""
+    rows, after = [], None
+    while True:
+        page = fetch_page(after=after, limit=limit)
+        assert len(page) <= limit
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        after = key_of(page[-1])
+
+@pytest.fixture
+def logs(db, squat):
+    # Several logs share each date, so the id breaks ties in the key
+    db.add_workout_logs([(f"2024-{month:02d}-{day:02d}", squat, 30, 100)
+                         for month in (1, 2, 3) for day in (1, 1, 1, 10, 20)])
+    return db
+
+@pytest.mark.parametrize('limit', [1, 4, 7, 15, 100])
+def test_workout_log_pages_cover_every_log_once(logs, limit):
+    rows = pages(logs.get_workout_logs_page, lambda row: (row[1], row[0]), limit)
+    assert rows == logs.query_workout_logs(limit=None)
+    assert len({row[0] for row in rows}) == 15
+    assert rows == sorted(rows, key=lambda row: (row[1], row[0]), reverse=True)
+
+def test_workout_log_page_after_a_deleted_row(logs):
+    first = logs.get_workout_logs_page(limit=3)
+    logs.delete_workout_log(first[-1][0])
+    following = logs.get_workout_logs_page(after=(first[-1][1], first[-1][0]), limit=3)
+    assert following == logs.query_workout_logs(limit=None)[2:5]
+
+def test_exercise_pages(db):
+    db.add_exercises([(f"Exercise {number:02d}", 'Strength') for number in range(25)])
+    rows = pages(db.get_exercises_page, lambda row: (row[1], row[0]), 10)
+    assert [row[1] for row in rows] == [f"Exercise {number:02d}" for number in range(25)]
+
+def test_pr_pages(db):
+    db.add_exercises([(f"Lift {number:02d}", 'Strength') for number in range(12)])
+    db.upsert_prs((exercise_id, 100 + exercise_id) for exercise_id in db.get_exercise_ids().values())
+    rows = pages(db.get_prs_page, lambda row: (row[1], row[0]), 5)
+    assert [row[1] for row in rows] == [f"Lift {number:02d}" for number in range(12)]
+
+def test_query_after_continues_a_listing(logs):
+    everything = logs.query_workout_logs(order='oldest', limit=None)
+    first = logs.query_workout_logs(order='oldest', limit=6)
+    rest = logs.query_workout_logs(order='oldest', limit=None, after=(first[-1][1], first[-1][0]))
+    assert first + rest == everything
+    with pytest.raises(ValueError):
+        logs.query_workout_logs(order='longest', after=('2024-01-01', 1))
@@ -0,0 +1,128 @@
+# tests/test_purge.py
+
+import threading
+from datetime import timedelta
+
+import pytest
+
+import utils.database
+import utils.purge
+from utils import sync
+
+@pytest.fixture
+def history(db, squat):
+    db.add_exercise('Bench', 'Strength')
+    bench = db.get_exercise_id('Bench')
+    db.add_workout_logs([(f"2024-{month:02d}-{day:02d}", exercise_id, 30, 100, 3, 5, 40 + day, 'heavy')
+                         for month in range(1, 13) for day in range(1, 29, 3) for exercise_id in (squat, bench)])
+    return db
+
+@pytest.fixture
+def no_undo_window(monkeypatch):
+    for module in (utils.database, utils.purge):
+        monkeypatch.setattr(module, 'UNDO_WINDOW', timedelta(seconds=-5))
+
+def snapshot(db):
+    return {
+        'exercises': sorted(db.get_all_exercises()),
+        'logs': db.get_all_workout_logs(),
+        'search': db.query_workout_logs(search='heavy', limit=None),
+        'prs': sorted(db.get_all_prs()),
+        'history': db.get_pr_history(),
+        'totals': db.get_totals('month'),
+        'store': db.log_store.totals('month'),
+    }
+
+def test_delete_hides_the_exercise_and_its_rows(history):
+    bench = history.get_exercise_id('Bench')
+    before = snapshot(history)
+    assert history.delete_exercise('Bench')
+    after = snapshot(history)
+    assert after['exercises'] == [('Squat', 'Strength')]
+    assert all(row[2] != bench for row in after['logs'] + after['search'])
+    assert len(after['logs']) == len(before['logs']) // 2
+    assert after['prs'] == [('Squat', 68.0)]
+    assert after['totals'] == history.log_store.totals('month') != before['totals']
+    assert history.get_exercise_id('Bench') is None
+    assert history._fetchone("SELECT COUNT(*) FROM workout_logs WHERE exercise_id = ?", (bench,))[0] == 120
+    exported = {op for entity, _, op, *_ in sync.changes_since(history, None) if entity == 'exercise'}
+    assert exported == {'put', 'delete'}
+
+def test_restore_within_the_window(history):
+    before = snapshot(history)
+    history.delete_exercise('Bench')
+    assert history.restore_exercise('Bench')
+    assert snapshot(history) == before
+    assert history.deleted_exercises() == []
+
+def test_name_is_released_for_a_new_exercise(history):
+    history.delete_exercise('Bench')
+    assert history.add_exercise('Bench', 'Strength')
+    deleted, = history.deleted_exercises()
+    assert deleted[1].startswith('Bench (deleted ')
+    assert history.get_workout_logs_page(limit=1000) == [
+        row for row in history.get_all_workout_logs() if row[2] == history.get_exercise_id('Squat')]
+
+def test_purge_waits_for_the_undo_window(history):
+    history.delete_exercise('Bench')
+    assert history.purger.run(wait=False) == 0
+    assert history.restore_exercise('Bench')
+
+def test_purge_removes_everything_in_batches(history, no_undo_window):
+    history.delete_exercise('Bench')
+    before = snapshot(history)
+    logged = history._fetchone("SELECT COUNT(*) FROM change_log")[0]
+    history_rows = history._fetchone("SELECT COUNT(*) FROM pr_history WHERE exercise_id = 2")[0]
+    assert not history.restore_exercise('Bench')
+    history.purger.batch_size = 25
+    history.purger.pause = 0
+    progress = []
+    removed = history.purger.run(progress=progress.append)
+    assert removed == 120 + history_rows
+    assert len(progress) > 1 and progress[-1].removed == progress[-1].total == removed
+    assert history.deleted_exercises() == []
+    for table in ('workout_logs', 'pr_history', 'pr_records', 'workout_totals'):
+        assert history._fetchone(f"SELECT COUNT(*) FROM {table} WHERE exercise_id = 2")[0] == 0, table
+    assert history._fetchone("SELECT COUNT(*) FROM workout_notes_fts")[0] == 120
+    assert history.verify_aggregates() == []
+    assert history._fetchone("SELECT COUNT(*) FROM change_log")[0] - logged == 1   # The exercise, not its logs
+    assert snapshot(history) == before
+
+def test_background_purge(history, no_undo_window):
+    history.delete_exercise('Bench')
+    finished = threading.Event()
+    results = []
+    history.purger.start(done=lambda removed: (results.append(removed), finished.set()))
+    assert finished.wait(10)
+    assert results[0] >= 120 and history.deleted_exercises() == []
+
+def test_purge_of_archived_logs(history, no_undo_window):
+    history.archives.move('2024-07-01')
+    history.delete_exercise('Bench')
+    before = snapshot(history)
+    history.purger.run()
+    assert snapshot(history) == before
+    assert history.verify_aggregates() == []
+
+def test_edit_waits_out_a_purge_batch(history, no_undo_window, tmp_path):
+    history.delete_exercise('Bench')
+    squat = history.get_exercise_id('Squat')
+    log_id = history.get_workout_logs_page(limit=1)[0][0]
+    purged = []
+
+    def purge_batch():
+        other = utils.database.Database(str(tmp_path / 'workouts.db'))
+        try:
+            purged.append(other.purge_exercise(2, 25))
+        finally:
+            other.close()
+
+    with history.transaction():
+        history.get_workout_log(log_id)
+        batch = threading.Thread(target=purge_batch)     # Would commit between the read and the write
+        batch.start()
+        batch.join(0.5)
+        assert history.update_workout_log(log_id, '2024-01-01', squat, 45, 300)
+    batch.join()
+    assert purged == [25]
+    assert history.get_workout_log(log_id)[3] == 45
@@ -0,0 +1,45 @@
+# tests/test_query_plans.py
+
+import pytest
+
+from utils import migrations
+
+def _plans(db, run):
+    """Run a check with statement tracing and return (sql, [plan details]) for each statement it ran."""
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    try:
+        run(db)
+    finally:
+        db.conn.set_trace_callback(None)
+    return [(sql, migrations.explain(db, sql)) for sql in statements
+            if not sql.startswith('--') and "'main'." not in sql]
+
+@pytest.fixture
+def populated(db, squat):
+    db.add_exercise('Run', 'Cardio')
+    db.add_workout_logs([(f"2024-{month:02d}-{day:02d}", squat, 30, 200, 3, 5, 60 + day, None)
+                         for month in range(1, 13) for day in range(1, 29)])
+    return db   # Not ANALYZEd, as in the app: plans come from the schema alone
+
+def test_schema_is_current(db):
+    assert migrations.get_version(db) == migrations.SCHEMA_VERSION
+
+@pytest.mark.parametrize('label, run', migrations.CHECKED_QUERIES, ids=[label for label, _ in migrations.CHECKED_QUERIES])
+def test_checked_query_uses_an_index(populated, label, run):
+    plans = _plans(populated, run)
+    assert plans, f"{label} ran no statements"
+    for sql, details in plans:
+        for detail in details:
+            assert not (detail.startswith('SCAN ') and ' USING ' not in detail), (detail, sql)
+            assert 'USE TEMP B-TREE' not in detail, (detail, sql)
+    table_reads = [detail for _, details in plans for detail in details if detail.startswith(('SCAN ', 'SEARCH '))]
+    assert any(' USING ' in detail for detail in table_reads), table_reads
+
+def test_find_plan_regressions_is_empty(populated):
+    assert migrations.find_plan_regressions(populated) == []
+
+def test_find_plan_regressions_reports_a_scan(populated):
+    checks = [('unindexed', lambda db: db.cursor.execute("SELECT * FROM workout_logs WHERE duration = 1").fetchall())]
+    problems = migrations.find_plan_regressions(populated, checks)
+    assert [(label, detail) for label, _, detail in problems] == [('unindexed', 'SCAN workout_logs')]
@@ -0,0 +1,63 @@
+# tests/test_records.py
+
+from utils.database import UNCHANGED
+from utils.records import PRIndex
+
+def max_lift(db, exercise_id):
+    row = db._fetchone("SELECT max_lift FROM pr_records WHERE exercise_id = ?", (exercise_id,))
+    return row and row[0]
+
+def test_insert_records_prs(db, squat):
+    db.add_workout_log('2024-01-01', squat, 30, 100, 3, 5, 100)
+    log_id = db.add_workout_log('2024-01-02', squat, 30, 100, 1, 1, 110)
+    assert max_lift(db, squat) == 110
+    assert dict(db.get_prs_for_log(log_id))['1rm'] == 110
+    assert db.get_best_prs(squat)['1rm'] == 110
+
+def test_deleting_the_record_log_restores_the_previous_max(db, squat):
+    db.add_workout_log('2024-01-01', squat, 30, 100, 3, 5, 100)
+    record = db.add_workout_log('2024-01-02', squat, 30, 100, 1, 1, 110)
+    assert db.delete_workout_log(record)
+    assert db.get_all_prs() == [('Squat', 100.0)]
+    assert '1rm' not in db.get_best_prs(squat)
+
+def test_deleting_the_only_weighted_log_drops_the_record(db, squat):
+    log_id = db.add_workout_log('2024-01-01', squat, 30, 100, 1, 1, 110)
+    db.delete_workout_log(log_id)
+    assert db.get_all_prs() == []
+
+def test_deleting_a_lighter_log_keeps_a_manual_record(db, squat):
+    log_id = db.add_workout_log('2024-01-01', squat, 30, 100, 1, 1, 80)
+    db.add_or_update_pr(squat, 150)
+    db.delete_workout_log(log_id)
+    assert max_lift(db, squat) == 150
+
+def test_update_lowering_the_record_weight(db, squat):
+    db.add_workout_log('2024-01-01', squat, 30, 100, 3, 5, 100)
+    record = db.add_workout_log('2024-01-02', squat, 30, 100, 1, 1, 110)
+    db.update_workout_log(record, '2024-01-02', squat, 30, 100, 1, 1, 90)
+    assert max_lift(db, squat) == 100
+
+def test_update_clears_load_given_none(db, squat):
+    log_id = db.add_workout_log('2024-01-01', squat, 30, 100, 1, 1, 110, 'heavy')
+    assert db.update_workout_log(log_id, '2024-01-01', squat, 30, 100, None, None, None, None)
+    assert db.get_workout_log(log_id)[5:] == (None, None, None, None)
+    assert db.get_all_prs() == []
+    assert db.get_best_prs(squat) == {}
+
+def test_update_keeps_unchanged_fields(db, squat):
+    log_id = db.add_workout_log('2024-01-01', squat, 30, 100, 3, 5, 100, 'heavy')
+    db.update_workout_log(log_id, '2024-01-03', squat, 45, 150)
+    assert db.get_workout_log(log_id)[1:] == ('2024-01-03', squat, 45, 150, 3, 5, 100, 'heavy')
+    db.update_workout_log(log_id, '2024-01-03', squat, 45, 150, UNCHANGED, 8, UNCHANGED, '')
+    assert db.get_workout_log(log_id)[5:] == (3, 8, 100, None)
+
+def test_update_of_an_unknown_log(db, squat):
+    assert not db.update_workout_log(999, '2024-01-01', squat, 30, 100)
+
+def test_pr_index_reloaded_after_commit(db, squat):
+    record = db.add_workout_log('2024-01-02', squat, 30, 100, 1, 1, 110)
+    with db.transaction():
+        db.delete_workout_log(record)
+        db._pr_index = PRIndex([(squat, '1rm', 110)])   # As rebuilt by a reader thread from the committed rows
+    assert db.get_best_prs(squat) == {}
@@ -0,0 +1,100 @@
+# tests/test_sync.py
+
+import io
+
+import pytest
+
+from utils import sync
+from utils.database import Database
+
+@pytest.fixture
+def devices(tmp_path):
+    a, b = Database(str(tmp_path / 'a.db')), Database(str(tmp_path / 'b.db'))
+    yield a, b
+    a.close()
+    b.close()
+
+def send(source, target):
+    """Send target everything it has not seen from source; returns the SyncStats of applying it."""
+    delta = io.BytesIO()
+    sync.write_delta(source, delta, peer=target.device_id)
+    delta.seek(0)
+    return sync.read_delta(target, delta)
+
+def exchange(a, b):
+    send(a, b)
+    send(b, a)
+
+def state(db):
+    """Every live row as sync sees it, without versions."""
+    return sorted((entity, uuid, repr(data)) for entity, uuid, op, _, _, data in sync.changes_since(db, None)
+                  if op == 'put')
+
+def visible(db):
+    return sorted((db.get_exercise_name(row[2]), *row[1:2], *row[3:]) for row in db.get_all_workout_logs())
+
+def test_first_exchange_merges_both_devices(devices):
+    a, b = devices
+    a.add_exercise('Squat', 'Strength')
+    a.add_workout_log('2024-01-01', a.get_exercise_id('Squat'), 30, 200, 3, 5, 100, 'heavy')
+    b.add_exercise('Run', 'Cardio')
+    b.add_workout_log('2024-01-02', b.get_exercise_id('Run'), 40, 300)
+    exchange(a, b)
+    assert state(a) == state(b)
+    assert visible(a) == visible(b) and len(visible(a)) == 2
+    assert sorted(a.get_all_prs()) == sorted(b.get_all_prs()) == [('Squat', 100.0)]
+
+def test_only_unseen_changes_travel(devices):
+    a, b = devices
+    a.add_exercise('Squat', 'Strength')
+    exchange(a, b)
+    assert send(a, b).received == 0
+    a.add_workout_log('2024-01-01', a.get_exercise_id('Squat'), 30, 200)
+    assert send(a, b).received == 1
+
+def test_later_edit_wins_on_both(devices):
+    a, b = devices
+    a.add_exercise('Squat', 'Strength')
+    log_id = a.add_workout_log('2024-01-01', a.get_exercise_id('Squat'), 30, 200)
+    exchange(a, b)
+    b_log = b.get_all_workout_logs()[0][0]
+    a.update_workout_log(log_id, '2024-01-01', a.get_exercise_id('Squat'), 35, 200)
+    b.update_workout_log(b_log, '2024-01-01', b.get_exercise_id('Squat'), 50, 200)     # Later
+    exchange(a, b)
+    exchange(a, b)
+    assert state(a) == state(b)
+    assert a.get_workout_log(log_id)[3] == 50
+
+def test_deletes_propagate(devices):
+    a, b = devices
+    a.add_exercise('Squat', 'Strength')
+    a.add_exercise('Run', 'Cardio')
+    squat = a.get_exercise_id('Squat')
+    first = a.add_workout_log('2024-01-01', squat, 30, 200)
+    a.add_workout_log('2024-01-02', a.get_exercise_id('Run'), 30, 200)
+    exchange(a, b)
+    a.delete_workout_log(first)
+    a.delete_exercise('Run')
+    exchange(a, b)
+    assert state(a) == state(b)
+    assert b.get_all_exercises() == [('Squat', 'Strength')]
+    assert b.get_all_workout_logs() == []
+
+def test_replayed_delta_changes_nothing(devices):
+    a, b = devices
+    a.add_exercise('Squat', 'Strength')
+    a.add_workout_log('2024-01-01', a.get_exercise_id('Squat'), 30, 200)
+    delta = io.BytesIO()
+    sync.write_delta(a, delta, peer=b.device_id)
+    for _ in range(2):
+        delta.seek(0)
+        sync.read_delta(b, delta)
+    assert state(a) == state(b)
+
+def test_delta_from_itself_is_refused(devices):
+    a, _ = devices
+    delta = io.BytesIO()
+    sync.write_delta(a, delta)
+    delta.seek(0)
+    with pytest.raises(ValueError):
+        sync.read_delta(a, delta)
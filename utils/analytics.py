@@ -0,0 +1,251 @@
+# utils/analytics.py
+
+"""Vectorized training analytics over workout logs held as NumPy columns.
+
+Logs are loaded with one query into ``LogColumns`` and every metric is computed
+with array operations, so even millions of logs take milliseconds per metric.
+Results are cached until ``Database.data_version`` changes.
+"""
+
+import functools
+import threading
+from datetime import date
+from typing import NamedTuple
+
+import numpy as np
+
+COLUMNS_SQL = "SELECT id, exercise_id, duration, calories, sets, reps, weight, date FROM workout_logs"
+
+class LogColumns(NamedTuple):
+    """Workout logs as parallel arrays sorted by day. Missing values are NaN."""
+    id: np.ndarray            # int64
+    day: np.ndarray           # int32 days since 1970-01-01
+    exercise_id: np.ndarray   # int32
+    duration: np.ndarray      # float64
+    calories: np.ndarray
+    sets: np.ndarray
+    reps: np.ndarray
+    weight: np.ndarray
+
+class TrainingLoad(NamedTuple):
+    days: np.ndarray          # datetime64[D], every day from the first log to the end day
+    daily: np.ndarray         # Load per day
+    acute: np.ndarray         # Rolling mean over the acute window
+    chronic: np.ndarray       # Rolling mean over the chronic window
+    ratio: np.ndarray         # Acute:chronic workload ratio, NaN while chronic load is zero
+
+class WeeklyVolume(NamedTuple):
+    weeks: np.ndarray         # datetime64[D] Monday of each week
+    types: tuple              # Exercise types, one column each
+    values: np.ndarray        # Shape (weeks, types)
+
+class Streaks(NamedTuple):
+    current: int              # Consecutive training days ending today or yesterday
+    longest: int
+    longest_start: date
+    longest_end: date
+    active_days: int
+
+class E1RMTrend(NamedTuple):
+    exercise_id: int
+    exercise: str
+    sessions: int             # Days with a weighted set in the window
+    latest: float             # Best estimated 1RM on the last of those days
+    best: float
+    per_week: float           # Least-squares slope; NaN with fewer than two days
+
+def _day_number(value):
+    return int(np.datetime64(value or date.today(), 'D').astype(np.int64))
+
+def load_columns(db):
+    """Fetch every workout log, archived ones included, and convert it to LogColumns."""
+    rows = db._fetchall_logs(COLUMNS_SQL)
+    if not rows:
+        empty = np.empty(0)
+        return LogColumns(empty.astype(np.int64), empty.astype(np.int32), empty.astype(np.int32),
+                          empty, empty, empty, empty, empty)
+    table = np.array(rows, dtype=object)
+    numbers = table[:, :7].astype(np.float64)   # None becomes NaN
+    days = table[:, 7].astype('datetime64[D]').astype(np.int32)
+    order = np.argsort(days, kind='stable')
+    numbers = numbers[order]
+    return LogColumns(numbers[:, 0].astype(np.int64), days[order], numbers[:, 1].astype(np.int32),
+                      *numbers[:, 2:].T)
+
+def log_values(columns, metric):
+    """Return each log's contribution to a metric: minutes, calories, sets x reps x weight, or 1."""
+    if metric == 'duration':
+        return np.nan_to_num(columns.duration)
+    if metric == 'calories':
+        return np.nan_to_num(columns.calories)
+    if metric == 'volume':
+        sets = np.where(np.isnan(columns.sets), 1.0, columns.sets)
+        return np.nan_to_num(sets * columns.reps * columns.weight)
+    if metric == 'sessions':
+        return np.ones(len(columns.day))
+    raise ValueError(f"Unknown metric: {metric!r}")
+
+def rolling_mean(values, window):
+    """Trailing mean over `window` entries; the first entries average over fewer."""
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    ends = np.arange(1, len(sums))
+    totals = sums[1:] - sums[np.maximum(ends - window, 0)]
+    return totals / np.minimum(ends, window)
+
+def _cached(method):
+    """Memoize a metric per arguments and day until the database's data version changes."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())), date.today())
+        version = self._sync()
+        result = self._results.get(key)
+        if result is None:
+            result = method(self, *args, **kwargs)
+            with self._lock:
+                if version == self._version:
+                    self._results[key] = result
+        return result
+    return wrapper
+
+class Analytics:
+    """Training load, weekly volume, streaks and estimated-1RM trends for one Database.
+
+    ``load(db)`` returns LogColumns; it defaults to ``load_columns``.
+    """
+
+    def __init__(self, db, load=load_columns):
+        self.db = db
+        self._load = load
+        self._lock = threading.Lock()
+        self._version = None
+        self._columns = None
+        self._results = {}
+
+    def _sync(self):
+        """Drop cached columns and results if the data changed; return the version they match."""
+        with self._lock:
+            if self._version != self.db.data_version:
+                self._version = self.db.data_version
+                self._columns = None
+                self._results = {}
+            return self._version
+
+    def columns(self):
+        version = self._sync()
+        columns = self._columns
+        if columns is None:
+            columns = self._load(self.db)
+            with self._lock:
+                if version == self._version:
+                    self._columns = columns
+        return columns
+
+    @_cached
+    def training_load(self, metric='duration', acute_days=7, chronic_days=28, end=None):
+        """Daily load with its acute and chronic rolling means and their ratio, up to `end` (today)."""
+        columns = self.columns()
+        if not len(columns.day):
+            empty = np.empty(0)
+            return TrainingLoad(empty.astype('datetime64[D]'), empty, empty, empty, empty)
+        first = int(columns.day[0])
+        last = max(int(columns.day[-1]), _day_number(end))
+        daily = np.bincount(columns.day - first, weights=log_values(columns, metric), minlength=last - first + 1)
+        acute = rolling_mean(daily, acute_days)
+        chronic = rolling_mean(daily, chronic_days)
+        ratio = np.divide(acute, chronic, out=np.full(len(daily), np.nan), where=chronic > 0)
+        days = np.arange(first, last + 1).astype('datetime64[D]')
+        return TrainingLoad(days, daily, acute, chronic, ratio)
+
+    @_cached
+    def weekly_volume(self, metric='volume'):
+        """Sum a metric per Monday-to-Sunday week and exercise type."""
+        columns = self.columns()
+        types = tuple(self.db.catalog.types())
+        if not len(columns.day) or not types:
+            return WeeklyVolume(np.empty(0, dtype='datetime64[D]'), types, np.zeros((0, len(types))))
+        # Exercise id -> type column, as a lookup table indexed by id
+        code_of_id = np.full(int(columns.exercise_id.max()) + 1, -1, dtype=np.int64)
+        for exercise_id in self.db.catalog.ids().values():
+            if exercise_id < len(code_of_id):
+                code_of_id[exercise_id] = types.index(self.db.catalog.get(exercise_id)[1])
+        codes = code_of_id[columns.exercise_id]
+        known = codes >= 0
+
+        week = (columns.day.astype(np.int64) + 3) // 7     # 1970-01-01 was a Thursday
+        first = int(week.min())
+        count = int(week.max()) - first + 1
+        cells = (week[known] - first) * len(types) + codes[known]
+        values = np.bincount(cells, weights=log_values(columns, metric)[known], minlength=count * len(types))
+        weeks = (np.arange(first, first + count) * 7 - 3).astype('datetime64[D]')
+        return WeeklyVolume(weeks, types, values.reshape(count, len(types)))
+
+    @_cached
+    def streaks(self, end=None):
+        """Runs of consecutive training days; the current run counts if it reaches `end` (today) or the day before."""
+        days = np.unique(self.columns().day)
+        if not len(days):
+            return Streaks(0, 0, None, None, 0)
+        breaks = np.flatnonzero(np.diff(days) != 1)
+        starts = np.concatenate(([0], breaks + 1))
+        ends = np.concatenate((breaks, [len(days) - 1]))
+        lengths = ends - starts + 1
+        longest = int(np.argmax(lengths))
+        current = int(lengths[-1]) if days[-1] >= _day_number(end) - 1 else 0
+        as_date = lambda day: np.datetime64(int(day), 'D').astype(date)
+        return Streaks(current, int(lengths[longest]), as_date(days[starts[longest]]),
+                       as_date(days[ends[longest]]), len(days))
+
+    def e1rm_series(self, exercise_id):
+        """Return (days, best estimated 1RM per day) for one exercise."""
+        exercise_ids, days, best = self._daily_e1rm()
+        mask = exercise_ids == exercise_id
+        return days[mask].astype('datetime64[D]'), best[mask]
+
+    @_cached
+    def _daily_e1rm(self):
+        """Best Epley estimated 1RM per (exercise, day), sorted by exercise then day."""
+        columns = self.columns()
+        with np.errstate(invalid='ignore'):
+            weighted = (columns.weight > 0) & (columns.reps > 0)
+        reps = columns.reps[weighted]
+        weight = columns.weight[weighted]
+        e1rm = np.where(reps == 1, weight, weight * (1 + reps / 30))   # As utils.records.pr_values
+        exercise_ids = columns.exercise_id[weighted].astype(np.int64)
+        days = columns.day[weighted].astype(np.int64)
+
+        order = np.lexsort((days, exercise_ids))
+        keys = (exercise_ids[order] << 32) | (days[order] & 0xFFFFFFFF)
+        if not len(keys):
+            return exercise_ids, days, e1rm
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        return exercise_ids[order][starts], days[order][starts], np.maximum.reduceat(e1rm[order], starts)
+
+    @_cached
+    def e1rm_trends(self, window_days=90, end=None):
+        """Fit the daily best estimated 1RM of each exercise over the last `window_days` up to `end`."""
+        exercise_ids, days, best = self._daily_e1rm()
+        last = _day_number(end)
+        recent = (days > last - window_days) & (days <= last)
+        exercise_ids, days, best = exercise_ids[recent], days[recent], best[recent]
+        if not len(days):
+            return []
+
+        ids, group = np.unique(exercise_ids, return_inverse=True)
+        n = np.bincount(group).astype(np.float64)
+        x = (days - last).astype(np.float64)
+        sum_x, sum_y = np.bincount(group, x), np.bincount(group, best)
+        sum_xx, sum_xy = np.bincount(group, x * x), np.bincount(group, x * best)
+        denominator = n * sum_xx - sum_x ** 2
+        slope = np.divide(n * sum_xy - sum_x * sum_y, denominator,
+                          out=np.full(len(ids), np.nan), where=denominator > 0)
+
+        ends = np.concatenate((np.flatnonzero(np.diff(group)), [len(group) - 1]))
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        latest = best[ends]
+        peak = np.maximum.reduceat(best, starts)
+        name_of = self.db.get_exercise_name
+        return [
+            E1RMTrend(int(exercise_id), name_of(int(exercise_id)), int(count), float(value), float(top),
+                      float(per_day * 7))
+            for exercise_id, count, value, top, per_day in zip(ids, n, latest, peak, slope)
+        ]
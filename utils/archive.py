@@ -0,0 +1,244 @@
+# utils/archive.py
+
+"""Cold storage for old workout logs: one SQLite file per year, attached only when a query reaches it.
+
+``ArchiveSet.move(before)`` moves logs dated before a cutoff out of
+``workout_logs``, in batches, into ``archive/<name>-<year>.db`` beside the
+database, then compacts each year it touched with ``VACUUM INTO``. Moved logs
+keep their ids and still count in workout_totals. They also keep their PR history
+and note search entries. A move is not a deletion: it publishes no change
+events and leaves no sync tombstones.
+
+``Database`` reads archives through its pooled read-only connections, attaching
+the years a query's date range reaches (see ``Database._fetch_logs``). Archived
+logs are read-only; logs of a deleted exercise are hidden from queries and
+dropped at the next compaction.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+from utils.database import logs_from
+
+BATCH_SIZE = 5000           # Logs moved per transaction
+MMAP_SIZE = 268435456       # Bytes of each archive memory-mapped by readers when the database runs with performance=True
+LOG_COLUMNS = 'id, date, exercise_id, duration, calories, sets, reps, weight, notes, uuid'
+SCHEMA_PREFIX = 'archive_'
+MOVE_SCHEMA = 'archive_move'
+
+class ArchiveStats(NamedTuple):
+    year: int
+    logs: int
+    bytes: int
+
+def partition_sql(sql, schema, hidden=''):
+    """Point a query over workout_logs at an attached archive, hiding logs of deleted exercises.
+
+    ``hidden`` is a further condition, from Database._hide_deleted, for exercises awaiting purge.
+    """
+    return logs_from(sql, f'''
+        SELECT * FROM {schema}.workout_logs
+        WHERE +exercise_id IN (SELECT id FROM main.exercises) {'AND ' + hidden if hidden else ''}
+    ''')
+
+def create_schema(cursor, schema):
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.workout_logs (
+            id INTEGER PRIMARY KEY,
+            date TEXT,
+            exercise_id INTEGER,
+            duration REAL,
+            calories REAL,
+            sets INTEGER,
+            reps INTEGER,
+            weight REAL,
+            notes TEXT,
+            uuid TEXT
+        )
+    ''')
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_workout_logs_date ON workout_logs(date)")
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS {schema}.idx_workout_logs_exercise_date
+        ON workout_logs(exercise_id, date)
+    ''')
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {schema}.idx_workout_logs_uuid ON workout_logs(uuid)")
+
+class ArchiveSet:
+    """The per-year archive files of one Database.
+
+    Moves run on the database's owning thread, outside any transaction; reads may
+    come from any thread.
+    """
+
+    def __init__(self, db, directory=None, mmap_size=None):
+        self.db = db
+        if db.db_path == ':memory:':
+            self.directory = None
+        else:
+            self.directory = directory or os.path.join(os.path.dirname(os.path.abspath(db.db_path)), 'archive')
+        self.stem = os.path.splitext(os.path.basename(db.db_path))[0]
+        self.mmap_size = (MMAP_SIZE if db.performance else 0) if mmap_size is None else mmap_size
+        self._years = None
+        self._lock = threading.Lock()
+
+    def path(self, year):
+        return os.path.join(self.directory, f"{self.stem}-{year}.db")
+
+    def years(self):
+        """Years that have an archive, oldest first."""
+        with self._lock:
+            if self._years is None:
+                pattern = re.compile(rf"{re.escape(self.stem)}-(\d{{4}})\.db$")
+                names = os.listdir(self.directory) if self.directory and os.path.isdir(self.directory) else []
+                self._years = sorted(int(match[1]) for name in names if (match := pattern.match(name)))
+            return self._years
+
+    def years_between(self, start=None, end=None):
+        """Archived years that can hold logs dated within [start, end] (ISO dates, either open)."""
+        return [year for year in self.years()
+                if (start is None or year >= int(start[:4])) and (end is None or year <= int(end[:4]))]
+
+    # --- Reads ---
+
+    def _attach(self, conn, year):
+        """Attach a year's archive read-only to a pooled connection, once per version of its file."""
+        path = self.path(year)
+        schema = f"{SCHEMA_PREFIX}{year}_{os.stat(path).st_ino}"    # Compaction replaces the file
+        attached = [row[1] for row in conn.execute("PRAGMA database_list")]
+        if schema in attached:
+            return schema
+        archives = []
+        for name in attached:
+            if name.startswith(f"{SCHEMA_PREFIX}{year}_"):
+                conn.execute(f"DETACH DATABASE {name}")     # An older version of the file
+            elif name.startswith(SCHEMA_PREFIX):
+                archives.append(name)
+        if len(archives) >= conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED):
+            conn.execute(f"DETACH DATABASE {archives[0]}")     # Make room, dropping the earliest attached
+        conn.execute("ATTACH DATABASE ? AS " + schema, (Path(path).as_uri() + '?mode=ro',))
+        if self.mmap_size:
+            conn.execute(f"PRAGMA {schema}.mmap_size = {self.mmap_size}")
+        return schema
+
+    def fetchall(self, year, sql, params=(), include_deleted=False):
+        """Run a query over workout_logs against one year's archive.
+
+        ``include_deleted`` keeps the logs of deleted exercises awaiting purge, which still count in workout_totals.
+        """
+        hidden = '' if include_deleted else self.db._hide_deleted('exercise_id')  # Before checking out a connection
+        with self.db.read_connection() as conn:
+            schema = self._attach(conn, year)
+            return conn.execute(partition_sql(sql, schema, hidden), params).fetchall()
+
+    def iterate(self, year, sql, params=(), chunk_size=5000):
+        """Like fetchall, yielding rows fetchmany() chunks at a time."""
+        hidden = self.db._hide_deleted('exercise_id')
+        with self.db.read_connection() as conn:
+            schema = self._attach(conn, year)
+            cursor = conn.execute(partition_sql(sql, schema, hidden), params)
+            while rows := cursor.fetchmany(chunk_size):
+                yield from rows
+
+    def stats(self):
+        """Return ArchiveStats for every archive, oldest first."""
+        return [ArchiveStats(year, self.fetchall(year, "SELECT COUNT(*) FROM workout_logs")[0][0],
+                             os.path.getsize(self.path(year)))
+                for year in self.years()]
+
+    # --- Moving logs ---
+
+    def move(self, before, batch_size=BATCH_SIZE, progress=None):
+        """Move every log dated before ``before`` (an ISO date) into its year's archive; returns the count.
+
+        Each batch is committed to the archive first and removed from workout_logs
+        second, so an interruption can leave a log in both, never in neither; the
+        next move finishes the job. ``progress(moved)`` is called after each batch.
+        """
+        db = self.db
+        if self.directory is None:
+            raise ValueError("Archives need a database file, not ':memory:'")
+        os.makedirs(self.directory, exist_ok=True)
+        moved = 0
+        while True:
+            first = db._fetchone("SELECT MIN(date) FROM workout_logs WHERE date < ?", (before,))[0]
+            if first is None:
+                break
+            year = int(first[:4])
+            end = min(before, f"{year + 1}-01-01")
+            db.cursor.execute(f"ATTACH DATABASE ? AS {MOVE_SCHEMA}", (self.path(year),))
+            try:
+                create_schema(db.cursor, MOVE_SCHEMA)
+                db.conn.commit()
+                while True:
+                    ids = [row[0] for row in db._fetchall('''
+                        SELECT id FROM workout_logs
+                        WHERE date >= ? AND date < ?
+                        ORDER BY date, id
+                        LIMIT ?
+                    ''', (first, end, batch_size))]
+                    if not ids:
+                        break
+                    placeholders = ', '.join('?' * len(ids))
+                    with db.transaction():
+                        db.cursor.execute(f'''
+                            INSERT OR IGNORE INTO {MOVE_SCHEMA}.workout_logs ({LOG_COLUMNS})
+                            SELECT {LOG_COLUMNS} FROM main.workout_logs WHERE id IN ({placeholders})
+                        ''', ids)
+                    with db.transaction():
+                        self._delete_quietly(ids)
+                    moved += len(ids)
+                    if progress:
+                        progress(moved)
+                self._compact_attached(year)
+            finally:
+                db.cursor.execute(f"DETACH DATABASE {MOVE_SCHEMA}")
+            self._replace(year)
+        return moved
+
+    def _delete_quietly(self, ids):
+        """Delete logs from workout_logs without firing its delete triggers.
+
+        The triggers would subtract the logs from workout_totals, drop their note
+        search entries and log sync tombstones, none of which an archived log
+        should do. They are dropped and recreated inside the same transaction.
+        """
+        cursor = self.db.cursor
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'workout_logs'")
+        triggers = [(name, sql) for name, sql in cursor.fetchall() if re.search(r'\bDELETE\s+ON\b', sql, re.I)]
+        for name, _ in triggers:
+            cursor.execute(f"DROP TRIGGER {name}")
+        cursor.execute(f"DELETE FROM workout_logs WHERE id IN ({', '.join('?' * len(ids))})", ids)
+        for _, sql in triggers:
+            cursor.execute(sql)
+
+    def _compact_attached(self, year):
+        """Drop logs of deleted exercises from the attached archive and write a compacted copy of it."""
+        db = self.db
+        db.cursor.execute(f'''
+            DELETE FROM {MOVE_SCHEMA}.workout_logs
+            WHERE exercise_id NOT IN (SELECT id FROM main.exercises)
+        ''')
+        db.conn.commit()
+        compacted = self.path(year) + '.compact'
+        if os.path.exists(compacted):
+            os.remove(compacted)
+        db.cursor.execute(f"VACUUM {MOVE_SCHEMA} INTO ?", (compacted,))
+
+    def _replace(self, year):
+        """Swap in a compacted archive; readers attach the new file on their next query."""
+        os.replace(self.path(year) + '.compact', self.path(year))
+        with self._lock:
+            self._years = None
+
+    def compact(self, year):
+        """Compact one year's archive on demand."""
+        self.db.cursor.execute(f"ATTACH DATABASE ? AS {MOVE_SCHEMA}", (self.path(year),))
+        try:
+            self._compact_attached(year)
+        finally:
+            self.db.cursor.execute(f"DETACH DATABASE {MOVE_SCHEMA}")
+        self._replace(year)
@@ -0,0 +1,257 @@
+# utils/backup.py
+
+"""Online backups: rotating, compressed snapshots of a live database, with verify and restore.
+
+A snapshot is copied with SQLite's online backup API, a few hundred pages per
+step, then gzip-compressed next to a JSON manifest of its row counts and
+checksum. On a WAL database the copy holds one read transaction, so it sees a
+single consistent state while writers carry on untouched. In rollback-journal
+mode writers wait at most one step, and SQLite restarts the copy if they change
+pages it has already read.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+BACKUP_PAGES = 256          # Pages copied per step
+STEP_PAUSE = 0.002          # Seconds slept between steps, leaving the file to writers and the GIL to the UI
+KEEP = 7                    # Snapshots kept per database
+SUFFIX = '.db.gz'
+PARTIAL = '.partial'        # Marks files of a backup still in progress
+COPY_CHUNK = 1024 * 1024
+
+class Snapshot(NamedTuple):
+    path: str               # The compressed .db.gz file
+    created: str            # UTC ISO 8601
+    size: int               # Compressed bytes
+    pages: int
+    counts: dict            # table -> rows when the snapshot was taken
+    sha256: str             # Of the compressed file
+
+class Verification(NamedTuple):
+    ok: bool
+    integrity: list         # PRAGMA integrity_check messages, ['ok'] when sound
+    counts: dict            # table -> rows in the snapshot
+    mismatches: dict        # table -> (manifest count, snapshot count) where they differ
+    checksum_ok: bool
+
+def table_counts(conn):
+    """Return {table: row count} for every table, FTS shadow tables included."""
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+
+def _manifest_path(path):
+    return path[:-len(SUFFIX)] + '.json'
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+class BackupManager:
+    """Takes, lists, rotates, verifies and restores snapshots of one database file.
+
+    Snapshots go in ``directory`` (default: ``backups`` beside the database).
+    ``backup`` blocks; ``start`` runs it on a daemon thread. Only one backup runs
+    at a time.
+    """
+
+    def __init__(self, db_path, directory=None, keep=KEEP, pages=BACKUP_PAGES, pause=STEP_PAUSE,
+                 connect=sqlite3.connect):
+        if db_path == ':memory:':
+            raise ValueError("Backups need a database file, not ':memory:'")
+        self.db_path = os.path.abspath(db_path)
+        self.directory = directory or os.path.join(os.path.dirname(self.db_path), 'backups')
+        self.stem = os.path.splitext(os.path.basename(db_path))[0]
+        self.keep = keep
+        self.pages = pages
+        self.pause = pause
+        self.connect = connect
+        self._lock = threading.Lock()
+
+    # --- Listing ---
+
+    def snapshots(self):
+        """Return this database's Snapshots, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        snapshots = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith(f"{self.stem}-") and name.endswith(SUFFIX):
+                snapshot = self.snapshot(os.path.join(self.directory, name))
+                if snapshot:
+                    snapshots.append(snapshot)
+        return snapshots
+
+    def snapshot(self, path):
+        """Read a snapshot's manifest; None if it has none."""
+        try:
+            with open(_manifest_path(path)) as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return Snapshot(path, manifest['created'], os.path.getsize(path), manifest['pages'],
+                        manifest['counts'], manifest['sha256'])
+
+    def latest(self):
+        snapshots = self.snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def is_due(self, max_age=timedelta(days=1)):
+        """True if there is no snapshot younger than max_age."""
+        latest = self.latest()
+        return latest is None or datetime.now(timezone.utc) - datetime.fromisoformat(latest.created) > max_age
+
+    # --- Taking snapshots ---
+
+    def start(self, progress=None, done=None, error=None):
+        """Run backup() on a daemon thread; done(snapshot) or error(exception) is called from it."""
+        def run():
+            try:
+                snapshot = self.backup(progress)
+            except Exception as exception:
+                if error is None:
+                    raise
+                error(exception)
+            else:
+                if done:
+                    done(snapshot)
+        thread = threading.Thread(target=run, name='backup', daemon=True)
+        thread.start()
+        return thread
+
+    def backup(self, progress=None):
+        """Copy the database into a new compressed snapshot, rotate old ones, and return the Snapshot.
+
+        ``progress(copied_pages, total_pages)`` is called after each step.
+        """
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            self._remove_partials()
+            created = datetime.now(timezone.utc).replace(microsecond=0)
+            name = f"{self.stem}-{created:%Y%m%dT%H%M%SZ}"
+            copy_path = os.path.join(self.directory, f"{name}.db{PARTIAL}")
+            path = os.path.join(self.directory, name + SUFFIX)
+            try:
+                pages, counts = self._copy(copy_path, progress)
+                digest = self._compress(copy_path, path + PARTIAL)
+                os.replace(path + PARTIAL, path)
+                with open(_manifest_path(path), 'w') as file:
+                    json.dump({'created': created.isoformat(), 'source': self.db_path, 'pages': pages,
+                               'counts': counts, 'sha256': digest, 'sqlite': sqlite3.sqlite_version}, file, indent=2)
+            finally:
+                _remove(copy_path, path + PARTIAL)
+            self.rotate()
+            return self.snapshot(path)
+
+    def _copy(self, copy_path, progress):
+        """Back the live database up into copy_path; return (pages, table counts) of the copy."""
+        source = self.connect(self.db_path)
+        try:
+            if source.execute("PRAGMA journal_mode").fetchone()[0] == 'wal':
+                # Pin one read snapshot for the whole copy; WAL writers are never blocked by it
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+            def step(status, remaining, total):
+                if progress:
+                    progress(total - remaining, total)
+                if remaining:
+                    time.sleep(self.pause)
+
+            target = sqlite3.connect(copy_path)
+            try:
+                source.backup(target, pages=self.pages, progress=step)
+                return target.execute("PRAGMA page_count").fetchone()[0], table_counts(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+
+    @staticmethod
+    def _compress(source_path, path):
+        """gzip a file, returning the SHA-256 of the compressed bytes."""
+        with open(source_path, 'rb') as source, open(path, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0) as compressed:
+                shutil.copyfileobj(source, compressed, COPY_CHUNK)
+        return _sha256(path)
+
+    def _remove_partials(self):
+        """Delete leftovers of backups interrupted by an exit."""
+        for name in os.listdir(self.directory):
+            if name.startswith(f"{self.stem}-") and PARTIAL in name:
+                _remove(os.path.join(self.directory, name))
+
+    def rotate(self):
+        """Delete all but the newest ``keep`` snapshots."""
+        for snapshot in self.snapshots()[:-self.keep or None]:
+            _remove(snapshot.path, _manifest_path(snapshot.path))
+
+    # --- Verify and restore ---
+
+    def verify(self, snapshot):
+        """Decompress a snapshot into a temporary file and check its integrity, row counts and checksum."""
+        temp_path = os.path.join(self.directory, f".verify-{os.getpid()}-{threading.get_ident()}.db")
+        try:
+            return self._check(snapshot, temp_path)
+        finally:
+            _remove(temp_path, temp_path + '-wal', temp_path + '-shm')
+
+    def restore(self, snapshot, target_path=None):
+        """Replace the database file with a verified snapshot; returns its Verification.
+
+        Every connection to the target must be closed first. The file being
+        replaced is kept as ``<target>.before-restore``.
+        """
+        target_path = os.path.abspath(target_path or self.db_path)
+        restored_path = target_path + '.restoring'
+        try:
+            verification = self._check(snapshot, restored_path)
+            if not verification.ok:
+                raise ValueError(f"Snapshot failed verification: {snapshot.path}")
+            if os.path.exists(target_path):
+                os.replace(target_path, target_path + '.before-restore')
+            _remove(target_path + '-wal', target_path + '-shm')
+            os.replace(restored_path, target_path)
+        finally:
+            _remove(restored_path, restored_path + '-wal', restored_path + '-shm')
+        return verification
+
+    def _check(self, snapshot, copy_path):
+        """Decompress snapshot into copy_path and return its Verification."""
+        checksum_ok = _sha256(snapshot.path) == snapshot.sha256
+        try:
+            with gzip.open(snapshot.path, 'rb') as compressed, open(copy_path, 'wb') as copy:
+                shutil.copyfileobj(compressed, copy, COPY_CHUNK)
+            conn = sqlite3.connect(copy_path)
+            try:
+                integrity = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+                counts = table_counts(conn)
+            finally:
+                conn.close()
+        except (OSError, EOFError, zlib.error, sqlite3.DatabaseError) as e:
+            return Verification(False, [f"unreadable: {e}"], {}, {}, checksum_ok)
+        mismatches = {table: (snapshot.counts.get(table), counts.get(table))
+                      for table in snapshot.counts.keys() | counts.keys()
+                      if snapshot.counts.get(table) != counts.get(table)}
+        ok = integrity == ['ok'] and not mismatches and checksum_ok
+        return Verification(ok, integrity, counts, mismatches, checksum_ok)
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(COPY_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,66 @@
+# utils/catalog.py
+
+"""In-memory catalog of exercises, so name <-> id lookups need no query."""
+
+import threading
+
+class ExerciseCatalog:
+    """Bidirectional exercise name <-> id map, loaded on first use.
+
+    ``version`` increases each time the catalog is invalidated, so views can
+    refresh names only when needed.
+    """
+
+    def __init__(self, load):
+        self._load = load           # Returns (id, name, type) rows for every exercise
+        self._lock = threading.Lock()
+        self._maps = None           # ({name: id}, {id: (name, type)})
+        self.version = 0
+
+    def _get_maps(self):
+        maps = self._maps
+        if maps is None:
+            with self._lock:
+                if self._maps is None:
+                    rows = self._load()
+                    self._maps = ({name: id_ for id_, name, _ in rows},
+                                  {id_: (name, type_) for id_, name, type_ in rows})
+                maps = self._maps
+        return maps
+
+    def id_of(self, name):
+        """Return the id of an exercise name, or None."""
+        return self._get_maps()[0].get(name)
+
+    def name_of(self, exercise_id):
+        """Return the name of an exercise id, or None."""
+        exercise = self._get_maps()[1].get(exercise_id)
+        return exercise[0] if exercise else None
+
+    def get(self, exercise_id):
+        """Return (name, type) of an exercise id, or None."""
+        return self._get_maps()[1].get(exercise_id)
+
+    def ids(self):
+        """Return a copy of the {name: id} map."""
+        return dict(self._get_maps()[0])
+
+    def names(self):
+        """Return every exercise name, sorted."""
+        return sorted(self._get_maps()[0])
+
+    def types(self):
+        """Return every distinct exercise type, sorted."""
+        return sorted({type_ for _, type_ in self._get_maps()[1].values()})
+
+    def snapshot(self):
+        """Return (version, sorted names) read consistently."""
+        version = self.version
+        names = self.names()
+        return (version, names) if version == self.version else self.snapshot()
+
+    def invalidate(self):
+        """Drop the cached maps after exercises changed."""
+        with self._lock:
+            self._maps = None
+            self.version += 1
@@ -0,0 +1,56 @@
+# utils/changes.py
+
+"""Row-level change notifications published by ``Database`` after each commit."""
+
+import threading
+from typing import NamedTuple
+
+INSERT = 'insert'
+UPDATE = 'update'
+DELETE = 'delete'
+
+class ChangeEvent(NamedTuple):
+    """One changed row.
+
+    ``key`` is the row's primary key, except for pr_records, which are keyed by
+    exercise_id like everywhere else in the app. Upserts are reported as updates.
+    """
+    table: str
+    op: str
+    key: int
+
+class ChangeFeed:
+    """Publish/subscribe hub for lists of ChangeEvents.
+
+    Subscribers are called on the thread that committed the change, once per
+    commit, with every event of that commit for the tables they asked for.
+    """
+
+    def __init__(self):
+        self._subscribers = []    # (callback, tables or None)
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback, tables=None):
+        """Call callback(events) after each commit touching ``tables`` (all when None).
+
+        Returns a function that unsubscribes.
+        """
+        entry = (callback, frozenset(tables) if tables else None)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def publish(self, events):
+        if not events:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, tables in subscribers:
+            selected = events if tables is None else [event for event in events if event.table in tables]
+            if selected:
+                callback(selected)
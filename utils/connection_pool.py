@@ -0,0 +1,61 @@
+# utils/connection_pool.py
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+class ReadPool:
+    """Small pool of read-only SQLite connections that may be used from any thread.
+
+    Connections are opened lazily up to ``size``; callers beyond that wait for one
+    to be returned. Each connection is used by one thread at a time.
+    """
+
+    def __init__(self, db_path, size=4, pragmas=(), connect=sqlite3.connect):
+        if db_path == ':memory:':
+            raise ValueError("A read pool needs a database file, not ':memory:'")
+        self.uri = Path(db_path).absolute().as_uri() + '?mode=ro'
+        self.size = size
+        self.pragmas = pragmas
+        self.connect = connect
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _open(self):
+        conn = self.connect(self.uri, uri=True, check_same_thread=False)
+        for pragma in self.pragmas:
+            conn.execute(f"PRAGMA {pragma}")
+        return conn
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Check out a read-only connection for the duration of the block."""
+        if self._closed:
+            raise RuntimeError("Read pool is closed")
+        conn = None
+        with self._lock:
+            if self._idle.empty() and self._opened < self.size:
+                conn = self._open()
+                self._opened += 1
+        if conn is None:
+            conn = self._idle.get(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+
+    def close(self):
+        """Close every idle connection; checked-out ones close when returned."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
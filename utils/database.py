@@ -1,24 +1,151 @@
 # utils/database.py
 
+import heapq
 import sqlite3
 import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from utils import migrations, profiling
+from utils.migrations import NEW_UUID
+from utils.catalog import ExerciseCatalog
+from utils.changes import DELETE, INSERT, UPDATE, ChangeEvent, ChangeFeed
+from utils.connection_pool import ReadPool
+from utils.records import PRIndex, pr_values
+from utils.sync import HybridClock
+
+# Non-ISO formats accepted for workout dates, tried in order. Dates are always stored as ISO-8601.
+DATE_FORMATS = ('%m/%d/%y', '%m/%d/%Y')
+ISO_DATE_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+
+def normalize_date(value):
+    """Convert a date, datetime or date string to an ISO-8601 'YYYY-MM-DD' string."""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return _parse_date_text(str(value).strip())
+
+@lru_cache(maxsize=8192)
+def _parse_date_text(text):
+    """Parse a date string; cached because bulk imports repeat the same few thousand days."""
+    try:
+        return date.fromisoformat(text).isoformat()  # Fast path for already-normalized dates
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {text!r}")
+
+# Opt-in tuning for large databases, applied to the write connection by Database(performance=True)
+PERFORMANCE_PRAGMAS = (
+    "journal_mode = WAL",       # Readers no longer block the writer
+    "synchronous = NORMAL",     # WAL is still durable against application crashes
+    "cache_size = -65536",      # 64 MiB page cache
+    "mmap_size = 268435456",    # 256 MiB of memory-mapped reads
+    "temp_store = MEMORY",
+)
+READ_PRAGMAS = (
+    "cache_size = -16384",      # 16 MiB page cache per pooled reader
+    "mmap_size = 268435456",
+)
+
+# How long a deleted exercise can be restored; after that a Purger removes its rows
+UNDO_WINDOW = timedelta(seconds=30)
+PURGE_BATCH = 2000          # Rows removed per purge transaction
+
+UNCHANGED = object()        # Default of update arguments whose stored value should be kept
+
+# Columns of a workout log row: (id, date, exercise_id, duration, calories, sets, reps, weight, notes).
+# Rows carry the exercise id; names come from the in-memory exercise catalog.
+LOG_SELECT = '''
+    SELECT workout_logs.id, workout_logs.date, workout_logs.exercise_id, workout_logs.duration,
+           workout_logs.calories, workout_logs.sets, workout_logs.reps, workout_logs.weight,
+           workout_logs.notes
+    FROM workout_logs
+'''
+
+# Orderings accepted by Database.query_workout_logs: name -> ORDER BY terms
+LOG_ORDERS = {
+    'newest': "workout_logs.date DESC, workout_logs.id DESC",
+    'oldest': "workout_logs.date ASC, workout_logs.id ASC",
+    'longest': "workout_logs.duration DESC, workout_logs.id DESC",
+    'calories': "workout_logs.calories DESC, workout_logs.id DESC",
+}
+# The same orderings as (sort key of a LOG_SELECT row, descending), for merging rows from archives.
+# NULLs sort last when descending, as in SQLite.
+LOG_ORDER_KEYS = {
+    'newest': (lambda row: (row[1], row[0]), True),
+    'oldest': (lambda row: (row[1], row[0]), False),
+    'longest': (lambda row: (row[3] is not None, row[3] or 0, row[0]), True),
+    'calories': (lambda row: (row[4] is not None, row[4] or 0, row[0]), True),
+}
+
+_FROM_LOGS = re.compile(r'\bFROM workout_logs\b(?!\.)')
+
+def logs_from(sql, source):
+    """Point a query's FROM workout_logs at ``source``, a SELECT over some copy of the table."""
+    return _FROM_LOGS.sub(f"FROM ({source}) AS workout_logs", sql)
+
+def _utc_now():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+def fts_terms(text):
+    """Split free text into FTS5 prefix queries, one per word."""
+    return [f'"{word}"*' for word in re.findall(r"\w+", text or '')]
 
 class Database:
-    def __init__(self, db_path):
+    def __init__(self, db_path, performance=False, read_pool_size=4, profile=False):
         self.db_path = db_path
+        self.performance = performance
+        self.read_pool_size = read_pool_size
+        # Statement timing, see utils.profiling; also on when profiling was enabled elsewhere
+        self.profiler = profiling.enable() if profile else profiling.active()
         self.conn = None
         self.cursor = None
+        self._read_pool = None
+        self._owner_thread = threading.get_ident()
+        self._transaction_depth = 0
+        self._pr_index = None
+        self._prs_stale = False       # The PR index must be reloaded once the current transaction commits
+        self._log_store = None
+        self._log_store_lock = threading.Lock()
+        self._backups = None
+        self._archives = None
+        self._purger = None
+        self._deleted = None          # Ids of deleted exercises awaiting purge, whose rows queries hide
+        self.catalog = ExerciseCatalog(lambda: self._fetchall(
+            "SELECT id, name, type FROM exercises WHERE deleted IS NULL"))
+        self.changes = ChangeFeed()
+        self._pending_changes = []    # ChangeEvents waiting for the current transaction to commit
+        self.data_version = 0         # Bumped after every commit that changed rows; cache key for derived data
         self.connect()
         self.initialize_db()
+        self.device_id = self._fetchone("SELECT value FROM sync_meta WHERE key = 'device'")[0]
+        self.clock = HybridClock.resume(self)
 
     def connect(self):
         """Establish a connection to the SQLite database."""
-        self.conn = sqlite3.connect(self.db_path)
+        self.conn = self._open_connection(self.db_path)
         self.cursor = self.conn.cursor()
         self.cursor.execute("PRAGMA foreign_keys = ON;")  # Enable foreign key support
+        if self.performance:
+            for pragma in PERFORMANCE_PRAGMAS:
+                self.cursor.execute(f"PRAGMA {pragma}")
+
+    def _open_connection(self, *args, **kwargs):
+        """sqlite3.connect, instrumented when profiling."""
+        if self.profiler:
+            return profiling.connect(self.profiler, *args, **kwargs)
+        return sqlite3.connect(*args, **kwargs)
 
     def initialize_db(self):
-        """Create necessary tables if they don't exist."""
+        """Create necessary tables if they don't exist and apply pending schema migrations."""
         # Create 'exercises' table
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS exercises (
@@ -51,126 +178,994 @@ class Database:
         ''')
 
         self.conn.commit()
+        migrations.migrate(self)
+
+    def migrate_dates(self, batch_size=1000):
+        """Rewrite non-ISO workout dates in batches, committing after each batch.
+
+        Only rows that are not yet ISO-formatted are selected, so an interrupted run
+        simply resumes where it stopped. Rows with unparseable dates are left untouched.
+        """
+        last_id = 0
+        while True:
+            self.cursor.execute('''
+                SELECT id, date FROM workout_logs
+                WHERE id > ? AND date NOT GLOB ?
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, ISO_DATE_GLOB, batch_size))
+            rows = self.cursor.fetchall()
+            if not rows:
+                break
+
+            updates = []
+            for log_id, value in rows:
+                try:
+                    updates.append((normalize_date(value), log_id))
+                except ValueError:
+                    pass
+            self.cursor.executemany("UPDATE workout_logs SET date = ? WHERE id = ?", updates)
+            self.conn.commit()
+            last_id = rows[-1][0]
+
+    @property
+    def log_store(self):
+        """Compact in-memory copy of the workout logs (utils.log_store), loaded on first use."""
+        if self._log_store is None:
+            with self._log_store_lock:     # The charts tab loads it on a worker thread
+                if self._log_store is None:
+                    from utils.log_store import LogStore   # Imports NumPy, which only some callers need
+                    self._log_store = LogStore(self)
+        return self._log_store
+
+    @property
+    def backups(self):
+        """BackupManager (utils.backup) for this database file's rotating snapshots."""
+        if self._backups is None:
+            from utils.backup import BackupManager
+            self._backups = BackupManager(self.db_path)
+        return self._backups
+
+    @property
+    def archives(self):
+        """ArchiveSet (utils.archive) holding logs moved out of workout_logs into per-year files."""
+        if self._archives is None:
+            from utils.archive import ArchiveSet
+            self._archives = ArchiveSet(self)
+        return self._archives
+
+    @property
+    def purger(self):
+        """Purger (utils.purge) removing the rows of deleted exercises in the background."""
+        if self._purger is None:
+            from utils.purge import Purger
+            self._purger = Purger(self.db_path)
+        return self._purger
 
     def close(self):
-        """Close the database connection."""
+        """Close the database connection and any pooled read connections."""
+        if self._purger:
+            self._purger.stop()
+        if self._log_store:
+            self._log_store.close()
+        if self._read_pool:
+            self._read_pool.close()
         if self.conn:
+            # An executemany() statement stays active until its cursor closes, and would
+            # keep the connection (and an un-checkpointed WAL file) open past close()
+            self.cursor.close()
             self.conn.close()
+            self.conn = None    # Closing twice is harmless, as when a CLI command closes early
 
-    # --- CRUD Operations for Exercises ---
+    # --- Read connections ---
+
+    @property
+    def read_pool(self):
+        """Pool of read-only connections for background threads, opened on first use."""
+        if self._read_pool is None:
+            pragmas = READ_PRAGMAS if self.performance else ()
+            self._read_pool = ReadPool(self.db_path, self.read_pool_size, pragmas, connect=self._open_connection)
+        return self._read_pool
+
+    def read_connection(self):
+        """Check out a read-only connection; use as a context manager."""
+        return self.read_pool.connection()
+
+    def _fetchall(self, sql, params=()):
+        """Run a read query on the write connection, or on a pooled reader when off the owning thread."""
+        if threading.get_ident() == self._owner_thread:
+            self.cursor.execute(sql, params)
+            return self.cursor.fetchall()
+        with self.read_pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _fetchone(self, sql, params=()):
+        """Like _fetchall, returning only the first row."""
+        if threading.get_ident() == self._owner_thread:
+            self.cursor.execute(sql, params)
+            return self.cursor.fetchone()
+        with self.read_pool.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    # --- Deleted exercises and archived logs ---
+
+    def _deleted_ids(self):
+        """Ids of exercises deleted but not yet purged; cached until exercises change."""
+        ids = self._deleted
+        if ids is None:
+            ids = self._deleted = tuple(row[0] for row in self._fetchall(
+                "SELECT id FROM exercises WHERE deleted IS NOT NULL"))
+        return ids
+
+    def _hide_deleted(self, column):
+        """SQL condition excluding rows of deleted exercises by their exercise id column; '' when there are none."""
+        ids = self._deleted_ids()
+        return f"{column} NOT IN ({', '.join(map(str, ids))})" if ids else ''
+
+    def _visible_logs_sql(self, sql):
+        """Hide the logs of deleted exercises from a query over workout_logs.
+
+        Without deleted exercises the query is returned unchanged, plan and all.
+        """
+        hidden = self._hide_deleted('exercise_id')
+        return logs_from(sql, f"SELECT * FROM main.workout_logs WHERE {hidden}") if hidden else sql
+
+    def _fetchall_logs(self, sql, params=(), start=None, end=None):
+        """Run a query over workout_logs on the table and on each archive holding dates in [start, end].
+
+        Rows come unordered: archives' first, oldest year first.
+        """
+        rows = []
+        for year in self.archives.years_between(start, end):
+            rows.extend(self.archives.fetchall(year, sql, params))
+        rows.extend(self._fetchall(self._visible_logs_sql(sql), params))
+        return rows
 
-    def add_exercise(self, name, type_):
-        """Add a new exercise."""
+    def _fetch_logs(self, sql, params=(), order='newest', limit=None, offset=0, start=None, end=None):
+        """Run a LOG_SELECT query in one of the LOG_ORDERS across workout_logs and the archives it reaches.
+
+        ``sql`` has no ORDER BY or LIMIT; start and end bound the dates its WHERE
+        clause selects, so archives of other years are never opened. For the
+        'newest' and 'oldest' orders, archives are visited nearest year first
+        and skipped once the rows found already fill the page.
+        """
+        tail = f"ORDER BY {LOG_ORDERS[order]} LIMIT ? OFFSET ?"
+        years = self.archives.years_between(start, end)
+        if not years:
+            return self._fetchall(self._visible_logs_sql(f"{sql} {tail}"), (*params, -1 if limit is None else limit,
+                                                                            offset))
+        wanted = None if limit is None else limit + offset
+        params = (*params, -1 if wanted is None else wanted, 0)
+        key, descending = LOG_ORDER_KEYS[order]
+        rows = self._fetchall(self._visible_logs_sql(f"{sql} {tail}"), params)
+        if order in ('newest', 'oldest'):
+            years = years[::-1] if descending else years
+        for year in years:
+            if wanted is not None and len(rows) >= wanted and order in ('newest', 'oldest'):
+                boundary = rows[wanted - 1][1]
+                if (boundary > f"{year}-12-31") if descending else (boundary < f"{year}-01-01"):
+                    break   # This year's logs, and those of the years after it in this order, fall past the page
+            rows = sorted(rows + self.archives.fetchall(year, f"{sql} {tail}", params), key=key, reverse=descending)
+            rows = rows[:wanted]
+        return rows[offset:]
+
+    # --- Transactions ---
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes in one transaction, committed once at the end.
+
+        Nested blocks become savepoints, so an exception inside an inner block
+        only rolls back that block's writes. The outer block takes the write lock
+        up front, waiting out other writers: a read-first deferred transaction
+        would fail instead once another connection commits after its first read.
+        """
+        depth = self._transaction_depth
+        savepoint = f"sp_{depth}"
+        mark = len(self._pending_changes)
+        if depth == 0:
+            if self.conn.in_transaction:
+                self.conn.commit()
+            self.cursor.execute("BEGIN IMMEDIATE")
+        else:
+            self.cursor.execute(f"SAVEPOINT {savepoint}")
+
+        self._transaction_depth += 1
         try:
-            self.cursor.execute("INSERT INTO exercises (name, type) VALUES (?, ?)", (name, type_))
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if depth == 0:
+                self.conn.rollback()
+            else:
+                self.cursor.execute(f"ROLLBACK TO {savepoint}")
+                self.cursor.execute(f"RELEASE {savepoint}")
+            del self._pending_changes[mark:]
+            self._pr_index = None  # May hold records from the rolled-back writes
+            self.catalog.invalidate()
+            raise
+        else:
+            self._transaction_depth -= 1
+            if depth == 0:
+                self._stamp_changes()
+                self.conn.commit()
+                self._publish_changes()
+            else:
+                self.cursor.execute(f"RELEASE {savepoint}")
+
+    def _commit(self):
+        """Commit unless a transaction() block is open."""
+        if not self._transaction_depth:
+            self._stamp_changes()
             self.conn.commit()
+            self._publish_changes()
+
+    def _stamp_changes(self, hlc=None, device=None):
+        """Timestamp the change-log entries the triggers added since the last stamp (see utils.sync).
+
+        Local commits are stamped with this device and the next clock reading;
+        sync stamps the changes it applies with the remote ones. Returns the
+        number of entries stamped.
+        """
+        if not self._pending_changes and hlc is None:
+            return 0
+        self.cursor.execute("UPDATE change_log SET hlc = ?, device = ? WHERE hlc IS NULL",
+                            (hlc if hlc is not None else self.clock.now(), device or self.device_id))
+        return self.cursor.rowcount
+
+    # --- Change notifications ---
+
+    def _changed(self, table, op, keys):
+        """Queue change events for rows of a table; they are published once the write commits."""
+        self._pending_changes.extend(ChangeEvent(table, op, key) for key in keys)
+
+    def _publish_changes(self):
+        events, self._pending_changes = self._pending_changes, []
+        if events:
+            self.data_version += 1
+        if any(event.table == 'exercises' for event in events):
+            # Again after the commit, in case another thread reloaded the catalog before it
+            self._deleted = None
+            self.catalog.invalidate()
+        if self._prs_stale:
+            # Again after the commit, in case another thread reloaded the index from the old rows before it
+            self._prs_stale = False
+            self._pr_index = None
+        self.changes.publish(events)
+
+    # --- CRUD Operations for Exercises ---
+
+    def add_exercise(self, name, type_, uuid=None):
+        """Add a new exercise. A uuid is generated unless given, as when syncing one in."""
+        try:
+            self._release_name(name)
+            self.cursor.execute(f"INSERT INTO exercises (name, type, uuid) VALUES (?, ?, COALESCE(?, {NEW_UUID}))",
+                                (name, type_, uuid))
+            self._changed('exercises', INSERT, [self.cursor.lastrowid])
+            self.catalog.invalidate()
+            self._commit()
             return True
         except sqlite3.IntegrityError:
             return False  # Exercise already exists
 
     def update_exercise(self, old_name, new_name, new_type):
         """Update an existing exercise."""
+        exercise_id = self.catalog.id_of(old_name)
         try:
-            self.cursor.execute("UPDATE exercises SET name = ?, type = ? WHERE name = ?", (new_name, new_type, old_name))
-            self.conn.commit()
-            return self.cursor.rowcount > 0
+            if new_name != old_name:
+                self._release_name(new_name)
+            self.cursor.execute("UPDATE exercises SET name = ?, type = ? WHERE name = ? AND deleted IS NULL",
+                                (new_name, new_type, old_name))
+            updated = self.cursor.rowcount > 0
+            if updated:
+                self._changed('exercises', UPDATE, [exercise_id])
+                self.catalog.invalidate()
+            self._commit()
+            return updated
         except sqlite3.IntegrityError:
             return False  # New exercise name already exists
 
     def delete_exercise(self, name):
-        """Delete an exercise."""
-        self.cursor.execute("DELETE FROM exercises WHERE name = ?", (name,))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
+        """Delete an exercise, along with its workout logs and personal records.
+
+        The exercise is only marked deleted, which hides it and its rows at once;
+        restore_exercise undoes that for UNDO_WINDOW. The rows themselves are
+        removed afterwards, a batch at a time, by purge_exercise (see ``purger``).
+        """
+        exercise_id = self.catalog.id_of(name)
+        if exercise_id is None:
+            return False
+        # Collect the logs that disappear from view, so their deletion can be announced
+        log_ids = [row[0] for row in self._fetchall_logs("SELECT id FROM workout_logs WHERE exercise_id = ?",
+                                                         (exercise_id,))]
+        self.cursor.execute("UPDATE exercises SET deleted = ? WHERE id = ? AND deleted IS NULL",
+                            (_utc_now(), exercise_id))
+        deleted = self.cursor.rowcount > 0
+        if deleted:
+            self._log_exercise_change(exercise_id, 'delete')
+            self._changed('workout_logs', DELETE, log_ids)
+            self._changed('pr_records', DELETE, [exercise_id])
+            self._changed('exercises', DELETE, [exercise_id])
+            self._forget_deleted()
+        self._commit()
+        return deleted
+
+    def restore_exercise(self, name):
+        """Undo delete_exercise; returns False once UNDO_WINDOW has passed or if there is nothing to restore."""
+        since = (datetime.now(timezone.utc) - UNDO_WINDOW).isoformat(timespec='seconds')
+        row = self._fetchone("SELECT id FROM exercises WHERE name = ? AND deleted >= ?", (name, since))
+        if row is None:
+            return False
+        exercise_id = row[0]
+        self.cursor.execute("UPDATE exercises SET deleted = NULL WHERE id = ?", (exercise_id,))
+        self._log_exercise_change(exercise_id, 'put')
+        self._forget_deleted()
+        log_ids = [row[0] for row in self._fetchall_logs("SELECT id FROM workout_logs WHERE exercise_id = ?",
+                                                         (exercise_id,))]
+        self._changed('exercises', INSERT, [exercise_id])
+        self._changed('pr_records', UPDATE, [exercise_id])
+        self._changed('workout_logs', INSERT, log_ids)
+        self._commit()
+        return True
+
+    def deleted_exercises(self):
+        """Return (id, name, deleted) of exercises awaiting purge, longest deleted first."""
+        return self._fetchall("SELECT id, name, deleted FROM exercises WHERE deleted IS NOT NULL ORDER BY deleted")
+
+    def purge_exercise(self, exercise_id, batch_size=PURGE_BATCH):
+        """Remove up to batch_size rows of a deleted exercise in one transaction and return how many.
+
+        Returns 0 once nothing is left, having removed the exercise itself, and for
+        exercises that are not deleted or are still within UNDO_WINDOW. Its archived
+        logs stay hidden until their archive is next compacted.
+        """
+        since = (datetime.now(timezone.utc) - UNDO_WINDOW).isoformat(timespec='seconds')
+        with self.transaction():
+            if not self._fetchone("SELECT 1 FROM exercises WHERE id = ? AND deleted < ?", (exercise_id, since)):
+                return 0
+            removed = 0
+            for table in ('pr_history', 'workout_logs'):
+                # Log triggers keep totals and note search current; the change log skips them
+                self.cursor.execute(f'''
+                    DELETE FROM {table}
+                    WHERE id IN (SELECT id FROM {table} WHERE exercise_id = ? LIMIT ?)
+                ''', (exercise_id, batch_size - removed))
+                removed += self.cursor.rowcount
+                if removed >= batch_size:
+                    return removed
+            if removed:
+                return removed
+            # What is left is one row per exercise, or per period for the totals of archived logs
+            self.cursor.execute("DELETE FROM pr_records WHERE exercise_id = ?", (exercise_id,))
+            self.cursor.execute("DELETE FROM workout_totals WHERE exercise_id = ?", (exercise_id,))
+            self.cursor.execute("DELETE FROM exercises WHERE id = ?", (exercise_id,))
+            self._changed('exercises', DELETE, [exercise_id])
+            self._forget_deleted()
+        return 0
+
+    def _forget_deleted(self):
+        """Drop what is cached about which exercises exist."""
+        self._deleted = None
+        self._forget_pr_index()
+        self.catalog.invalidate()
+
+    def _release_name(self, name):
+        """Rename a deleted exercise awaiting purge that holds ``name``, so a new exercise can take it."""
+        self.cursor.execute("UPDATE exercises SET name = name || ' (deleted ' || deleted || ')' "
+                            "WHERE name = ? AND deleted IS NOT NULL", (name,))
+
+    def _log_exercise_change(self, exercise_id, op):
+        """Record a deletion or restoration for sync; the change-log triggers only see edits of names and types."""
+        self.cursor.execute("INSERT INTO change_log (entity, uuid, op) SELECT 'exercise', uuid, ? FROM exercises "
+                            "WHERE id = ?", (op, exercise_id))
+
+    def add_exercises(self, exercises):
+        """Add many (name, type) exercises in one transaction, skipping existing names.
+
+        Returns the number of exercises inserted.
+        """
+        with self.transaction():
+            exercises = list(exercises)
+            for name, _ in exercises:
+                self._release_name(name)
+            self.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM exercises")
+            last_id = self.cursor.fetchone()[0]
+            self.cursor.executemany(f"INSERT OR IGNORE INTO exercises (name, type, uuid) VALUES (?, ?, {NEW_UUID})",
+                                    exercises)
+            added = self.cursor.rowcount
+            if added:
+                self.cursor.execute("SELECT id FROM exercises WHERE id > ?", (last_id,))
+                self._changed('exercises', INSERT, [row[0] for row in self.cursor.fetchall()])
+                self.catalog.invalidate()
+        return added
 
     def get_all_exercises(self):
         """Retrieve all exercises."""
-        self.cursor.execute("SELECT name, type FROM exercises")
-        return self.cursor.fetchall()
+        return self._fetchall("SELECT name, type FROM exercises WHERE deleted IS NULL")
+
+    def get_exercise(self, exercise_id):
+        """Retrieve a single exercise as (id, name, type)."""
+        return self._fetchone("SELECT id, name, type FROM exercises WHERE id = ? AND deleted IS NULL", (exercise_id,))
+
+    def get_exercises_page(self, after=None, limit=200):
+        """Retrieve a page of exercises ordered by name, starting after the (name, id) key."""
+        if after is None:
+            where, params = "", (limit,)
+        else:
+            where, params = "AND (name, id) > (?, ?)", (*after, limit)
+        return self._fetchall(f'''
+            SELECT id, name, type
+            FROM exercises
+            WHERE deleted IS NULL {where}
+            ORDER BY name, id
+            LIMIT ?
+        ''', params)
 
     def get_exercise_id(self, name):
-        """Get the ID of an exercise by name."""
-        self.cursor.execute("SELECT id FROM exercises WHERE name = ?", (name,))
-        result = self.cursor.fetchone()
-        return result[0] if result else None
+        """Get the ID of an exercise by name, from the exercise catalog."""
+        return self.catalog.id_of(name)
+
+    def get_exercise_name(self, exercise_id):
+        """Get the name of an exercise by ID, from the exercise catalog."""
+        return self.catalog.name_of(exercise_id)
+
+    def get_exercise_ids(self, names=None):
+        """Return {name: id} for the given exercise names that exist, or for every exercise."""
+        ids = self.catalog.ids()
+        if names is None:
+            return ids
+        return {name: ids[name] for name in names if name in ids}
 
     # --- CRUD Operations for PR Records ---
 
     def add_or_update_pr(self, exercise_id, max_lift):
         """Add or update a personal record."""
-        self.cursor.execute("SELECT id FROM pr_records WHERE exercise_id = ?", (exercise_id,))
-        result = self.cursor.fetchone()
-        if result:
-            self.cursor.execute("UPDATE pr_records SET max_lift = ? WHERE exercise_id = ?", (max_lift, exercise_id))
-        else:
-            self.cursor.execute("INSERT INTO pr_records (exercise_id, max_lift) VALUES (?, ?)", (exercise_id, max_lift))
-        self.conn.commit()
+        self.cursor.execute('''
+            INSERT INTO pr_records (exercise_id, max_lift) VALUES (?, ?)
+            ON CONFLICT(exercise_id) DO UPDATE SET max_lift = excluded.max_lift
+        ''', (exercise_id, max_lift))
+        self._changed('pr_records', UPDATE, [exercise_id])
+        self._commit()
+
+    def upsert_prs(self, prs):
+        """Add or update many (exercise_id, max_lift) personal records in one transaction.
+
+        Returns the number of rows written.
+        """
+        prs = list(prs)
+        with self.transaction():
+            self.cursor.executemany('''
+                INSERT INTO pr_records (exercise_id, max_lift) VALUES (?, ?)
+                ON CONFLICT(exercise_id) DO UPDATE SET max_lift = excluded.max_lift
+            ''', prs)
+            self._changed('pr_records', UPDATE, dict.fromkeys(exercise_id for exercise_id, _ in prs))
+            return self.cursor.rowcount
 
     def delete_pr(self, exercise_id):
         """Delete a personal record."""
         self.cursor.execute("DELETE FROM pr_records WHERE exercise_id = ?", (exercise_id,))
-        self.conn.commit()
+        if self.cursor.rowcount:
+            self._changed('pr_records', DELETE, [exercise_id])
+        self._commit()
 
     def get_all_prs(self):
         """Retrieve all personal records."""
-        self.cursor.execute('''
+        return self._fetchall('''
             SELECT exercises.name, pr_records.max_lift
             FROM pr_records
-            JOIN exercises ON pr_records.exercise_id = exercises.id
+            JOIN exercises ON pr_records.exercise_id = exercises.id AND exercises.deleted IS NULL
         ''')
-        return self.cursor.fetchall()
+
+    def get_pr(self, exercise_id):
+        """Retrieve a single personal record as (exercise_id, exercise, max_lift)."""
+        return self._fetchone('''
+            SELECT pr_records.exercise_id, exercises.name, pr_records.max_lift
+            FROM pr_records
+            JOIN exercises ON pr_records.exercise_id = exercises.id AND exercises.deleted IS NULL
+            WHERE pr_records.exercise_id = ?
+        ''', (exercise_id,))
+
+    def get_prs_page(self, after=None, limit=200):
+        """Retrieve a page of personal records ordered by exercise, starting after the (name, exercise_id) key."""
+        if after is None:
+            where, params = "", (limit,)
+        else:
+            where, params = "WHERE (exercises.name, pr_records.exercise_id) > (?, ?)", (*after, limit)
+        return self._fetchall(f'''
+            SELECT pr_records.exercise_id, exercises.name, pr_records.max_lift
+            FROM pr_records
+            JOIN exercises ON pr_records.exercise_id = exercises.id AND exercises.deleted IS NULL
+            {where}
+            ORDER BY exercises.name, pr_records.exercise_id
+            LIMIT ?
+        ''', params)
 
     # --- CRUD Operations for Workout Logs ---
 
-    def add_workout_log(self, date, exercise_id, duration, calories):
-        """Add a new workout log."""
-        self.cursor.execute('''
-            INSERT INTO workout_logs (date, exercise_id, duration, calories)
-            VALUES (?, ?, ?, ?)
-        ''', (date, exercise_id, duration, calories))
-        self.conn.commit()
+    def add_workout_log(self, date, exercise_id, duration, calories, sets=None, reps=None, weight=None, notes=None,
+                        uuid=None):
+        """Add a new workout log, record any personal records it sets, and return its ID.
 
-    def update_workout_log(self, log_id, date, exercise_id, duration, calories):
-        """Update an existing workout log."""
-        self.cursor.execute('''
-            UPDATE workout_logs
-            SET date = ?, exercise_id = ?, duration = ?, calories = ?
-            WHERE id = ?
-        ''', (date, exercise_id, duration, calories, log_id))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
+        A uuid is generated unless given, as when syncing one in.
+        """
+        date = normalize_date(date)
+        with self.transaction():
+            self.cursor.execute(f'''
+                INSERT INTO workout_logs (date, exercise_id, duration, calories, sets, reps, weight, notes, uuid)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, {NEW_UUID}))
+            ''', (date, exercise_id, duration, calories, sets, reps, weight, notes or None, uuid))
+            log_id = self.cursor.lastrowid
+            self._changed('workout_logs', INSERT, [log_id])
+            self._record_prs([(log_id, date, exercise_id, sets, reps, weight)])
+        return log_id
+
+    def add_workout_logs(self, logs):
+        """Add many workout logs in one transaction.
+
+        Each log is (date, exercise_id, duration, calories), optionally followed by
+        sets, reps, weight and notes.
+        Returns the number of logs inserted.
+        """
+        weighted = []   # (position, row) of logs that carry a weight
+        with self.transaction():
+            self.cursor.executemany(f'''
+                INSERT INTO workout_logs (date, exercise_id, duration, calories, sets, reps, weight, notes, uuid)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, {NEW_UUID})
+            ''', (self._log_row(position, log, weighted) for position, log in enumerate(logs)))
+            count = self.cursor.rowcount
+
+            # Inside the transaction the new rows hold the highest, consecutive ids
+            self.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM workout_logs")
+            first_id = self.cursor.fetchone()[0] - count + 1
+            self._changed('workout_logs', INSERT, range(first_id, first_id + count))
+            self._record_prs([(first_id + position, date, exercise_id, sets, reps, weight)
+                              for position, (date, exercise_id, _, _, sets, reps, weight, _) in weighted])
+        return count
+
+    @staticmethod
+    def _log_row(position, log, weighted):
+        """Normalize a 4- to 8-field log tuple, remembering weighted ones in ``weighted``."""
+        date, exercise_id, duration, calories, *extra = log
+        sets, reps, weight, notes = (*extra, None, None, None, None)[:4]
+        row = (normalize_date(date), exercise_id, duration, calories, sets, reps, weight, notes or None)
+        if weight:
+            weighted.append((position, row))
+        return row
+
+    def update_workout_log(self, log_id, date, exercise_id, duration, calories, sets=UNCHANGED, reps=UNCHANGED,
+                           weight=UNCHANGED, notes=UNCHANGED):
+        """Update an existing workout log.
+
+        Sets, reps, weight and notes left as UNCHANGED keep their stored values;
+        None (or '' for notes) clears them.
+        """
+        date = normalize_date(date)
+        optional = {column: value for column, value in (('sets', sets), ('reps', reps), ('weight', weight),
+                                                        ('notes', notes)) if value is not UNCHANGED}
+        if 'notes' in optional:
+            optional['notes'] = optional['notes'] or None
+        with self.transaction():
+            old = self._fetchone("SELECT exercise_id, weight FROM workout_logs WHERE id = ?", (log_id,))
+            if old is None:
+                return False
+            self.cursor.execute(f'''
+                UPDATE workout_logs
+                SET date = ?, exercise_id = ?, duration = ?, calories = ?
+                    {''.join(f", {column} = ?" for column in optional)}
+                WHERE id = ?
+            ''', (date, exercise_id, duration, calories, *optional.values(), log_id))
+            self._changed('workout_logs', UPDATE, [log_id])
+            self._forget_prs(log_id, *old)
+            self.cursor.execute("SELECT sets, reps, weight FROM workout_logs WHERE id = ?", (log_id,))
+            self._record_prs([(log_id, date, exercise_id, *self.cursor.fetchone())])
+        return True
 
     def delete_workout_log(self, log_id):
-        """Delete a workout log."""
-        self.cursor.execute("DELETE FROM workout_logs WHERE id = ?", (log_id,))
-        self.conn.commit()
-        return self.cursor.rowcount > 0
+        """Delete a workout log and the personal records it set."""
+        with self.transaction():
+            self.cursor.execute("DELETE FROM workout_logs WHERE id = ? RETURNING exercise_id, weight", (log_id,))
+            old = self.cursor.fetchone()
+            if old:
+                self._changed('workout_logs', DELETE, [log_id])
+                self._forget_prs(log_id, *old)
+        return old is not None
 
     def get_all_workout_logs(self):
-        """Retrieve all workout logs."""
-        self.cursor.execute('''
-            SELECT workout_logs.id, workout_logs.date, exercises.name, workout_logs.duration, workout_logs.calories
-            FROM workout_logs
-            JOIN exercises ON workout_logs.exercise_id = exercises.id
-            ORDER BY workout_logs.date DESC
-        ''')
-        return self.cursor.fetchall()
+        """Retrieve all workout logs, archived ones included."""
+        return self._fetch_logs(LOG_SELECT)
+
+    def get_workout_log(self, log_id):
+        """Retrieve a single workout log as (id, date, exercise_id, duration, calories, sets, reps, weight, notes)."""
+        sql = f'''
+            {LOG_SELECT}
+            WHERE workout_logs.id = ?
+        '''
+        row = self._fetchone(self._visible_logs_sql(sql), (log_id,))
+        if row is None and self.archives.years():
+            row = next(iter(self._fetchall_logs(sql, (log_id,))), None)
+        return row
+
+    def is_archived(self, log_id):
+        """True if a workout log has been moved to an archive, where it is read-only."""
+        if not self.archives.years() or self._fetchone("SELECT 1 FROM workout_logs WHERE id = ?", (log_id,)):
+            return False
+        return bool(self._fetchall_logs("SELECT 1 FROM workout_logs WHERE id = ?", (log_id,)))
+
+    def get_workout_logs_page(self, after=None, limit=200):
+        """Retrieve a page of workout logs, newest first, starting after the (date, id) key."""
+        if after is None:
+            return self._fetch_logs(LOG_SELECT, limit=limit)
+        return self._fetch_logs(f'''
+            {LOG_SELECT}
+            WHERE (workout_logs.date, workout_logs.id) < (?, ?)
+        ''', after, limit=limit, end=after[0])
+
+    def get_workout_logs_between(self, start, end):
+        """Retrieve workout logs dated within [start, end], newest first."""
+        start, end = normalize_date(start), normalize_date(end)
+        return self._fetch_logs(f'''
+            {LOG_SELECT}
+            WHERE workout_logs.date BETWEEN ? AND ?
+        ''', (start, end), start=start, end=end)
+
+    def query_workout_logs(self, exercise_id=None, exercise_type=None, start=None, end=None,
+                           min_duration=None, max_duration=None, min_calories=None, max_calories=None,
+                           search=None, log_ids=None, order='newest', limit=200, offset=0, after=None):
+        """Retrieve workout logs matching every given filter, in one of the LOG_ORDERS.
+
+        ``search`` keeps logs where every word prefixes a word of the exercise name
+        or of the notes, looked up through the full-text indexes. ``after`` is a (date, id) key to continue a 'newest'
+        or 'oldest' listing from, which stays fast for deep pages where ``offset``
+        does not. A ``limit`` of None returns every match.
+        """
+        if order not in LOG_ORDERS:
+            raise ValueError(f"Unknown order: {order!r}")
+        conditions, params = [], []
+        first = last = None     # Date bounds, for skipping archives
+
+        def where(condition, *values):
+            conditions.append(condition)
+            params.extend(values)
+
+        if exercise_id is not None:
+            where("workout_logs.exercise_id = ?", exercise_id)
+        if exercise_type is not None:
+            where("workout_logs.exercise_id IN (SELECT id FROM exercises WHERE type = ?)", exercise_type)
+        if start is not None:
+            first = normalize_date(start)
+            where("workout_logs.date >= ?", first)
+        if end is not None:
+            last = normalize_date(end)
+            where("workout_logs.date <= ?", last)
+        for column, low, high in (('duration', min_duration, max_duration), ('calories', min_calories, max_calories)):
+            if low is not None:
+                where(f"workout_logs.{column} >= ?", low)
+            if high is not None:
+                where(f"workout_logs.{column} <= ?", high)
+        for term in fts_terms(search):
+            where('''(workout_logs.exercise_id IN (SELECT rowid FROM exercises_fts WHERE exercises_fts MATCH ?)
+                      OR workout_logs.id IN (SELECT rowid FROM workout_notes_fts WHERE workout_notes_fts MATCH ?))''',
+                  term, term)
+        if log_ids is not None:
+            log_ids = list(log_ids)
+            where(f"workout_logs.id IN ({', '.join('?' * len(log_ids))})", *log_ids)
+        if after is not None:
+            if order not in ('newest', 'oldest'):
+                raise ValueError("after needs the 'newest' or 'oldest' order")
+            where(f"(workout_logs.date, workout_logs.id) {'<' if order == 'newest' else '>'} (?, ?)", *after)
+            if order == 'newest':
+                last = min(last or after[0], after[0])
+            else:
+                first = max(first or after[0], after[0])
+
+        sql = f'''
+            {LOG_SELECT}
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+        '''
+        return self._fetch_logs(sql, params, order, limit, offset, first, last)
+
+    def iter_workout_logs(self, chunk_size=5000, start=None, end=None):
+        """Yield lists of up to chunk_size workout logs in date order, for streaming exports.
+
+        Rows are (date, exercise, type, duration, calories, sets, reps, weight, notes);
+        start and end optionally bound the dates.
+        """
+        start = None if start is None else normalize_date(start)
+        end = None if end is None else normalize_date(end)
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("workout_logs.date >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("workout_logs.date <= ?")
+            params.append(end)
+
+        def select(*extra):
+            where = ' AND '.join(conditions + [condition for condition, _ in extra])
+            # The id comes last, to merge archived logs into order; it is cut off below
+            sql = f'''
+                SELECT workout_logs.date, exercises.name, exercises.type, workout_logs.duration,
+                       workout_logs.calories, workout_logs.sets, workout_logs.reps, workout_logs.weight,
+                       workout_logs.notes, workout_logs.id
+                FROM workout_logs
+                JOIN exercises ON workout_logs.exercise_id = exercises.id AND exercises.deleted IS NULL
+                {'WHERE ' + where if where else ''}
+                ORDER BY workout_logs.date, workout_logs.id
+            '''
+            return sql, [*params, *(value for _, value in extra)]
+
+        years = self.archives.years_between(start, end)
+        if not years:
+            segments = [self._iter_rows(*select(), chunk_size)]
+        else:
+            # Logs dated before the first archived year, then each archived year merged
+            # with the logs of that year (and the gap up to the next) still in the table
+            segments = [self._iter_rows(*select(("workout_logs.date < ?", f"{years[0]}-01-01")), chunk_size)]
+            for year, following in zip(years, years[1:] + [None]):
+                bounds = [("workout_logs.date >= ?", f"{year}-01-01")]
+                if following is not None:
+                    bounds.append(("workout_logs.date < ?", f"{following}-01-01"))
+                segments.append(heapq.merge(self.archives.iterate(year, *select(*bounds), chunk_size),
+                                            self._iter_rows(*select(*bounds), chunk_size),
+                                            key=lambda row: (row[0], row[-1])))
+        chunk = []
+        for segment in segments:
+            for row in segment:
+                chunk.append(row[:-1])
+                if len(chunk) == chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def _iter_rows(self, sql, params, chunk_size):
+        """Yield a query's rows from a dedicated cursor, fetchmany() chunks at a time."""
+        # A dedicated cursor, so other statements can run between chunks
+        if threading.get_ident() == self._owner_thread:
+            cursor = self.conn.execute(sql, params)
+            while rows := cursor.fetchmany(chunk_size):
+                yield from rows
+        else:
+            with self.read_pool.connection() as conn:
+                cursor = conn.execute(sql, params)
+                while rows := cursor.fetchmany(chunk_size):
+                    yield from rows
+
+    # --- Personal record history ---
+
+    @property
+    def pr_index(self):
+        """Running maximum of each PR kind per exercise, loaded from pr_history on first use."""
+        if self._pr_index is None:
+            # Deleted exercises are left out: once purged, their ids can be reused
+            hidden = self._hide_deleted('exercise_id')
+            self._pr_index = PRIndex(self._fetchall(f'''
+                SELECT exercise_id, kind, MAX(value)
+                FROM pr_history
+                {'WHERE ' + hidden if hidden else ''}
+                GROUP BY exercise_id, kind
+            '''))
+        return self._pr_index
+
+    def _record_prs(self, logs):
+        """Append history rows for (log_id, date, exercise_id, sets, reps, weight) entries that set records.
+
+        Logs are checked in order against the in-memory index; the heaviest weight
+        lifted also raises the exercise's max_lift in pr_records.
+        """
+        history, max_lifts = [], {}
+        for log_id, date, exercise_id, sets, reps, weight in logs:
+            improved = self.pr_index.check(exercise_id, pr_values(sets, reps, weight))
+            history.extend((exercise_id, log_id, date, kind, value) for kind, value in improved.items())
+            if weight and weight > max_lifts.get(exercise_id, 0):
+                max_lifts[exercise_id] = weight
+        if history:
+            self.cursor.executemany('''
+                INSERT INTO pr_history (exercise_id, log_id, date, kind, value)
+                VALUES (?, ?, ?, ?, ?)
+            ''', history)
+        if max_lifts:
+            self.cursor.executemany('''
+                INSERT INTO pr_records (exercise_id, max_lift) VALUES (?, ?)
+                ON CONFLICT(exercise_id) DO UPDATE SET max_lift = MAX(max_lift, excluded.max_lift)
+            ''', max_lifts.items())
+            self._changed('pr_records', UPDATE, max_lifts)
+
+    def _forget_prs(self, log_id, exercise_id, weight):
+        """Remove the history rows set by a log that weighed ``weight`` for ``exercise_id``.
+
+        The running maxima are reloaded on next use. If the log held its exercise's
+        max_lift, the max_lift falls back to the heaviest remaining log, archived
+        ones included, and the record is dropped when no weighted log is left.
+        """
+        self.cursor.execute("DELETE FROM pr_history WHERE log_id = ? RETURNING exercise_id", (log_id,))
+        exercise_ids = {row[0] for row in self.cursor.fetchall()}
+        if exercise_ids:
+            self._forget_pr_index()
+        if weight and self._fetchone("SELECT 1 FROM pr_records WHERE exercise_id = ? AND max_lift <= ?",
+                                     (exercise_id, weight)):
+            heaviest = max((row[0] for row in self._fetchall_logs(
+                "SELECT MAX(weight) FROM workout_logs WHERE exercise_id = ?", (exercise_id,))
+                if row[0] is not None), default=None)
+            if heaviest is None:
+                self.cursor.execute("DELETE FROM pr_records WHERE exercise_id = ?", (exercise_id,))
+                self._changed('pr_records', DELETE, [exercise_id])
+                exercise_ids.discard(exercise_id)
+            else:
+                self.cursor.execute("UPDATE pr_records SET max_lift = ? WHERE exercise_id = ?", (heaviest, exercise_id))
+                exercise_ids.add(exercise_id)
+        if exercise_ids:
+            self._changed('pr_records', UPDATE, exercise_ids)
+
+    def _forget_pr_index(self):
+        """Reload the PR index on next use, now and again after the current transaction commits."""
+        self._pr_index = None
+        self._prs_stale = True
+
+    def get_best_prs(self, exercise_id):
+        """Return {kind: value} of an exercise's current records, served from memory."""
+        return self.pr_index.best(exercise_id)
+
+    def get_prs_for_log(self, log_id):
+        """Retrieve (kind, value) records set by a workout log."""
+        return self._fetchall("SELECT kind, value FROM pr_history WHERE log_id = ?", (log_id,))
+
+    def get_pr_history(self, exercise_id=None, kind=None):
+        """Retrieve (exercise_id, exercise, date, kind, value) PR history in date order."""
+        conditions, params = [], []
+        if exercise_id is not None:
+            conditions.append("pr_history.exercise_id = ?")
+            params.append(exercise_id)
+        if kind is not None:
+            conditions.append("pr_history.kind = ?")
+            params.append(kind)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._fetchall(f'''
+            SELECT pr_history.exercise_id, exercises.name, pr_history.date, pr_history.kind, pr_history.value
+            FROM pr_history
+            JOIN exercises ON pr_history.exercise_id = exercises.id AND exercises.deleted IS NULL
+            {where}
+            ORDER BY pr_history.date, pr_history.id
+        ''', params)
+
+    # --- Charts ---
 
     def get_pr_data(self):
         """Retrieve data for personal records chart."""
-        self.cursor.execute('''
+        return self._fetchall('''
             SELECT exercises.name, pr_records.max_lift
             FROM pr_records
-            JOIN exercises ON pr_records.exercise_id = exercises.id
+            JOIN exercises ON pr_records.exercise_id = exercises.id AND exercises.deleted IS NULL
         ''')
-        return self.cursor.fetchall()
 
     def get_calories_over_time(self):
         """Retrieve calories burned over time for charting."""
-        self.cursor.execute('''
-            SELECT date, SUM(calories) as total_calories
+        hidden = self._hide_deleted('exercise_id')
+        return self._fetchall(f'''
+            SELECT period_start AS date, SUM(calories) as total_calories
+            FROM workout_totals
+            WHERE period = 'day' {'AND ' + hidden if hidden else ''}
+            GROUP BY period_start
+            ORDER BY period_start ASC
+        ''')
+
+    # --- Summary tables ---
+
+    def get_totals(self, period='day', exercise_id=None, start=None, end=None):
+        """Retrieve (period_start, sessions, duration, calories) totals per day, week or month.
+
+        Totals cover every exercise unless exercise_id is given; start and end
+        bound the period start dates.
+        """
+        if period not in migrations.PERIOD_STARTS:
+            raise ValueError(f"Unknown period: {period!r}")
+        conditions, params = ["period = ?"], [period]
+        if exercise_id is not None:
+            conditions.append("exercise_id = ?")
+            params.append(exercise_id)
+        if hidden := self._hide_deleted('exercise_id'):
+            conditions.append(hidden)
+        if start is not None:
+            conditions.append("period_start >= ?")
+            params.append(normalize_date(start))
+        if end is not None:
+            conditions.append("period_start <= ?")
+            params.append(normalize_date(end))
+        return self._fetchall(f'''
+            SELECT period_start, SUM(sessions), SUM(duration), SUM(calories)
+            FROM workout_totals
+            WHERE {' AND '.join(conditions)}
+            GROUP BY period_start
+            ORDER BY period_start ASC
+        ''', params)
+
+    def get_exercise_totals(self, start=None, end=None):
+        """Retrieve (exercise, type, sessions, duration, calories) totals per exercise, busiest first.
+
+        start and end bound the workout dates.
+        """
+        conditions, params = ["workout_totals.period = 'day'"], []
+        if start is not None:
+            conditions.append("workout_totals.period_start >= ?")
+            params.append(normalize_date(start))
+        if end is not None:
+            conditions.append("workout_totals.period_start <= ?")
+            params.append(normalize_date(end))
+        return self._fetchall(f'''
+            SELECT exercises.name, exercises.type, SUM(workout_totals.sessions),
+                   SUM(workout_totals.duration), SUM(workout_totals.calories)
+            FROM workout_totals
+            JOIN exercises ON workout_totals.exercise_id = exercises.id AND exercises.deleted IS NULL
+            WHERE {' AND '.join(conditions)}
+            GROUP BY workout_totals.exercise_id
+            ORDER BY SUM(workout_totals.sessions) DESC, exercises.name
+        ''', params)
+
+    def _totals_from_logs_sql(self):
+        """SELECT recomputing every workout_totals row from workout_logs."""
+        return ' UNION ALL '.join(f'''
+            SELECT '{period}', {expression.format('date')} AS period_start, exercise_id,
+                   COUNT(*), TOTAL(duration), TOTAL(calories)
             FROM workout_logs
-            GROUP BY date
-            ORDER BY date ASC
+            WHERE period_start IS NOT NULL
+            GROUP BY period_start, exercise_id
+        ''' for period, expression in migrations.PERIOD_STARTS.items())
+
+    def rebuild_aggregates(self):
+        """Recompute the workout_totals summary table from scratch."""
+        with self.transaction():
+            self.cursor.execute("DELETE FROM workout_totals")
+            self.cursor.execute(f'''
+                INSERT INTO workout_totals (period, period_start, exercise_id, sessions, duration, calories)
+                {self._totals_from_logs_sql()}
+            ''')
+            self.cursor.executemany('''
+                INSERT INTO workout_totals (period, period_start, exercise_id, sessions, duration, calories)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (period, period_start, exercise_id) DO UPDATE SET
+                    sessions = sessions + excluded.sessions,
+                    duration = duration + excluded.duration,
+                    calories = calories + excluded.calories
+            ''', self._archived_totals())
+
+    def _archived_totals(self, totals=None):
+        """Add the workout_totals rows recomputed from each archive to ``totals`` rows; returns the sums."""
+        sums = {}
+        rows = list(totals or [])
+        for year in self.archives.years():
+            rows.extend(self.archives.fetchall(year, self._totals_from_logs_sql(), include_deleted=True))
+        for period, period_start, exercise_id, sessions, duration, calories in rows:
+            key = (period, period_start, exercise_id)
+            total = sums.get(key, (0, 0.0, 0.0))
+            sums[key] = (total[0] + sessions, total[1] + duration, total[2] + calories)
+        return [(*key, *total) for key, total in sums.items()]
+
+    def verify_aggregates(self, places=6):
+        """Return workout_totals rows that differ from a fresh recomputation (empty when consistent)."""
+        if self.archives.years():
+            def rounded(rows):
+                return {(*row[:4], round(row[4], places), round(row[5], places)) for row in rows}
+            stored = rounded(self._fetchall('''
+                SELECT period, period_start, exercise_id, sessions, duration, calories FROM workout_totals
+            '''))
+            recomputed = rounded(self._archived_totals(self._fetchall(self._totals_from_logs_sql())))
+            return ([('stored', *row) for row in stored - recomputed]
+                    + [('expected', *row) for row in recomputed - stored])
+        return self._fetchall(f'''
+            WITH expected(period, period_start, exercise_id, sessions, duration, calories) AS (
+                {self._totals_from_logs_sql()}
+            ),
+            stored AS (
+                SELECT period, period_start, exercise_id, sessions,
+                       ROUND(duration, {places}) AS duration, ROUND(calories, {places}) AS calories
+                FROM workout_totals
+            ),
+            recomputed AS (
+                SELECT period, period_start, exercise_id, sessions,
+                       ROUND(duration, {places}), ROUND(calories, {places})
+                FROM expected
+            )
+            SELECT 'stored', * FROM (SELECT * FROM stored EXCEPT SELECT * FROM recomputed)
+            UNION ALL
+            SELECT 'expected', * FROM (SELECT * FROM recomputed EXCEPT SELECT * FROM stored)
         ''')
-        return self.cursor.fetchall()
@@ -0,0 +1,36 @@
+# utils/downsample.py
+
+"""Reduce long (x, y) series to roughly one point per screen pixel for plotting.
+
+``minmax`` expects ``x`` sorted ascending and returns new arrays; series that
+are already short enough are returned unchanged.
+"""
+
+import numpy as np
+
+def minmax(x, y, buckets):
+    """Keep the minimum and maximum point of each of ``buckets`` equal-count buckets.
+
+    Fully vectorized and shape-preserving: peaks and troughs survive, so a line
+    drawn through the result looks the same as one drawn through every point.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if buckets <= 0 or len(x) <= 2 * buckets:
+        return x, y
+
+    edges = np.linspace(0, len(x), buckets + 1).astype(np.intp)[:-1]
+    lows = np.minimum.reduceat(y, edges)
+    highs = np.maximum.reduceat(y, edges)
+
+    # Position of each bucket's extremes, found by comparing against the broadcast bucket value
+    bucket_of = np.repeat(np.arange(buckets), np.diff(np.append(edges, len(x))))
+    is_low = y == lows[bucket_of]
+    is_high = y == highs[bucket_of]
+    first_low = np.full(buckets, len(x))
+    first_high = np.full(buckets, len(x))
+    np.minimum.at(first_low, bucket_of[is_low], np.flatnonzero(is_low))
+    np.minimum.at(first_high, bucket_of[is_high], np.flatnonzero(is_high))
+
+    keep = np.unique(np.concatenate([first_low, first_high]))
+    return x[keep], y[keep]
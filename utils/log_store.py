@@ -0,0 +1,299 @@
+# utils/log_store.py
+
+"""Compact in-memory copy of workout_logs for charts and statistics without SQL.
+
+Each log takes 16 bytes: its day as an int32 day number, its exercise id as an
+int32 and duration and calories as float32. Rows live in the slot ``id - base``,
+so looking one up needs no index. Deleted logs leave an empty slot (exercise id 0).
+"""
+
+import sys
+import threading
+from contextlib import nullcontext
+from itertools import islice
+
+import numpy as np
+
+from utils.changes import DELETE
+from utils.database import normalize_date
+
+LOAD_SQL = "SELECT id, date, exercise_id, duration, calories FROM workout_logs"
+BOUNDS_SQL = "SELECT MIN(id), MAX(id) FROM workout_logs"
+CHUNK_SIZE = 50_000         # Rows converted per fetchmany() while loading, bounding peak memory
+REFRESH_BATCH = 500         # Ids per query when refreshing changed logs
+EMPTY = 0                   # Exercise id marking an unused slot
+PERIODS = ('day', 'week', 'month')
+
+def iso_days(days):
+    """Convert int32 day numbers to ISO date strings."""
+    return np.asarray(days).astype('datetime64[D]').astype(str).tolist()
+
+class LogRow:
+    """Read-only view of one stored log; holds no values of its own."""
+
+    __slots__ = ('_store', '_slot')
+
+    def __init__(self, store, slot):
+        self._store = store
+        self._slot = slot
+
+    @property
+    def id(self):
+        return self._store.base + self._slot
+
+    @property
+    def date(self):
+        return str(np.datetime64(int(self._store.day[self._slot]), 'D'))
+
+    @property
+    def exercise_id(self):
+        return int(self._store.exercise[self._slot])
+
+    @property
+    def duration(self):
+        return _optional(self._store.duration[self._slot])
+
+    @property
+    def calories(self):
+        return _optional(self._store.calories[self._slot])
+
+    def __iter__(self):
+        return iter((self.id, self.date, self.exercise_id, self.duration, self.calories))
+
+    def __repr__(self):
+        return f"LogRow{tuple(self)}"
+
+def _optional(value):
+    return None if np.isnan(value) else float(value)
+
+class LogStore:
+    """Array-backed copy of every workout log, kept current from Database change events.
+
+    Load it through ``Database.log_store``. Writers update it on their thread after
+    each commit; readers on any thread see a consistent set of arrays because growth
+    replaces them instead of resizing in place.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.base = 1
+        self.size = 0           # Slots in use, live or empty
+        self.rows = 0           # Live logs
+        self.day = np.zeros(0, dtype=np.int32)
+        self.exercise = np.zeros(0, dtype=np.int32)
+        self.duration = np.zeros(0, dtype=np.float32)
+        self.calories = np.zeros(0, dtype=np.float32)
+        self._lock = threading.Lock()
+        self._apply_lock = threading.Lock()     # Serializes fetching and writing each batch of changes
+        self._pending = None                    # Change events held back while a load runs
+        # Subscribed before loading, so a write committed on another thread meanwhile is not missed
+        self._unsubscribe = db.changes.subscribe(self.apply_changes, ('workout_logs',))
+        try:
+            self.load()
+        except BaseException:
+            self._unsubscribe()
+            raise
+
+    def close(self):
+        self._unsubscribe()
+
+    # --- Loading and updating ---
+
+    def load(self):
+        """Read every workout log in chunks, one query in total plus one per archived year.
+
+        Changes published meanwhile are applied once it finishes, over what it read.
+        """
+        with self._apply_lock:
+            self._pending = []
+        try:
+            self._load()
+        except BaseException:
+            with self._apply_lock:
+                self._pending = None
+            raise
+        with self._apply_lock:
+            events, self._pending = self._pending, None
+            self._apply(events)
+
+    def _load(self):
+        # Deleted exercises' logs count too: restoring one brings them back into these slots
+        bounds = [self.db._fetchone(BOUNDS_SQL)]
+        bounds += [self.db.archives.fetchall(year, BOUNDS_SQL, include_deleted=True)[0]
+                   for year in self.db.archives.years()]
+        lows = [low for low, _ in bounds if low is not None]
+        highs = [high for _, high in bounds if high is not None]
+        with self._lock:
+            self.base = min(lows, default=1)
+            self.size = 0
+            self.rows = 0
+            self._reserve(max(highs, default=0) - self.base + 1)
+        for year in self.db.archives.years():
+            rows = self.db.archives.iterate(year, LOAD_SQL, chunk_size=CHUNK_SIZE)
+            while chunk := list(islice(rows, CHUNK_SIZE)):
+                self._write(chunk)
+        sql = self.db._visible_logs_sql(LOAD_SQL)
+        with self.db.read_connection() if self._off_owner_thread() else nullcontext(self.db.conn) as conn:
+            cursor = conn.execute(sql)
+            while True:
+                rows = cursor.fetchmany(CHUNK_SIZE)
+                if not rows:
+                    break
+                self._write(rows)
+
+    def _off_owner_thread(self):
+        return threading.get_ident() != self.db._owner_thread
+
+    def _reserve(self, slots):
+        """Make room for `slots` slots, growing by an eighth so appends stay amortized O(1)."""
+        capacity = len(self.day)
+        if slots <= capacity:
+            return
+        capacity = max(slots, capacity + capacity // 8, 1024)
+        for name in ('day', 'exercise', 'duration', 'calories'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _rebase(self, base):
+        """Move the rows up so ids down to `base` have slots."""
+        shift = self.base - base
+        capacity = len(self.day) + shift
+        for name in ('day', 'exercise', 'duration', 'calories'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[shift:shift + self.size] = old[:self.size]
+            setattr(self, name, new)
+        self.base = base
+        self.size += shift
+
+    def _write(self, rows):
+        """Store (id, date, exercise_id, duration, calories) rows in their slots."""
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        days = np.array([row[1] for row in rows], dtype='datetime64[D]').astype(np.int32)
+        values = np.array([row[2:] for row in rows], dtype=np.float64)  # None becomes NaN
+        with self._lock:
+            if int(ids.min()) < self.base:
+                self._rebase(int(ids.min()))
+            slots = ids - self.base
+            self._reserve(int(slots.max()) + 1)
+            self.size = max(self.size, int(slots.max()) + 1)
+            self.rows += int(np.count_nonzero(self.exercise[slots] == EMPTY))
+            self.day[slots] = days
+            self.exercise[slots] = values[:, 0]
+            self.duration[slots] = values[:, 1]
+            self.calories[slots] = values[:, 2]
+
+    def _clear(self, ids):
+        with self._lock:
+            slots = np.asarray(ids, dtype=np.int64) - self.base
+            slots = slots[(slots >= 0) & (slots < self.size)]
+            self.rows -= int(np.count_nonzero(self.exercise[slots] != EMPTY))
+            self.exercise[slots] = EMPTY
+
+    def apply_changes(self, events):
+        """Copy inserted and updated logs from the database and drop deleted ones."""
+        with self._apply_lock:
+            if self._pending is not None:
+                self._pending.extend(events)
+                return
+            self._apply(events)
+
+    def _apply(self, events):
+        latest = {}
+        for event in events:
+            latest[event.key] = event.op
+        deleted = [key for key, op in latest.items() if op == DELETE]
+        changed = [key for key, op in latest.items() if op != DELETE]
+        if deleted:
+            self._clear(deleted)
+        for start in range(0, len(changed), REFRESH_BATCH):
+            batch = changed[start:start + REFRESH_BATCH]
+            rows = self.db._fetchall_logs(f"{LOAD_SQL} WHERE id IN ({', '.join('?' * len(batch))})", batch)
+            if rows:
+                self._write(rows)
+
+    # --- Reads ---
+
+    def _snapshot(self, start=None, end=None, exercise_id=None):
+        """Return (slots, day, exercise, duration, calories) of live logs matching the filters."""
+        with self._lock:
+            size = self.size
+            day, exercise = self.day[:size], self.exercise[:size]
+            duration, calories = self.duration[:size], self.calories[:size]
+        mask = exercise != EMPTY
+        if exercise_id is not None:
+            mask &= exercise == exercise_id
+        if start is not None:
+            mask &= day >= _day_number(start)
+        if end is not None:
+            mask &= day <= _day_number(end)
+        slots = np.flatnonzero(mask)
+        return slots, day[slots], exercise[slots], duration[slots], calories[slots]
+
+    def row(self, log_id):
+        """Return a LogRow for a log id, or None."""
+        slot = log_id - self.base
+        if 0 <= slot < self.size and self.exercise[slot] != EMPTY:
+            return LogRow(self, slot)
+        return None
+
+    def rows_between(self, start=None, end=None, exercise_id=None, newest_first=False):
+        """Return LogRows dated within [start, end], ordered by date then id."""
+        slots, day, *_ = self._snapshot(start, end, exercise_id)
+        order = np.lexsort((slots, day))
+        if newest_first:
+            order = order[::-1]
+        return [LogRow(self, int(slot)) for slot in slots[order]]
+
+    def totals(self, period='day', exercise_id=None, start=None, end=None):
+        """Return (period_start, sessions, duration, calories) per period, like Database.get_totals."""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period!r}")
+        _, day, _, duration, calories = self._snapshot(exercise_id=exercise_id)
+        if period == 'week':
+            day = (day.astype(np.int64) + 3) // 7 * 7 - 3    # Monday; 1970-01-01 was a Thursday
+        elif period == 'month':
+            day = day.astype('datetime64[D]').astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+        if start is not None or end is not None:    # Bounds apply to period starts, as in workout_totals
+            keep = np.ones(len(day), dtype=bool)
+            if start is not None:
+                keep &= day >= _day_number(start)
+            if end is not None:
+                keep &= day <= _day_number(end)
+            day, duration, calories = day[keep], duration[keep], calories[keep]
+        periods, group = np.unique(day, return_inverse=True)
+        sessions = np.bincount(group, minlength=len(periods))
+        durations = np.bincount(group, np.nan_to_num(duration).astype(np.float64), minlength=len(periods))
+        calorie_sums = np.bincount(group, np.nan_to_num(calories).astype(np.float64), minlength=len(periods))
+        return list(zip(iso_days(periods), sessions.tolist(), durations.tolist(), calorie_sums.tolist()))
+
+    def exercise_totals(self, start=None, end=None):
+        """Return {exercise_id: (sessions, duration, calories)} for logs within [start, end]."""
+        _, _, exercise, duration, calories = self._snapshot(start, end)
+        ids, group = np.unique(exercise, return_inverse=True)
+        sessions = np.bincount(group, minlength=len(ids))
+        durations = np.bincount(group, np.nan_to_num(duration).astype(np.float64), minlength=len(ids))
+        calorie_sums = np.bincount(group, np.nan_to_num(calories).astype(np.float64), minlength=len(ids))
+        return {int(exercise_id): (int(count), float(total_duration), float(total_calories))
+                for exercise_id, count, total_duration, total_calories
+                in zip(ids, sessions, durations, calorie_sums)}
+
+    def memory_usage(self):
+        """Report the store's footprint, with the size of the same logs as fetchall() tuples for scale."""
+        with self._lock:
+            arrays = (self.day, self.exercise, self.duration, self.calories)
+            allocated = sum(array.nbytes for array in arrays)
+            rows = self.rows
+        sample = self.db._fetchone(f"{LOAD_SQL} LIMIT 1")
+        tuple_bytes = sys.getsizeof(sample) + sum(sys.getsizeof(value) for value in sample) if sample else 0
+        return {
+            'rows': rows,
+            'bytes': allocated,
+            'bytes_per_row': allocated / rows if rows else 0.0,
+            'tuple_bytes_per_row': tuple_bytes,
+        }
+
+def _day_number(value):
+    return int(np.datetime64(normalize_date(value), 'D').astype(np.int64))
@@ -0,0 +1,414 @@
+# utils/migrations.py
+
+"""Versioned schema migrations, tracked with ``PRAGMA user_version``.
+
+Each migration is a function taking the ``Database``; ``MIGRATIONS[n]`` upgrades a
+database from version ``n`` to ``n + 1``. Append new migrations to the end of the
+list and never edit one that has shipped.
+"""
+
+import argparse
+import sys
+
+from utils import sync
+
+def _iso_dates(db):
+    """Normalize stored workout dates to ISO-8601 and index them."""
+    db.migrate_dates()
+    db.cursor.execute("CREATE INDEX IF NOT EXISTS idx_workout_logs_date ON workout_logs(date)")
+
+def _covering_indexes(db):
+    """Index the join, aggregate and cascade paths and make PRs unique per exercise."""
+    db.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_workout_logs_exercise_date
+        ON workout_logs(exercise_id, date)
+    ''')
+    db.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_workout_logs_date_calories
+        ON workout_logs(date, calories)
+    ''')
+    # Keep the most recent PR per exercise before enforcing uniqueness
+    db.cursor.execute('''
+        DELETE FROM pr_records
+        WHERE id NOT IN (SELECT MAX(id) FROM pr_records GROUP BY exercise_id)
+    ''')
+    db.cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_pr_records_exercise
+        ON pr_records(exercise_id)
+    ''')
+
+# SQL expressions giving the first day of each summary period for a date column
+PERIOD_STARTS = {
+    'day': "date({0})",
+    'week': "date({0}, 'weekday 0', '-6 days')",   # Weeks start on Monday
+    'month': "date({0}, 'start of month')",
+}
+
+def _period_rows(row):
+    """SELECT yielding (period, period_start) for every summary period of a trigger row."""
+    return ' UNION ALL '.join(
+        f"SELECT '{period}' AS period, {expression.format(row + '.date')} AS period_start"
+        for period, expression in PERIOD_STARTS.items()
+    )
+
+def _add_totals_sql(row):
+    return f'''
+        INSERT INTO workout_totals (period, period_start, exercise_id, sessions, duration, calories)
+        SELECT period, period_start, {row}.exercise_id, 1, COALESCE({row}.duration, 0), COALESCE({row}.calories, 0)
+        FROM ({_period_rows(row)})
+        WHERE period_start IS NOT NULL
+        ON CONFLICT (period, period_start, exercise_id) DO UPDATE SET
+            sessions = sessions + excluded.sessions,
+            duration = duration + excluded.duration,
+            calories = calories + excluded.calories;
+    '''
+
+def _remove_totals_sql(row):
+    keys = ' OR '.join(
+        f"(period = '{period}' AND period_start = {expression.format(row + '.date')})"
+        for period, expression in PERIOD_STARTS.items()
+    )
+    return f'''
+        UPDATE workout_totals SET
+            sessions = sessions - 1,
+            duration = duration - COALESCE({row}.duration, 0),
+            calories = calories - COALESCE({row}.calories, 0)
+        WHERE exercise_id = {row}.exercise_id AND ({keys});
+        DELETE FROM workout_totals
+        WHERE exercise_id = {row}.exercise_id AND sessions <= 0 AND ({keys});
+    '''
+
+def _summary_tables(db):
+    """Add daily, weekly and monthly totals per exercise, kept current by triggers."""
+    db.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS workout_totals (
+            period TEXT NOT NULL,
+            period_start TEXT NOT NULL,
+            exercise_id INTEGER NOT NULL,
+            sessions INTEGER NOT NULL,
+            duration REAL NOT NULL,
+            calories REAL NOT NULL,
+            PRIMARY KEY (period, period_start, exercise_id)
+        ) WITHOUT ROWID
+    ''')
+    db.cursor.executescript(f'''
+        CREATE TRIGGER IF NOT EXISTS workout_totals_after_insert
+        AFTER INSERT ON workout_logs
+        BEGIN
+            {_add_totals_sql('NEW')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS workout_totals_after_delete
+        AFTER DELETE ON workout_logs
+        BEGIN
+            {_remove_totals_sql('OLD')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS workout_totals_after_update
+        AFTER UPDATE OF date, exercise_id, duration, calories ON workout_logs
+        BEGIN
+            {_remove_totals_sql('OLD')}
+            {_add_totals_sql('NEW')}
+        END;
+    ''')
+    db.rebuild_aggregates()
+
+def _pr_history(db):
+    """Record sets, reps and weight on workouts and keep an append-only PR history."""
+    for column, type_ in (('sets', 'INTEGER'), ('reps', 'INTEGER'), ('weight', 'REAL')):
+        db.cursor.execute(f"ALTER TABLE workout_logs ADD COLUMN {column} {type_}")
+    # log_id deliberately has no foreign key: history outlives archived logs
+    db.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pr_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            exercise_id INTEGER NOT NULL,
+            log_id INTEGER,
+            date TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            value REAL NOT NULL,
+            FOREIGN KEY(exercise_id) REFERENCES exercises(id) ON DELETE CASCADE
+        )
+    ''')
+    db.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pr_history_exercise_kind
+        ON pr_history(exercise_id, kind, value)
+    ''')
+    db.cursor.execute("CREATE INDEX IF NOT EXISTS idx_pr_history_exercise_date ON pr_history(exercise_id, date)")
+    db.cursor.execute("CREATE INDEX IF NOT EXISTS idx_pr_history_log ON pr_history(log_id)")
+
+def _search(db):
+    """Add workout notes, full-text indexes over exercise names and notes, and a type index."""
+    db.cursor.execute("ALTER TABLE workout_logs ADD COLUMN notes TEXT")
+    db.cursor.execute("CREATE INDEX IF NOT EXISTS idx_exercises_type ON exercises(type)")
+    # External-content FTS5 tables: the text lives in the base tables, triggers keep the index current.
+    # Exercise names are indexed once per exercise, so a rename reindexes one row, not every log.
+    db.cursor.executescript('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS exercises_fts USING fts5(
+            name, content='exercises', content_rowid='id', prefix='1 2 3'
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS workout_notes_fts USING fts5(
+            notes, content='workout_logs', content_rowid='id', prefix='1 2 3'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS exercises_fts_after_insert AFTER INSERT ON exercises
+        BEGIN
+            INSERT INTO exercises_fts (rowid, name) VALUES (NEW.id, NEW.name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS exercises_fts_after_delete AFTER DELETE ON exercises
+        BEGIN
+            INSERT INTO exercises_fts (exercises_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+        END;
+        CREATE TRIGGER IF NOT EXISTS exercises_fts_after_update AFTER UPDATE OF name ON exercises
+        BEGIN
+            INSERT INTO exercises_fts (exercises_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+            INSERT INTO exercises_fts (rowid, name) VALUES (NEW.id, NEW.name);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS workout_notes_fts_after_insert AFTER INSERT ON workout_logs
+        BEGIN
+            INSERT INTO workout_notes_fts (rowid, notes) VALUES (NEW.id, NEW.notes);
+        END;
+        CREATE TRIGGER IF NOT EXISTS workout_notes_fts_after_delete AFTER DELETE ON workout_logs
+        BEGIN
+            INSERT INTO workout_notes_fts (workout_notes_fts, rowid, notes) VALUES ('delete', OLD.id, OLD.notes);
+        END;
+        CREATE TRIGGER IF NOT EXISTS workout_notes_fts_after_update AFTER UPDATE OF notes ON workout_logs
+        BEGIN
+            INSERT INTO workout_notes_fts (workout_notes_fts, rowid, notes) VALUES ('delete', OLD.id, OLD.notes);
+            INSERT INTO workout_notes_fts (rowid, notes) VALUES (NEW.id, NEW.notes);
+        END;
+    ''')
+    db.cursor.execute("INSERT INTO exercises_fts (exercises_fts) VALUES ('rebuild')")
+    db.cursor.execute("INSERT INTO workout_notes_fts (workout_notes_fts) VALUES ('rebuild')")
+
+# Time-ordered like a version 7 UUID: milliseconds since the epoch, then 80 random bits. New rows
+# land at the end of the uuid indexes instead of at random pages, which keeps bulk inserts fast.
+NEW_UUID = "printf('%012x', CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)) || lower(hex(randomblob(10)))"
+
+def _log_changes_sql(entity, table, row, op):
+    """Trigger statement appending a change-log entry; its hlc is filled in when the write commits."""
+    if table == 'pr_records':
+        # Keyed by the exercise's uuid; skipped when the exercise itself was deleted
+        return f'''
+            INSERT INTO change_log (entity, uuid, op)
+            SELECT '{entity}', uuid, '{op}' FROM exercises WHERE id = {row}.exercise_id;
+        '''
+    if table == 'workout_logs' and op == 'delete':
+        # Logs removed by an exercise's cascade are covered by the exercise's tombstone
+        return f'''
+            INSERT INTO change_log (entity, uuid, op)
+            SELECT '{entity}', {row}.uuid, '{op}' WHERE EXISTS (SELECT 1 FROM exercises WHERE id = {row}.exercise_id);
+        '''
+    return f"INSERT INTO change_log (entity, uuid, op) VALUES ('{entity}', {row}.uuid, '{op}');"
+
+# entity -> (table, columns whose updates are synced)
+SYNCED_TABLES = {
+    'exercise': ('exercises', 'name, type'),
+    'pr': ('pr_records', 'max_lift'),
+    'workout_log': ('workout_logs', 'date, exercise_id, duration, calories, sets, reps, weight, notes'),
+}
+
+def _change_log(db):
+    """Give exercises and logs uuids and record every write in an append-only change log for sync."""
+    for table in ('exercises', 'workout_logs'):
+        db.cursor.execute(f"ALTER TABLE {table} ADD COLUMN uuid TEXT")
+        db.cursor.execute(f"UPDATE {table} SET uuid = {NEW_UUID}")
+        db.cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_uuid ON {table}(uuid)")
+    # hlc is a hybrid logical clock (utils.sync.HybridClock), device the id of the device that made the change
+    db.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            uuid TEXT NOT NULL,
+            op TEXT NOT NULL,
+            hlc INTEGER,
+            device TEXT
+        )
+    ''')
+    db.cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_entity_uuid ON change_log(entity, uuid)")
+    db.cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_unstamped ON change_log(seq) WHERE hlc IS NULL")
+    db.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_peers (
+            device TEXT PRIMARY KEY,
+            received INTEGER NOT NULL DEFAULT 0,
+            acked INTEGER,              -- Our latest seq the device has received; NULL until it says
+            synced TEXT
+        )
+    ''')
+    db.cursor.execute("CREATE TABLE IF NOT EXISTS sync_meta (key TEXT PRIMARY KEY, value TEXT)")
+    db.cursor.execute(f"INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('device', {NEW_UUID})")
+    for entity, (table, columns) in SYNCED_TABLES.items():
+        db.cursor.executescript(f'''
+            CREATE TRIGGER IF NOT EXISTS change_log_{table}_insert AFTER INSERT ON {table}
+            BEGIN
+                {_log_changes_sql(entity, table, 'NEW', 'put')}
+            END;
+            CREATE TRIGGER IF NOT EXISTS change_log_{table}_update AFTER UPDATE OF {columns} ON {table}
+            BEGIN
+                {_log_changes_sql(entity, table, 'NEW', 'put')}
+            END;
+            CREATE TRIGGER IF NOT EXISTS change_log_{table}_delete AFTER DELETE ON {table}
+            BEGIN
+                {_log_changes_sql(entity, table, 'OLD', 'delete')}
+            END;
+        ''')
+
+def _tombstone_log_changes_sql(entity, table, row, op):
+    """Like _log_changes_sql, skipping entries for the rows of deleted exercises."""
+    if table == 'pr_records':
+        # Keyed by the exercise's uuid; skipped when the exercise itself was deleted
+        return f'''
+            INSERT INTO change_log (entity, uuid, op)
+            SELECT '{entity}', uuid, '{op}' FROM exercises WHERE id = {row}.exercise_id AND deleted IS NULL;
+        '''
+    if table == 'workout_logs' and op == 'delete':
+        # Logs removed by an exercise's cascade or purge are covered by the exercise's tombstone
+        return f'''
+            INSERT INTO change_log (entity, uuid, op)
+            SELECT '{entity}', {row}.uuid, '{op}'
+            WHERE EXISTS (SELECT 1 FROM exercises WHERE id = {row}.exercise_id AND deleted IS NULL);
+        '''
+    return _log_changes_sql(entity, table, row, op)
+
+def _exercise_tombstones(db):
+    """Mark deleted exercises instead of deleting them, so their rows can be purged in batches later."""
+    db.cursor.execute("ALTER TABLE exercises ADD COLUMN deleted TEXT")     # UTC ISO 8601, NULL while live
+    db.cursor.execute("CREATE INDEX IF NOT EXISTS idx_exercises_deleted ON exercises(deleted) WHERE deleted IS NOT NULL")
+    # The change log skips rows of deleted exercises, as it skipped rows removed by the cascade
+    for entity in ('pr', 'workout_log'):
+        table, columns = SYNCED_TABLES[entity]
+        db.cursor.executescript(f'''
+            DROP TRIGGER IF EXISTS change_log_{table}_insert;
+            DROP TRIGGER IF EXISTS change_log_{table}_update;
+            DROP TRIGGER IF EXISTS change_log_{table}_delete;
+            CREATE TRIGGER change_log_{table}_insert AFTER INSERT ON {table}
+            BEGIN
+                {_tombstone_log_changes_sql(entity, table, 'NEW', 'put')}
+            END;
+            CREATE TRIGGER change_log_{table}_update AFTER UPDATE OF {columns} ON {table}
+            BEGIN
+                {_tombstone_log_changes_sql(entity, table, 'NEW', 'put')}
+            END;
+            CREATE TRIGGER change_log_{table}_delete AFTER DELETE ON {table}
+            BEGIN
+                {_tombstone_log_changes_sql(entity, table, 'OLD', 'delete')}
+            END;
+        ''')
+
+MIGRATIONS = [
+    _iso_dates,
+    _covering_indexes,
+    _summary_tables,
+    _pr_history,
+    _search,
+    _change_log,
+    _exercise_tombstones,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_version(db):
+    """Return the schema version stored in the database file."""
+    db.cursor.execute("PRAGMA user_version")
+    return db.cursor.fetchone()[0]
+
+def migrate(db):
+    """Apply every pending migration, committing and bumping the version after each one."""
+    version = get_version(db)
+    for number in range(version, SCHEMA_VERSION):
+        MIGRATIONS[number](db)
+        db.cursor.execute(f"PRAGMA user_version = {number + 1}")
+        db.conn.commit()
+    return SCHEMA_VERSION
+
+# --- Query plan checks ---
+
+# Statements on the hot paths and the tables they must never read with a plain scan.
+# The cascade lookups mirror what SQLite runs for ON DELETE CASCADE on exercises.
+CHECKED_QUERIES = [
+    ('get_workout_logs_page', lambda db: db.get_workout_logs_page(('9999-12-31', 0), 1)),
+    ('get_workout_logs_between', lambda db: db.get_workout_logs_between('2000-01-01', '2000-01-31')),
+    ('get_all_workout_logs', lambda db: db.get_all_workout_logs()),
+    ('get_calories_over_time', lambda db: db.get_calories_over_time()),
+    ('get_totals', lambda db: db.get_totals('week', exercise_id=0, start='2000-01-01', end='2000-12-31')),
+    ('add_or_update_pr lookup', lambda db: db.get_pr(0)),
+    ('get_pr_history', lambda db: db.get_pr_history(exercise_id=0)),
+    ('pr_history cascade', lambda db: db.cursor.execute(
+        "SELECT id FROM pr_history WHERE exercise_id = ?", (0,)).fetchall()),
+    ('workout_logs cascade', lambda db: db.cursor.execute(
+        "SELECT id FROM workout_logs WHERE exercise_id = ?", (0,)).fetchall()),
+    ('pr_records cascade', lambda db: db.cursor.execute(
+        "SELECT id FROM pr_records WHERE exercise_id = ?", (0,)).fetchall()),
+    ('query_workout_logs by exercise', lambda db: db.query_workout_logs(
+        exercise_id=0, start='2000-01-01', after=('9999-12-31', 0), limit=1)),
+    ('sync versions', lambda db: sync.versions(db, 'workout_log', ['0'])),
+    ('sync changes since', lambda db: list(sync.changes_since(db, 2 ** 62))),
+]
+
+def explain(db, sql):
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement."""
+    db.cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+    return [row[3] for row in db.cursor.fetchall()]
+
+def find_plan_regressions(db, checks=CHECKED_QUERIES):
+    """Run each check with statement tracing and return plans that scan or sort a whole table.
+
+    Returns a list of (label, sql, detail) tuples; an empty list means every
+    statement is answered from an index.
+    """
+    statements = []
+    problems = []
+    for label, run in checks:
+        statements.clear()
+        db.conn.set_trace_callback(statements.append)
+        try:
+            run(db)
+        finally:
+            # Hand tracing back to the profiler, if one instruments this connection
+            profiler = getattr(db.conn, 'profiler', None)
+            db.conn.set_trace_callback(profiler.on_trace if profiler else None)
+
+        for sql in list(statements):
+            if sql.startswith('--') or "'main'." in sql:
+                continue    # Statements run inside another one, or by FTS5 on its own tables
+            for detail in explain(db, sql):
+                full_scan = detail.startswith('SCAN ') and ' USING ' not in detail
+                if full_scan or 'USE TEMP B-TREE' in detail:
+                    problems.append((label, sql.strip(), detail))
+    return problems
+
+def main(argv=None):
+    """Migrate a database file and fail if any checked query regresses to a scan."""
+    from utils.database import Database
+
+    parser = argparse.ArgumentParser(prog='python -m utils.migrations', description=main.__doc__)
+    parser.add_argument('database', help="database file to migrate and check")
+    parser.add_argument('--rebuild-aggregates', action='store_true',
+                        help="recompute the workout_totals summary table from workout_logs")
+    parser.add_argument('--verify-aggregates', action='store_true',
+                        help="fail if workout_totals disagrees with workout_logs")
+    args = parser.parse_args(argv)
+
+    db = Database(args.database)
+    try:
+        print(f"Schema version: {get_version(db)}")
+        status = 0
+        if args.rebuild_aggregates:
+            db.rebuild_aggregates()
+            print("Rebuilt workout_totals")
+        if args.verify_aggregates:
+            mismatches = db.verify_aggregates()
+            for row in mismatches:
+                print(f"workout_totals mismatch: {row}")
+            print(f"workout_totals: {len(mismatches)} mismatched rows")
+            status = 1 if mismatches else status
+
+        problems = find_plan_regressions(db)
+        for label, sql, detail in problems:
+            print(f"{label}: {detail}\n    {sql}")
+        return 1 if problems else status
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,340 @@
+# utils/profiling.py
+
+"""Opt-in instrumentation: SQLite statement latency, row counts and query plans, plus timed spans.
+
+Nothing is recorded until ``enable()`` is called (``Database(profile=True)`` does
+so). While disabled, ``traced`` methods cost one extra function call and
+connections are plain ``sqlite3`` connections.
+"""
+
+import bisect
+import functools
+import json
+import sqlite3
+import threading
+import time
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PLANNED = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')  # Statements worth an EXPLAIN
+
+_active = None
+
+def enable():
+    """Start profiling, returning the process-wide Profiler."""
+    global _active
+    if _active is None:
+        _active = Profiler()
+    return _active
+
+def disable():
+    """Stop recording; connections opened while profiling stay instrumented but record nothing."""
+    global _active
+    _active = None
+
+def active():
+    """Return the Profiler if profiling is enabled, else None."""
+    return _active
+
+class Histogram:
+    """Cumulative latency histogram over BUCKETS, with count, sum and max."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket that reaches it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum_ms': self.sum * 1000,
+            'mean_ms': self.sum * 1000 / self.count if self.count else 0.0,
+            'p50_ms': self.quantile(0.5) * 1000,
+            'p95_ms': self.quantile(0.95) * 1000,
+            'max_ms': self.max * 1000,
+            'buckets': dict(zip([*map(str, BUCKETS), '+Inf'], self.counts)),
+        }
+
+class StatementStats:
+    """Latency, rows and plan of one SQL statement text."""
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.latency = Histogram()
+        self.rows = 0       # Rows fetched, or changed by writes
+        self.nested = 0     # Statements SQLite ran on its behalf (triggers, FTS5 shadow tables)
+        self.plan = None
+
+    def to_dict(self):
+        return {'sql': self.sql, 'rows': self.rows, 'nested': self.nested, 'plan': self.plan,
+                **self.latency.to_dict()}
+
+class Profiler:
+    """Thread-safe store of statement statistics and named spans."""
+
+    def __init__(self):
+        self.statements = {}    # normalized SQL -> StatementStats
+        self.spans = {}         # name -> Histogram
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def statement(self, sql):
+        """Return the stats for a statement, creating them on first sight."""
+        key = ' '.join(sql.split())
+        stats = self.statements.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self.statements.setdefault(key, StatementStats(key))
+        return stats
+
+    def record(self, stats, seconds, rows):
+        with self._lock:
+            stats.latency.observe(seconds)
+            stats.rows += rows
+
+    def observe_span(self, name, seconds):
+        with self._lock:
+            histogram = self.spans.get(name)
+            if histogram is None:
+                histogram = self.spans[name] = Histogram()
+            histogram.observe(seconds)
+
+    def span(self, name):
+        """Context manager timing a block as the span ``name``."""
+        return _Span(self, name)
+
+    def on_trace(self, sql):
+        """sqlite3 trace callback: count statements run inside the current one."""
+        current = getattr(self._local, 'current', None)
+        if current is not None and sql.startswith('--'):
+            current.nested += 1
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.spans.clear()
+            self.started = time.time()
+
+    # --- Dumps ---
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'started': self.started,
+                'statements': sorted((stats.to_dict() for stats in self.statements.values()),
+                                     key=lambda stats: stats['sum_ms'], reverse=True),
+                'spans': {name: histogram.to_dict() for name, histogram in sorted(self.spans.items())},
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        """Render every histogram in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            _prometheus_histograms(lines, 'workout_tracker_sql_seconds', "SQLite statement latency",
+                                   'statement', [(stats.sql, stats.latency) for stats in self.statements.values()])
+            lines.append("# HELP workout_tracker_sql_rows_total Rows fetched or changed per statement")
+            lines.append("# TYPE workout_tracker_sql_rows_total counter")
+            for stats in self.statements.values():
+                lines.append(f'workout_tracker_sql_rows_total{{statement="{_label(stats.sql)}"}} {stats.rows}')
+            _prometheus_histograms(lines, 'workout_tracker_span_seconds', "Duration of instrumented GUI calls",
+                                   'span', sorted(self.spans.items()))
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """Write a Prometheus text dump if path ends in .prom or .txt, JSON otherwise."""
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w') as file:
+            file.write(text)
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _prometheus_histograms(lines, metric, help_text, label, histograms):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} histogram")
+    for name, histogram in histograms:
+        name = _label(name)
+        cumulative = 0
+        for bound, count in zip([*map(str, BUCKETS), '+Inf'], histogram.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{label}="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{{label}="{name}"}} {histogram.sum}')
+        lines.append(f'{metric}_count{{{label}="{name}"}} {histogram.count}')
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'started')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.observe_span(self.name, time.perf_counter() - self.started)
+
+def traced(method):
+    """Record each call of ``method`` as a span named after it while profiling is enabled."""
+    name = method.__qualname__
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        profiler = _active
+        if profiler is None:
+            return method(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            profiler.observe_span(name, time.perf_counter() - started)
+    return wrapper
+
+# --- Instrumented connections ---
+
+def connect(profiler, *args, **kwargs):
+    """sqlite3.connect returning a connection whose statements are recorded in ``profiler``."""
+    conn = sqlite3.connect(*args, factory=ProfiledConnection, **kwargs)
+    conn.profiler = profiler
+    conn.set_trace_callback(profiler.on_trace)
+    return conn
+
+def explain(conn, sql, params=()):
+    """Return a statement's EXPLAIN QUERY PLAN as indented lines."""
+    rows = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node] + detail)
+    return lines
+
+class ProfiledConnection(sqlite3.Connection):
+    profiler = None
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or ProfiledCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Times each statement from execute() through the fetch that finishes it.
+
+    A statement is finished by fetchall(), by fetchone(), by a short fetchmany()
+    or exhausted iteration, by the next execute(), or at once if it returns no rows.
+    """
+
+    _pending = None     # [stats, seconds, rows] of the statement being fetched
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, explain_params=parameters)
+
+    def executemany(self, sql, parameters):
+        return self._run(super().executemany, sql, parameters)
+
+    def _run(self, method, sql, parameters, explain_params=None):
+        self._finish()
+        profiler = self.connection.profiler
+        if _active is not profiler:
+            return method(sql, parameters)
+        stats = profiler.statement(sql)
+        if stats.plan is None:
+            stats.plan = ''
+            if explain_params is not None and sql.lstrip()[:7].upper().startswith(PLANNED):
+                try:
+                    stats.plan = '\n'.join(explain(self.connection, sql, explain_params))
+                except sqlite3.Error as error:
+                    stats.plan = f"(no plan: {error})"
+        local = profiler._local
+        local.current = stats
+        started = time.perf_counter()
+        try:
+            method(sql, parameters)
+        finally:
+            local.current = None
+        elapsed = time.perf_counter() - started
+        if self.description is None:
+            profiler.record(stats, elapsed, max(self.rowcount, 0))
+        else:
+            self._pending = [stats, elapsed, 0]
+        return self
+
+    def _fetch(self, method, *args):
+        pending = self._pending
+        if pending is None:
+            return method(*args)
+        started = time.perf_counter()
+        result = method(*args)
+        pending[1] += time.perf_counter() - started
+        return result
+
+    def _finish(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            self.connection.profiler.record(*pending)
+
+    def fetchall(self):
+        rows = self._fetch(super().fetchall)
+        if self._pending:
+            self._pending[2] += len(rows)
+            self._finish()
+        return rows
+
+    def fetchone(self):
+        row = self._fetch(super().fetchone)
+        if self._pending:
+            self._pending[2] += row is not None
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._fetch(super().fetchmany, size or self.arraysize)
+        if self._pending:
+            self._pending[2] += len(rows)
+            if len(rows) < (size or self.arraysize):
+                self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._fetch(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._pending:
+            self._pending[2] += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
@@ -0,0 +1,136 @@
+# utils/purge.py
+
+"""Background removal of deleted exercises' logs and records.
+
+``Database.delete_exercise`` only marks an exercise deleted, which hides it and
+everything that refers to it in one quick write. Once ``UNDO_WINDOW`` has passed,
+a ``Purger`` deletes those rows on its own thread and connection, one bounded
+transaction at a time, so a writer sharing the file waits at most one batch.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from utils.database import PURGE_BATCH, UNDO_WINDOW, Database
+
+BATCH_PAUSE = 0.01          # Seconds between batches, leaving the file to other writers and the GIL to the UI
+
+class PurgeProgress(NamedTuple):
+    exercise: str
+    removed: int            # Rows removed so far
+    total: int              # Rows the exercise had when its purge began
+
+    def __str__(self):
+        return f"Removing {self.exercise}: {self.removed:,} of {self.total:,} rows"
+
+class Purger:
+    """Purges the deleted exercises of one database file.
+
+    ``run`` blocks; ``start`` runs it on a daemon thread, which waits for each
+    exercise's undo window to pass. Only one purge runs at a time; exercises
+    deleted while it runs are picked up before it finishes.
+    """
+
+    def __init__(self, db_path, batch_size=PURGE_BATCH, pause=BATCH_PAUSE):
+        if db_path == ':memory:':
+            raise ValueError("A background purge needs a database file; call Database.purge_exercise instead")
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.pause = pause
+        self.progress = None        # The latest PurgeProgress, for polling from other threads
+        self._lock = threading.Lock()
+        self._thread = None
+        self._again = False
+        self._stop = threading.Event()
+
+    def start(self, progress=None, done=None, error=None):
+        """Run run() on a daemon thread unless one is running; done(removed) or error(exception) is called from it."""
+        with self._lock:
+            self._again = True
+            if self._thread is not None:
+                return self._thread
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, args=(progress, done, error), name='purge',
+                                            daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def running(self):
+        return self._thread is not None
+
+    def stop(self):
+        """Stop after the current batch; the rest is purged by the next run."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _loop(self, progress, done, error):
+        removed = 0
+        try:
+            while True:
+                with self._lock:
+                    if not self._again or self._stop.is_set():
+                        self._thread = None
+                        break
+                    self._again = False
+                removed += self.run(progress)
+        except Exception as exception:
+            if error is not None:
+                error(exception)    # Before running() turns False, so a poller sees it
+            with self._lock:
+                self._thread = None
+            if error is None:
+                raise
+        else:
+            if done:
+                done(removed)
+
+    def run(self, progress=None, wait=True):
+        """Purge every deleted exercise and return the number of rows removed.
+
+        With ``wait`` it sleeps until the undo window of each exercise has passed;
+        without, it skips those still inside it. ``progress(PurgeProgress)`` is
+        called after each batch.
+        """
+        db = Database(self.db_path)
+        try:
+            removed = 0
+            skipped = set()
+            while not self._stop.is_set():
+                pending = [row for row in db.deleted_exercises() if row[0] not in skipped]
+                if not pending:
+                    break
+                exercise_id, name, deleted = pending[0]
+                due = datetime.fromisoformat(deleted) + UNDO_WINDOW
+                remaining = (due - datetime.now(timezone.utc)).total_seconds()
+                if remaining > 0:
+                    if not wait:
+                        skipped.add(exercise_id)
+                    else:
+                        self._stop.wait(remaining + 1)  # Then look again, in case it was restored
+                    continue
+                removed += self._purge(db, exercise_id, name, progress)
+            return removed
+        finally:
+            db.close()
+
+    def _purge(self, db, exercise_id, name, progress):
+        total = db._fetchone('''
+            SELECT (SELECT COUNT(*) FROM workout_logs WHERE exercise_id = ?)
+                 + (SELECT COUNT(*) FROM pr_history WHERE exercise_id = ?)
+        ''', (exercise_id, exercise_id))[0]
+        removed = 0
+        self.progress = PurgeProgress(name, 0, total)
+        while not self._stop.is_set():
+            count = db.purge_exercise(exercise_id, self.batch_size)
+            if not count:
+                break
+            removed += count
+            self.progress = PurgeProgress(name, removed, total)
+            if progress:
+                progress(self.progress)
+            time.sleep(self.pause)
+        return removed
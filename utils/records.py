@@ -0,0 +1,53 @@
+# utils/records.py
+
+"""Personal-record detection for weighted workouts."""
+
+import threading
+
+# PR kinds, in display order: kind -> label
+PR_KINDS = {
+    '1rm': '1RM',
+    'e1rm': 'Estimated 1RM',
+    'volume': 'Volume',
+}
+
+def pr_values(sets, reps, weight):
+    """Return {kind: value} for every PR kind a workout entry qualifies for."""
+    if not weight or not reps or weight <= 0 or reps <= 0:
+        return {}
+    values = {
+        'e1rm': weight if reps == 1 else weight * (1 + reps / 30),   # Epley formula
+        'volume': (sets or 1) * reps * weight,
+    }
+    if reps == 1:
+        values['1rm'] = weight
+    return values
+
+class PRIndex:
+    """In-memory running maximum of each PR kind per exercise.
+
+    Lets new records be detected at insert time with a dictionary lookup instead
+    of a scan over the exercise's history.
+    """
+
+    def __init__(self, rows=()):
+        self._best = {}
+        self._lock = threading.Lock()
+        for exercise_id, kind, value in rows:
+            self._best.setdefault(exercise_id, {})[kind] = value
+
+    def best(self, exercise_id):
+        """Return a copy of {kind: value} for an exercise's current records."""
+        with self._lock:
+            return dict(self._best.get(exercise_id, {}))
+
+    def check(self, exercise_id, values):
+        """Record any values that beat the running maximum and return them as {kind: value}."""
+        improved = {}
+        with self._lock:
+            best = self._best.setdefault(exercise_id, {})
+            for kind, value in values.items():
+                if value > best.get(kind, 0):
+                    best[kind] = value
+                    improved[kind] = value
+        return improved
@@ -0,0 +1,392 @@
+# utils/sync.py
+
+"""Change-log sync between devices: only the rows changed since the last exchange travel.
+
+Every exercise and workout log carries a uuid, and triggers append an entry to
+``change_log`` for each insert, update and delete of exercises, logs and PRs (a
+delete leaves a tombstone). When the write commits, its entries are stamped with
+a hybrid logical clock reading and this device's id.
+
+A delta is a JSON Lines stream: a header naming the sending device, its latest
+change-log seq and the seqs it has received from other devices, then one line per
+changed row with the row's current state (or a tombstone), then an end line. The
+receiver applies a change only if its (hlc, device) version beats the version it
+already holds, so every device ends up with the same rows whatever the order of
+exchanges. Deltas travel as files or over a local socket:
+
+    python -m workout_tracker sync-export delta.jsonl     # then sync-import it on the other device
+    python -m workout_tracker sync-serve                  # and on the other device:
+    python -m workout_tracker sync-with 192.168.1.20:8765
+"""
+
+import gzip
+import json
+import socket
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+FORMAT = 'workout-tracker-sync'
+VERSION = 1
+BATCH_SIZE = 500            # Rows looked up per query when exporting, and changes applied per transaction
+PORT = 8765
+NO_VERSION = (0, '')        # Version of a row no change-log entry mentions, such as one from before sync existed
+
+# entity -> SQL returning (uuid, data columns...) for the rows whose uuids are given.
+# Rows of deleted exercises awaiting purge count as deleted.
+ROW_SQL = {
+    'exercise': "SELECT uuid, name, type FROM exercises WHERE uuid IN ({}) AND deleted IS NULL",
+    'pr': '''
+        SELECT exercises.uuid, exercises.name, pr_records.max_lift
+        FROM pr_records
+        JOIN exercises ON pr_records.exercise_id = exercises.id AND exercises.deleted IS NULL
+        WHERE exercises.uuid IN ({})
+    ''',
+    'workout_log': '''
+        SELECT workout_logs.uuid, workout_logs.date, exercises.uuid, exercises.name, workout_logs.duration,
+               workout_logs.calories, workout_logs.sets, workout_logs.reps, workout_logs.weight, workout_logs.notes
+        FROM workout_logs
+        JOIN exercises ON workout_logs.exercise_id = exercises.id AND exercises.deleted IS NULL
+        WHERE workout_logs.uuid IN ({})
+    ''',
+}
+# entity -> SQL listing the uuids of every row, for a first exchange
+ALL_UUIDS_SQL = {
+    'exercise': "SELECT uuid FROM exercises WHERE deleted IS NULL",
+    'pr': '''
+        SELECT exercises.uuid FROM pr_records
+        JOIN exercises ON pr_records.exercise_id = exercises.id AND exercises.deleted IS NULL
+    ''',
+    'workout_log': "SELECT uuid FROM workout_logs",
+}
+DATA_FIELDS = {
+    'exercise': ('name', 'type'),
+    'pr': ('exercise_name', 'max_lift'),
+    'workout_log': ('date', 'exercise', 'exercise_name', 'duration', 'calories', 'sets', 'reps', 'weight', 'notes'),
+}
+ENTITIES = tuple(ROW_SQL)   # Exercises first, so the logs and PRs after them find their exercise
+
+class HybridClock:
+    """Hybrid logical clock: milliseconds since the epoch in the high bits, a counter in the low 16.
+
+    Readings never go backwards, even if the wall clock does, and always exceed
+    every reading received from another device.
+    """
+
+    COUNTER_BITS = 16
+
+    def __init__(self, last=0):
+        self.last = last
+
+    @classmethod
+    def resume(cls, db):
+        """A clock that continues after the latest stamp in the database's change log."""
+        row = db._fetchone("SELECT hlc FROM change_log WHERE hlc IS NOT NULL ORDER BY seq DESC LIMIT 1")
+        saved = db._fetchone("SELECT value FROM sync_meta WHERE key = 'clock'")
+        return cls(max(row[0] if row else 0, int(saved[0]) if saved else 0))
+
+    def now(self):
+        self.last = max(self.last + 1, time.time_ns() // 1_000_000 << self.COUNTER_BITS)
+        return self.last
+
+    def receive(self, remote):
+        """Move past a reading from another device."""
+        self.last = max(self.last, remote)
+
+class SyncStats(NamedTuple):
+    sent: int = 0           # Changes written
+    received: int = 0       # Changes read
+    applied: int = 0        # Received changes newer than the local rows
+    conflicts: int = 0      # Received changes that lost to local state, or whose exercise is gone
+    bytes: int = 0          # Size of the delta written or read
+
+    def __str__(self):
+        return (f"{self.sent} sent, {self.received} received, {self.applied} applied, "
+                f"{self.conflicts} conflicts, {self.bytes:,} bytes")
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+def versions(db, entity, uuids):
+    """Return {uuid: (hlc, device)} of the latest change-log entry for each uuid that has one."""
+    latest = {}
+    rows = db._fetchall(f'''
+        SELECT uuid, hlc, device FROM change_log
+        WHERE entity = ? AND uuid IN ({_placeholders(uuids)}) AND hlc IS NOT NULL
+    ''', (entity, *uuids))
+    for uuid, hlc, device in rows:
+        if (hlc, device) > latest.get(uuid, NO_VERSION):
+            latest[uuid] = (hlc, device)
+    return latest
+
+def _peers(db):
+    """Return {device: (received, acked)} for every device this one has received changes from.
+
+    ``acked`` is None until the device reports having received changes from this one.
+    """
+    return {device: (received, acked) for device, received, acked
+            in db._fetchall("SELECT device, received, acked FROM sync_peers")}
+
+def _fetch_rows(db, entity, sql, params=()):
+    """Run a query over an entity's table; for workout logs, over the archived ones too."""
+    if entity == 'workout_log':
+        return db._fetchall_logs(sql, params)
+    return db._fetchall(sql, params)
+
+# --- Export ---
+
+def changes_since(db, since, peer=None):
+    """Yield [entity, uuid, op, hlc, device, data] for every row whose change-log entries follow seq ``since``.
+
+    ``since`` None means a first exchange: every row is sent. Rows whose latest
+    version came from ``peer`` are left out, since the peer has them already.
+    """
+    for entity in ENTITIES:
+        uuids = [row[0] for row in db._fetchall(
+            "SELECT DISTINCT uuid FROM change_log WHERE entity = ? AND seq > ?", (entity, since or 0))]
+        if since is None:
+            uuids = list(dict.fromkeys(uuids + [row[0] for row in _fetch_rows(db, entity, ALL_UUIDS_SQL[entity])]))
+        for start in range(0, len(uuids), BATCH_SIZE):
+            batch = uuids[start:start + BATCH_SIZE]
+            rows = {row[0]: row[1:] for row in _fetch_rows(db, entity, ROW_SQL[entity].format(_placeholders(batch)),
+                                                           batch)}
+            latest = versions(db, entity, batch)
+            for uuid in batch:
+                hlc, device = latest.get(uuid, NO_VERSION)
+                if peer is not None and device == peer:
+                    continue
+                if uuid in rows:
+                    yield [entity, uuid, 'put', hlc, device, dict(zip(DATA_FIELDS[entity], rows[uuid]))]
+                elif uuid in latest:
+                    yield [entity, uuid, 'delete', hlc, device, None]
+
+def write_delta(db, file, peer=None):
+    """Write the changes a peer (every known peer when None) has not acknowledged; returns SyncStats.
+
+    ``file`` is a binary file object.
+    """
+    peers = _peers(db)
+    if peer is not None:
+        since = peers.get(peer, (0, None))[1]
+    else:
+        acked = [acked for _, acked in peers.values()]
+        since = None if not acked or None in acked else min(acked)
+    seq = db._fetchone("SELECT COALESCE(MAX(seq), 0) FROM change_log")[0]
+    header = {'format': FORMAT, 'version': VERSION, 'device': db.device_id, 'seq': seq,
+              'acks': {device: received for device, (received, _) in peers.items()}}
+    written = _write_line(file, header)
+    sent = 0
+    for change in changes_since(db, since, peer):
+        written += _write_line(file, change)
+        sent += 1
+    written += _write_line(file, {'end': sent})
+    file.flush()
+    return SyncStats(sent=sent, bytes=written)
+
+def _write_line(file, value):
+    line = json.dumps(value, separators=(',', ':')).encode() + b'\n'
+    file.write(line)
+    return len(line)
+
+# --- Import ---
+
+def read_delta(db, file, progress=None):
+    """Apply a delta from a binary file object; returns SyncStats.
+
+    Changes are applied BATCH_SIZE to a transaction. The sender's checkpoint is
+    recorded only once the end line arrives, so a cut-off delta is simply
+    applied again, in full, next time.
+    """
+    header, size = _read_line(file)
+    if not isinstance(header, dict) or header.get('format') != FORMAT:
+        raise ValueError("Not a workout tracker sync delta")
+    if header.get('version') != VERSION:
+        raise ValueError(f"Unsupported sync delta version: {header.get('version')}")
+    sender = header['device']
+    if sender == db.device_id:
+        raise ValueError("This delta came from this device, or from a copy of its database")
+
+    received = applied = conflicts = 0
+    batch = []
+    while True:
+        line = file.readline()
+        if not line:
+            raise ValueError("Sync delta ended early")
+        size += len(line)
+        change = json.loads(line)
+        if isinstance(change, dict):
+            if change.get('end') != received:
+                raise ValueError(f"Sync delta ended after {received} of {change.get('end')} changes")
+            break
+        batch.append(change)
+        received += 1
+        if len(batch) == BATCH_SIZE:
+            done, lost = apply_changes(db, batch)
+            applied, conflicts, batch = applied + done, conflicts + lost, []
+            if progress:
+                progress(received)
+    done, lost = apply_changes(db, batch)
+    applied += done
+    conflicts += lost
+
+    with db.transaction():
+        db.cursor.execute('''
+            INSERT INTO sync_peers (device, received, acked, synced) VALUES (?, ?, ?, ?)
+            ON CONFLICT(device) DO UPDATE SET
+                received = MAX(received, excluded.received),
+                acked = COALESCE(MAX(acked, excluded.acked), acked, excluded.acked),
+                synced = excluded.synced
+        ''', (sender, header['seq'], header['acks'].get(db.device_id), datetime.now().isoformat(timespec='seconds')))
+        db.cursor.execute("INSERT OR REPLACE INTO sync_meta (key, value) VALUES ('clock', ?)", (str(db.clock.last),))
+    return SyncStats(received=received, applied=applied, conflicts=conflicts, bytes=size)
+
+def _read_line(file):
+    """Return the next line's JSON value and its size in bytes."""
+    line = file.readline()
+    if not line:
+        raise ValueError("Empty sync delta")
+    try:
+        return json.loads(line), len(line)
+    except json.JSONDecodeError:
+        raise ValueError("Not a workout tracker sync delta") from None
+
+def apply_changes(db, changes):
+    """Apply [entity, uuid, op, hlc, device, data] changes in one transaction; returns (applied, conflicts).
+
+    A change wins if its (hlc, device) is greater than the local version of the
+    row, so two devices applying each other's changes converge. The entries its
+    writes add to the change log keep the change's version, not a local one.
+    """
+    applied = conflicts = 0
+    with db.transaction():
+        for entity in ENTITIES:
+            selected = [change for change in changes if change[0] == entity]
+            if not selected:
+                continue
+            local = versions(db, entity, [change[1] for change in selected])
+            for _, uuid, op, hlc, device, data in selected:
+                version = (hlc, device)
+                db.clock.receive(hlc)
+                if uuid in local and version <= local[uuid]:
+                    conflicts += version < local[uuid]     # The same version again is no conflict
+                    continue
+                if not APPLY[entity](db, uuid, op, data):
+                    conflicts += 1
+                    continue
+                if not db._stamp_changes(hlc, device):
+                    # Nothing changed locally, but remember the version so older changes lose to it
+                    db.cursor.execute("INSERT INTO change_log (entity, uuid, op, hlc, device) VALUES (?, ?, ?, ?, ?)",
+                                      (entity, uuid, op, hlc, device))
+                local[uuid] = version
+                applied += 1
+    return applied, conflicts
+
+def _exercise_id(db, uuid, name):
+    """Local id of an exercise, found by uuid or else by name; None if it does not exist here."""
+    row = db._fetchone("SELECT id FROM exercises WHERE uuid = ? AND deleted IS NULL", (uuid,))
+    return row[0] if row else db.get_exercise_id(name)
+
+def _apply_exercise(db, uuid, op, data):
+    row = db._fetchone("SELECT id, name, type, deleted FROM exercises WHERE uuid = ?", (uuid,))
+    if op == 'delete':
+        if row and row[3] is None:
+            db.delete_exercise(row[1])
+        return True
+    if row and row[3] is not None and not db.restore_exercise(row[1]):
+        return False    # Deleted here too long ago to restore; the deletion wins
+    if row:
+        return (row[1], row[2]) == (data['name'], data['type']) or db.update_exercise(row[1], data['name'],
+                                                                                       data['type'])
+    same_name = db._fetchone("SELECT id, uuid FROM exercises WHERE name = ? AND deleted IS NULL", (data['name'],))
+    if same_name is None:
+        return db.add_exercise(data['name'], data['type'], uuid=uuid)
+    # Created on both devices independently: both keep the smaller uuid, so logs follow either way
+    if uuid < same_name[1]:
+        db.cursor.execute("UPDATE exercises SET uuid = ? WHERE id = ?", (uuid, same_name[0]))
+        # Its history moves too: left behind, it would read as a deletion of the old uuid
+        db.cursor.execute("UPDATE change_log SET uuid = ? WHERE entity IN ('exercise', 'pr') AND uuid = ?",
+                          (uuid, same_name[1]))
+        return True
+    return False
+
+def _apply_pr(db, uuid, op, data):
+    exercise_id = _exercise_id(db, uuid, data and data['exercise_name'])
+    if exercise_id is None:
+        return op == 'delete'
+    if op == 'delete':
+        db.delete_pr(exercise_id)
+    else:
+        db.add_or_update_pr(exercise_id, data['max_lift'])
+    return True
+
+def _apply_workout_log(db, uuid, op, data):
+    row = db._fetchone("SELECT id FROM workout_logs WHERE uuid = ?", (uuid,))
+    if row is None and db.archives.years() and db._fetchall_logs("SELECT id FROM workout_logs WHERE uuid = ?", (uuid,)):
+        return True     # Archived logs are read-only; the archived version stands
+    if op == 'delete':
+        if row:
+            db.delete_workout_log(row[0])
+        return True
+    exercise_id = _exercise_id(db, data['exercise'], data['exercise_name'])
+    if exercise_id is None:
+        return False    # Its exercise was deleted here; the deletion wins
+    values = (data['date'], exercise_id, data['duration'], data['calories'], data['sets'], data['reps'],
+              data['weight'])
+    if row:
+        db.update_workout_log(row[0], *values, data['notes'] or '')
+    else:
+        db.add_workout_log(*values, data['notes'], uuid=uuid)
+    return True
+
+APPLY = {'exercise': _apply_exercise, 'pr': _apply_pr, 'workout_log': _apply_workout_log}
+
+# --- Transports ---
+
+def _open(path, mode):
+    return gzip.open(path, mode) if path.endswith('.gz') else open(path, mode)
+
+def export_file(db, path, peer=None):
+    """Write a delta to a file (gzip-compressed if it ends in .gz)."""
+    with _open(path, 'wb') as file:
+        return write_delta(db, file, peer)
+
+def import_file(db, path, progress=None):
+    with _open(path, 'rb') as file:
+        return read_delta(db, file, progress)
+
+def _exchange(db, connection, sends_first):
+    """Swap device ids, then deltas, over a connected socket; returns the combined SyncStats."""
+    with connection, connection.makefile('rwb') as stream:
+        _write_line(stream, {'format': FORMAT, 'version': VERSION, 'device': db.device_id})
+        stream.flush()
+        hello, _ = _read_line(stream)
+        if not isinstance(hello, dict) or hello.get('format') != FORMAT:
+            raise ValueError("The other side is not a workout tracker")
+        if sends_first:
+            sent = write_delta(db, stream, hello['device'])
+            received = read_delta(db, stream)
+        else:
+            received = read_delta(db, stream)
+            sent = write_delta(db, stream, hello['device'])
+    return received._replace(sent=sent.sent, bytes=sent.bytes + received.bytes)
+
+def serve(db, host='127.0.0.1', port=PORT, once=False, ready=None, done=None):
+    """Accept sync connections one at a time; ``ready(port)`` is called once listening.
+
+    Runs until interrupted, or after one exchange if ``once``. ``done(stats)`` is
+    called after each exchange.
+    """
+    with socket.create_server((host, port)) as server:
+        if ready:
+            ready(server.getsockname()[1])
+        while True:
+            connection, _ = server.accept()
+            stats = _exchange(db, connection, sends_first=False)
+            if done:
+                done(stats)
+            if once:
+                return stats
+
+def sync_with(db, host, port=PORT, timeout=60):
+    """Exchange deltas with a device running serve(); returns SyncStats."""
+    return _exchange(db, socket.create_connection((host, port), timeout=timeout), sends_first=True)
@@ -0,0 +1,249 @@
+# utils/transfer.py
+
+"""Streaming import and export of workout history as CSV, JSON Lines or Parquet.
+
+Rows flow through generators in fixed-size chunks, so memory use stays flat
+whatever the file size. Each imported chunk is written in one transaction.
+Parquet support needs ``pyarrow``, the engine pandas uses for Parquet files.
+
+    python -m utils.transfer import <db> <file> [--chunk-size 5000]
+    python -m utils.transfer export <db> <file> [--start DATE] [--end DATE]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import date
+from itertools import islice
+
+# Columns of an exported or imported row; 'exercise' is the exercise name
+FIELDS = ('date', 'exercise', 'type', 'duration', 'calories', 'sets', 'reps', 'weight', 'notes')
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.parquet': 'parquet',
+}
+DEFAULT_TYPE = 'Imported'   # Type given to exercises first seen in an import without one
+
+class TransferStats:
+    """Row count and elapsed time of an import or export."""
+
+    def __init__(self, rows=0, seconds=0.0):
+        self.rows = rows
+        self.seconds = seconds
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return f"{self.rows} rows in {self.seconds:.2f} s ({self.rows_per_second:,.0f} rows/s)"
+
+def detect_format(path, format=None):
+    """Return 'csv', 'jsonl' or 'parquet' for a path, from its extension unless given."""
+    if format:
+        if format not in FORMATS.values():
+            raise ValueError(f"Unknown format: {format!r}")
+        return format
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot tell the format of {path!r}; use one of {', '.join(FORMATS)}")
+    return FORMATS[extension]
+
+def chunked(iterable, size):
+    """Yield lists of up to size items."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet files need pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+# --- Readers: each yields one dict per row ---
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Line {line_number}: {e}") from None
+
+def read_parquet(path, batch_size=5000):
+    pyarrow = _import_pyarrow()
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    columns = [name for name in FIELDS if name in parquet_file.schema_arrow.names]
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield from batch.to_pylist()
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl, 'parquet': read_parquet}
+
+# --- Writers: each consumes lists of row tuples in FIELDS order ---
+
+def write_csv(path, chunks):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for rows in chunks:
+            writer.writerows(rows)
+            yield len(rows)
+
+def write_jsonl(path, chunks):
+    with open(path, 'w', encoding='utf-8') as f:
+        for rows in chunks:
+            f.writelines(json.dumps(dict(zip(FIELDS, row))) + '\n' for row in rows)
+            yield len(rows)
+
+def write_parquet(path, chunks):
+    pyarrow = _import_pyarrow()
+    schema = pyarrow.schema([
+        ('date', pyarrow.date32()),
+        ('exercise', pyarrow.string()),
+        ('type', pyarrow.string()),
+        ('duration', pyarrow.float64()),
+        ('calories', pyarrow.float64()),
+        ('sets', pyarrow.int64()),
+        ('reps', pyarrow.int64()),
+        ('weight', pyarrow.float64()),
+        ('notes', pyarrow.string()),
+    ])
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            columns[0] = [date.fromisoformat(value) for value in columns[0]]
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield len(rows)
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl, 'parquet': write_parquet}
+
+# --- Import ---
+
+def _number(value, kind=float):
+    """Parse an optional numeric field; blanks become None."""
+    if value is None or value == '':
+        return None
+    return kind(float(value))
+
+class ExerciseResolver:
+    """Name -> id cache for an import, creating unknown exercises a chunk at a time."""
+
+    def __init__(self, db, default_type=DEFAULT_TYPE):
+        self.db = db
+        self.default_type = default_type
+        self.ids = db.get_exercise_ids()
+
+    def resolve(self, records):
+        """Make sure every exercise named in a chunk of records exists."""
+        missing = {}
+        for record in records:
+            name = record.get('exercise')
+            if name and name not in self.ids and name not in missing:
+                missing[name] = record.get('type') or self.default_type
+        if missing:
+            self.db.add_exercises(missing.items())
+            self.ids.update(self.db.get_exercise_ids(missing))
+
+def _log_rows(records, ids, first_row):
+    """Convert a chunk of record dicts to add_workout_logs tuples."""
+    rows = []
+    for row_number, record in enumerate(records, first_row):
+        try:
+            rows.append((
+                record['date'],
+                ids[record.get('exercise')],
+                _number(record.get('duration')),
+                _number(record.get('calories')),
+                _number(record.get('sets'), int),
+                _number(record.get('reps'), int),
+                _number(record.get('weight')),
+                record.get('notes') or None,
+            ))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Row {row_number}: invalid workout log {record!r} ({e!r})") from None
+    return rows
+
+def import_logs(db, path, format=None, chunk_size=5000, default_type=DEFAULT_TYPE, progress=None):
+    """Stream workout logs from a file into the database and return TransferStats.
+
+    Records need 'date' and 'exercise'; 'type', 'duration', 'calories', 'sets',
+    'reps', 'weight' and 'notes' are optional. Exercises are created on first sight.
+    Each chunk is committed on its own, so an error stops the import after the
+    last complete chunk. ``progress`` is called with the stats after each chunk.
+    """
+    format = detect_format(path, format)
+    reader = READERS[format]
+    records = reader(path, chunk_size) if format == 'parquet' else reader(path)
+    resolver = ExerciseResolver(db, default_type)
+    stats = TransferStats()
+    started = time.perf_counter()
+    for records in chunked(records, chunk_size):
+        resolver.resolve(records)
+        db.add_workout_logs(_log_rows(records, resolver.ids, stats.rows + 1))
+        stats.rows += len(records)
+        stats.seconds = time.perf_counter() - started
+        if progress:
+            progress(stats)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+# --- Export ---
+
+def export_logs(db, path, format=None, chunk_size=5000, start=None, end=None, progress=None):
+    """Stream workout logs, oldest first, to a file and return TransferStats."""
+    writer = WRITERS[detect_format(path, format)]
+    stats = TransferStats()
+    started = time.perf_counter()
+    for count in writer(path, db.iter_workout_logs(chunk_size, start, end)):
+        stats.rows += count
+        stats.seconds = time.perf_counter() - started
+        if progress:
+            progress(stats)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+def main(argv=None):
+    """Import workout logs from, or export them to, a CSV, JSON Lines or Parquet file."""
+    from utils.database import Database
+
+    parser = argparse.ArgumentParser(prog='python -m utils.transfer', description=main.__doc__)
+    parser.add_argument('direction', choices=('import', 'export'))
+    parser.add_argument('database', help="database file")
+    parser.add_argument('file', help="file to read or write (.csv, .jsonl, .ndjson or .parquet)")
+    parser.add_argument('--format', choices=sorted(set(FORMATS.values())), help="override the file extension")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--start', help="first date to export")
+    parser.add_argument('--end', help="last date to export")
+    args = parser.parse_args(argv)
+
+    db = Database(args.database, performance=True)
+    try:
+        report = lambda stats: print(f"\r{stats}", end='', file=sys.stderr, flush=True)
+        if args.direction == 'import':
+            stats = import_logs(db, args.file, args.format, args.chunk_size, progress=report)
+        else:
+            stats = export_logs(db, args.file, args.format, args.chunk_size, args.start, args.end, progress=report)
+        print(file=sys.stderr)
+        print(f"{args.direction.capitalize()}ed {stats}")
+        return 0
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
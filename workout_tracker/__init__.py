@@ -0,0 +1,19 @@
+# workout_tracker/__init__.py
+
+"""Headless API and command line for the workout tracker.
+
+    from workout_tracker import WorkoutService
+
+    with WorkoutService('workouts.db') as service:
+        service.add_log('2024-05-01', 'Squat', 45, 300, sets=5, reps=5, weight=100)
+"""
+
+from workout_tracker.service import (
+    DB_FILE,
+    ExerciseTotals,
+    PeriodTotals,
+    PersonalRecord,
+    Summary,
+    WorkoutLog,
+    WorkoutService,
+)
@@ -0,0 +1,6 @@
+# workout_tracker/__main__.py
+
+import sys
+from workout_tracker.cli import main
+
+sys.exit(main())
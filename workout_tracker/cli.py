@@ -0,0 +1,375 @@
+# workout_tracker/cli.py
+
+"""Headless command line: ``python -m workout_tracker <command> ...``.
+
+Every command works on the database given by --db (default: the GUI's
+database, or $WORKOUT_TRACKER_DB). Add --json to listing commands for
+machine-readable output.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from datetime import date, timedelta
+
+from utils import migrations, profiling, sync
+from utils.backup import BackupManager
+from utils.database import LOG_ORDERS, normalize_date
+from utils.records import PR_KINDS
+from workout_tracker.service import DB_FILE, WorkoutService
+
+def _print_rows(rows, as_json):
+    """Print NamedTuple rows as JSON lines or tab-separated text."""
+    for row in rows:
+        if as_json:
+            print(json.dumps(row._asdict()))
+        else:
+            print('\t'.join('' if value is None else str(value) for value in row))
+
+def _figure(value, spec, unit=''):
+    """Format a number with its unit, or 'n/a' when there were too few points to compute it (NaN)."""
+    return 'n/a' if value is None or math.isnan(value) else format(value, spec) + unit
+
+def _finite(value):
+    """A float for JSON output, None in place of NaN."""
+    return None if value is None or math.isnan(value) else float(value)
+
+def _progress(stats):
+    print(f"\r{stats}", end='', file=sys.stderr, flush=True)
+
+# --- Commands: each takes (service, args) and returns an exit status ---
+
+def cmd_exercises(service, args):
+    for name, type_ in service.exercises():
+        print(json.dumps({'name': name, 'type': type_}) if args.json else f"{name}\t{type_}")
+    return 0
+
+def cmd_add_exercise(service, args):
+    if not service.add_exercise(args.name, args.type):
+        print(f"Exercise already exists: {args.name}", file=sys.stderr)
+        return 1
+    return 0
+
+def cmd_log(service, args):
+    log_id, records = service.add_log(args.date, args.exercise, args.duration, args.calories,
+                                      args.sets, args.reps, args.weight, args.notes)
+    print(log_id)
+    for kind, value in records.items():
+        print(f"New {PR_KINDS[kind]} record: {value:g}", file=sys.stderr)
+    return 0
+
+def cmd_logs(service, args):
+    _print_rows(service.logs(
+        args.start, args.end, args.limit, args.exercise, args.type, args.search,
+        args.min_duration, args.max_duration, args.min_calories, args.max_calories, args.order, args.offset,
+    ), args.json)
+    return 0
+
+def cmd_stats(service, args):
+    if args.period:
+        _print_rows(service.totals(args.period, args.start, args.end, args.exercise), args.json)
+        return 0
+
+    summary = service.summary(args.start, args.end)
+    if args.json:
+        print(json.dumps({**summary._asdict(), 'exercises': [row._asdict() for row in summary.exercises]}))
+        return 0
+    print(f"Period:      {summary.start or 'first'} to {summary.end or 'last'}")
+    print(f"Sessions:    {summary.sessions}")
+    print(f"Active days: {summary.active_days}")
+    print(f"Duration:    {summary.duration:g} min")
+    print(f"Calories:    {summary.calories:g}")
+    for row in summary.exercises:
+        print(f"  {row.exercise}\t{row.type}\t{row.sessions} sessions\t{row.duration:g} min\t{row.calories:g} kcal")
+    return 0
+
+def cmd_prs(service, args):
+    for record in service.personal_records():
+        if args.json:
+            print(json.dumps(record._asdict()))
+        else:
+            best = '\t'.join(f"{PR_KINDS[kind]}: {record.records[kind]:g}" for kind in PR_KINDS if kind in record.records)
+            max_lift = '' if record.max_lift is None else f"{record.max_lift:g}"
+            print(f"{record.exercise}\t{max_lift}\t{best}".rstrip())
+    return 0
+
+def cmd_trends(service, args):
+    load = service.training_load(args.metric, args.end)
+    streaks = service.streaks(args.end)
+    trends = sorted(service.e1rm_trends(args.window, args.end), key=lambda trend: trend.exercise)
+    latest = {
+        'date': str(load.days[-1]) if len(load.days) else None,
+        **{name: _finite(getattr(load, name)[-1]) if len(load.days) else None
+           for name in ('daily', 'acute', 'chronic', 'ratio')},
+    }
+    if args.json:
+        print(json.dumps({
+            'metric': args.metric,
+            'load': latest,
+            'streaks': {**streaks._asdict(), 'longest_start': str(streaks.longest_start),
+                        'longest_end': str(streaks.longest_end)},
+            'e1rm_trends': [{**trend._asdict(), 'per_week': _finite(trend.per_week)} for trend in trends],
+        }))
+        return 0
+    if latest['date']:
+        print(f"Load ({args.metric}) on {latest['date']}: acute {latest['acute']:.1f}, "
+              f"chronic {latest['chronic']:.1f}, ratio {_figure(latest['ratio'], '.2f')}")
+    print(f"Streak: {streaks.current} days, longest {streaks.longest} "
+          f"({streaks.longest_start} to {streaks.longest_end}), {streaks.active_days} active days")
+    for trend in trends:
+        print(f"  {trend.exercise}\t{trend.sessions} days\tlatest {trend.latest:.1f}\tbest {trend.best:.1f}"
+              f"\t{_figure(trend.per_week, '+.2f', '/week')}")
+    return 0
+
+def cmd_import(service, args):
+    stats = service.import_file(args.file, args.format, args.chunk_size, progress=_progress)
+    print(file=sys.stderr)
+    print(f"Imported {stats}")
+    return 0
+
+def cmd_export(service, args):
+    stats = service.export_file(args.file, args.format, args.chunk_size, args.start, args.end, progress=_progress)
+    print(file=sys.stderr)
+    print(f"Exported {stats}")
+    return 0
+
+def cmd_check(service, args):
+    service.close()  # The checks open the database themselves
+    flags = [flag for flag, wanted in (('--rebuild-aggregates', args.rebuild_aggregates),
+                                       ('--verify-aggregates', args.verify_aggregates)) if wanted]
+    return migrations.main([args.db, *flags])
+
+def _backup_progress(copied, total):
+    print(f"\rCopied {copied}/{total} pages", end='', file=sys.stderr, flush=True)
+
+def _find_snapshot(backups, path):
+    """The snapshot at path, or the latest one when path is None."""
+    snapshot = backups.snapshot(path) if path else backups.latest()
+    if snapshot is None:
+        raise ValueError(f"No snapshot at {path}" if path else "No snapshots yet")
+    return snapshot
+
+def cmd_backup(service, args):
+    snapshot = service.db.backups.backup(progress=_backup_progress)
+    print(file=sys.stderr)
+    print(snapshot.path)
+    return 0
+
+def cmd_backups(service, args):
+    _print_rows(service.db.backups.snapshots(), args.json)
+    return 0
+
+def cmd_verify(service, args):
+    result = service.db.backups.verify(_find_snapshot(service.db.backups, args.snapshot))
+    if args.json:
+        print(json.dumps(result._asdict()))
+    else:
+        print(f"Integrity: {'; '.join(result.integrity)}")
+        print(f"Checksum:  {'ok' if result.checksum_ok else 'MISMATCH'}")
+        for table, (expected, found) in sorted(result.mismatches.items()):
+            print(f"Rows in {table}: expected {expected}, found {found}")
+    return 0 if result.ok else 1
+
+def cmd_restore(service, args):
+    service.close()  # Nothing may hold the database open while its file is replaced
+    backups = BackupManager(args.db)
+    snapshot = _find_snapshot(backups, args.snapshot)
+    backups.restore(snapshot)
+    print(f"Restored {snapshot.path} ({snapshot.created}); the replaced file is {args.db}.before-restore")
+    return 0
+
+def cmd_archive(service, args):
+    before = args.before or (date.today() - timedelta(days=args.keep_days)).isoformat()
+    moved = service.db.archives.move(normalize_date(before),
+                                     progress=lambda moved: print(f"\rMoved {moved} logs", end='', file=sys.stderr,
+                                                                  flush=True))
+    print(file=sys.stderr)
+    print(f"Archived {moved} logs dated before {before}")
+    return 0
+
+def cmd_archives(service, args):
+    _print_rows(service.db.archives.stats(), args.json)
+    return 0
+
+def cmd_purge(service, args):
+    removed = service.db.purger.run(progress=_progress, wait=False)
+    if removed:
+        print(file=sys.stderr)
+    print(f"Removed {removed} rows of deleted exercises")
+    return 0
+
+def cmd_sync_export(service, args):
+    print(sync.export_file(service.db, args.file, args.peer))
+    return 0
+
+def cmd_sync_import(service, args):
+    print(sync.import_file(service.db, args.file))
+    return 0
+
+def cmd_sync_serve(service, args):
+    print(f"Device {service.db.device_id}", file=sys.stderr)
+    try:
+        sync.serve(service.db, args.host, args.port, args.once,
+                   ready=lambda port: print(f"Waiting for devices on {args.host}:{port}", file=sys.stderr),
+                   done=print)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def cmd_sync_with(service, args):
+    host, _, port = args.address.rpartition(':') if ':' in args.address else (args.address, '', sync.PORT)
+    try:
+        print(sync.sync_with(service.db, host, int(port)))
+    except OSError as e:
+        print(f"Cannot sync with {args.address}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+def cmd_sync_status(service, args):
+    peers = service.db._fetchall("SELECT device, received, acked, synced FROM sync_peers ORDER BY synced")
+    if args.json:
+        print(json.dumps({'device': service.db.device_id,
+                          'peers': [dict(zip(('device', 'received', 'acked', 'synced'), row)) for row in peers]}))
+        return 0
+    print(f"Device: {service.db.device_id}")
+    for device, received, acked, synced in peers:
+        print(f"  {device}\tlast synced {synced}\treceived up to {received}\tacknowledged up to {acked}")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m workout_tracker', description="Workout tracker without the GUI.")
+    parser.add_argument('--db', default=DB_FILE, help=f"database file (default: {DB_FILE})")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="write SQL timings and query plans to FILE (Prometheus text if it ends in .prom)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def command(name, handler, help):
+        sub = commands.add_parser(name, help=help, description=help)
+        sub.set_defaults(handler=handler)
+        return sub
+
+    def add_range(sub):
+        sub.add_argument('--start', help="first date (YYYY-MM-DD)")
+        sub.add_argument('--end', help="last date (YYYY-MM-DD)")
+
+    sub = command('exercises', cmd_exercises, "list exercises")
+    sub.add_argument('--json', action='store_true')
+
+    sub = command('add-exercise', cmd_add_exercise, "add an exercise")
+    sub.add_argument('name')
+    sub.add_argument('type')
+
+    sub = command('log', cmd_log, "log a workout and print its id")
+    sub.add_argument('date')
+    sub.add_argument('exercise')
+    sub.add_argument('duration', type=float, help="minutes")
+    sub.add_argument('calories', type=float)
+    sub.add_argument('--sets', type=int)
+    sub.add_argument('--reps', type=int)
+    sub.add_argument('--weight', type=float)
+    sub.add_argument('--notes')
+
+    sub = command('logs', cmd_logs, "list and filter workout logs")
+    add_range(sub)
+    sub.add_argument('--exercise', help="only this exercise")
+    sub.add_argument('--type', help="only exercises of this type")
+    sub.add_argument('--search', help="words (or word prefixes) in exercise names or notes")
+    for column in ('duration', 'calories'):
+        sub.add_argument(f'--min-{column}', type=float)
+        sub.add_argument(f'--max-{column}', type=float)
+    sub.add_argument('--order', choices=list(LOG_ORDERS), default='newest')
+    sub.add_argument('--limit', type=int)
+    sub.add_argument('--offset', type=int, default=0)
+    sub.add_argument('--json', action='store_true')
+
+    sub = command('stats', cmd_stats, "summarize workouts, or list totals per --period")
+    add_range(sub)
+    sub.add_argument('--period', choices=sorted(migrations.PERIOD_STARTS))
+    sub.add_argument('--exercise', help="only this exercise (with --period)")
+    sub.add_argument('--json', action='store_true')
+
+    sub = command('prs', cmd_prs, "list personal records")
+    sub.add_argument('--json', action='store_true')
+
+    sub = command('trends', cmd_trends, "training load, streaks and estimated-1RM trends")
+    sub.add_argument('--metric', choices=('duration', 'calories', 'volume', 'sessions'), default='duration',
+                     help="what counts as load (default: %(default)s)")
+    sub.add_argument('--end', help="day to report on (default: today)")
+    sub.add_argument('--window', type=int, default=90, help="days of estimated-1RM history to fit")
+    sub.add_argument('--json', action='store_true')
+
+    for name, handler, help in (('import', cmd_import, "import workout logs from a file"),
+                                ('export', cmd_export, "export workout logs to a file")):
+        sub = command(name, handler, help)
+        sub.add_argument('file', help="a .csv, .jsonl, .ndjson or .parquet file")
+        sub.add_argument('--format', choices=('csv', 'jsonl', 'parquet'), help="override the file extension")
+        sub.add_argument('--chunk-size', type=int, default=5000)
+        if name == 'export':
+            add_range(sub)
+
+    sub = command('check', cmd_check, "check query plans and, optionally, the summary tables")
+    sub.add_argument('--rebuild-aggregates', action='store_true')
+    sub.add_argument('--verify-aggregates', action='store_true')
+
+    command('backup', cmd_backup, "take a compressed snapshot of the database and print its path")
+
+    sub = command('backups', cmd_backups, "list snapshots, oldest first")
+    sub.add_argument('--json', action='store_true')
+
+    sub = command('verify', cmd_verify, "check a snapshot's integrity, row counts and checksum")
+    sub.add_argument('snapshot', nargs='?', help="a .db.gz file (default: the latest snapshot)")
+    sub.add_argument('--json', action='store_true')
+
+    sub = command('restore', cmd_restore, "replace the database with a verified snapshot; close the app first")
+    sub.add_argument('snapshot', nargs='?', help="a .db.gz file (default: the latest snapshot)")
+
+    sub = command('archive', cmd_archive, "move old workout logs into per-year archive files beside the database")
+    when = sub.add_mutually_exclusive_group()
+    when.add_argument('--keep-days', type=int, default=365, help="keep this many days of logs (default: %(default)s)")
+    when.add_argument('--before', help="archive logs dated before this date (YYYY-MM-DD)")
+
+    sub = command('archives', cmd_archives, "list archived years with their logs and file sizes")
+    sub.add_argument('--json', action='store_true')
+
+    command('purge', cmd_purge, "remove the logs and records of deleted exercises whose undo window has passed")
+
+    sub = command('sync-export', cmd_sync_export, "write the changes other devices have not seen to a file")
+    sub.add_argument('file', help="a .jsonl file, or .jsonl.gz to compress it")
+    sub.add_argument('--peer', help="only what this device (see sync-status) has not seen")
+
+    sub = command('sync-import', cmd_sync_import, "apply a file written by sync-export on another device")
+    sub.add_argument('file')
+
+    sub = command('sync-serve', cmd_sync_serve, "wait for devices to sync with over the network")
+    sub.add_argument('--host', default='127.0.0.1', help="address to listen on (default: %(default)s)")
+    sub.add_argument('--port', type=int, default=sync.PORT)
+    sub.add_argument('--once', action='store_true', help="exit after one exchange")
+
+    sub = command('sync-with', cmd_sync_with, "exchange changes with a device running sync-serve")
+    sub.add_argument('address', help=f"HOST or HOST:PORT (default port {sync.PORT})")
+
+    sub = command('sync-status', cmd_sync_status, "show this device's id and the devices it has synced with")
+    sub.add_argument('--json', action='store_true')
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        profiling.enable()
+    service = WorkoutService(args.db)
+    try:
+        return args.handler(service, args)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # Output was piped into a command that exited early, such as head
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        service.close()
+        if args.profile:
+            profiling.active().dump(args.profile)
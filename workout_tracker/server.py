@@ -0,0 +1,464 @@
+# workout_tracker/server.py
+
+"""Local HTTP/JSON service for many athletes logging at once: ``python -m workout_tracker.server``.
+
+Each athlete gets their own SQLite file, ``<data dir>/athletes/<athlete>.db``
+(a shard). A shard's writes go through one bounded queue to the single thread
+that owns its Database. Writes that queue up while a batch runs are committed
+together, each in its own savepoint, so one bad request never undoes another.
+Reads run on a few threads over the Database's bounded read pool. The event loop
+only parses requests and never waits on SQLite.
+
+Routes (JSON bodies and responses):
+
+    GET    /health
+    GET    /athletes
+    GET    /athletes/<athlete>/exercises
+    POST   /athletes/<athlete>/exercises              {"name", "type"}
+    PUT    /athletes/<athlete>/exercises/<name>       {"name", "type"}
+    DELETE /athletes/<athlete>/exercises/<name>
+    GET    /athletes/<athlete>/logs                   ?start&end&exercise&type&search&order&limit&offset
+    POST   /athletes/<athlete>/logs                   {"date", "exercise", "duration", "calories",
+                                                       "sets", "reps", "weight", "notes"}
+    GET    /athletes/<athlete>/logs/<id>
+    PUT    /athletes/<athlete>/logs/<id>              as POST
+    DELETE /athletes/<athlete>/logs/<id>
+    GET    /athletes/<athlete>/prs
+    PUT    /athletes/<athlete>/prs/<exercise>         {"max_lift"}
+    DELETE /athletes/<athlete>/prs/<exercise>
+    GET    /athletes/<athlete>/totals                 ?period&start&end&exercise
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import re
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from utils.database import LOG_ORDERS, Database
+from workout_tracker.service import DATA_DIR
+
+READ_THREADS = 4            # Per shard; also the size of its Database read pool
+MAX_QUEUED_WRITES = 1000    # Per shard; further writes are refused with 503 until the queue drains
+WRITE_BATCH = 64            # Most queued writes committed in one transaction
+MAX_BODY = 1024 * 1024
+ATHLETE_NAME = re.compile(r'[A-Za-z0-9_-]{1,64}')
+LOG_FIELDS = ('id', 'date', 'exercise_id', 'duration', 'calories', 'sets', 'reps', 'weight', 'notes')
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# --- Shards ---
+
+class Shard:
+    """One athlete's database: a single writer thread fed by a queue, plus reader threads.
+
+    ``write(fn, *args)`` and ``read(fn, *args)`` run ``fn(db, *args)`` and return
+    awaitables of its result.
+    """
+
+    def __init__(self, path, read_threads=READ_THREADS, max_queued_writes=MAX_QUEUED_WRITES):
+        self.path = path
+        self.ready = Future()       # Resolves to the Database once the writer has opened it
+        self._writes = queue.Queue(maxsize=max_queued_writes)
+        self._readers = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix='shard-reader')
+        self._writer = threading.Thread(target=self._write_loop, args=(read_threads,), daemon=True,
+                                        name=f"shard-writer-{os.path.basename(path)}")
+        self._writer.start()
+
+    async def read(self, fn, *args):
+        db = await asyncio.wrap_future(self.ready)
+        return await asyncio.get_running_loop().run_in_executor(self._readers, fn, db, *args)
+
+    def write(self, fn, *args):
+        future = Future()
+        try:
+            self._writes.put_nowait((fn, args, future))
+        except queue.Full:
+            raise HTTPError(503, "Too many writes queued for this athlete; retry shortly") from None
+        return asyncio.wrap_future(future)
+
+    def close(self):
+        """Finish queued writes and close the database; blocks."""
+        self._readers.shutdown(wait=True)
+        self._writes.put(None)
+        self._writer.join()
+
+    def _write_loop(self, read_threads):
+        try:
+            # Opened here, so this thread owns the write connection
+            db = Database(self.path, performance=True, read_pool_size=read_threads)
+        except Exception as error:
+            self.ready.set_exception(error)
+            db = None
+        else:
+            self.ready.set_result(db)
+        try:
+            while True:
+                batch = [self._writes.get()]
+                while len(batch) < WRITE_BATCH:
+                    try:
+                        batch.append(self._writes.get_nowait())
+                    except queue.Empty:
+                        break
+                jobs = [job for job in batch if job is not None]
+                if db is None:
+                    for _, _, future in jobs:
+                        future.set_exception(self.ready.exception())
+                elif jobs:
+                    _run_batch(db, jobs)
+                if len(jobs) < len(batch):
+                    break
+        finally:
+            if db is not None:
+                db.close()
+
+def _run_batch(db, jobs):
+    """Run (fn, args, future) jobs in one transaction, each in a savepoint, and resolve them after the commit."""
+    outcomes = []
+    try:
+        with db.transaction():
+            for fn, args, future in jobs:
+                try:
+                    with db.transaction():
+                        outcomes.append((future, fn(db, *args), None))
+                except Exception as error:
+                    outcomes.append((future, None, error))
+    except Exception as error:
+        for _, _, future in jobs:   # The commit failed, so none of the writes happened
+            future.set_exception(error)
+        return
+    for future, result, error in outcomes:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+# --- Database calls, run on shard threads ---
+
+def _exercise_id(db, name):
+    exercise_id = db.get_exercise_id(name)
+    if exercise_id is None:
+        raise HTTPError(404, f"Unknown exercise: {name!r}")
+    return exercise_id
+
+def _log_dict(db, row):
+    log = dict(zip(LOG_FIELDS, row))
+    log['exercise'] = db.get_exercise_name(log['exercise_id'])
+    return log
+
+def _log_values(db, body):
+    """Return (date, exercise_id, duration, calories, sets, reps, weight, notes) from a request body."""
+    for field in ('date', 'exercise'):
+        if not body.get(field):
+            raise HTTPError(400, f"Missing field: {field}")
+    return (body['date'], _exercise_id(db, body['exercise']),
+            _number(body, 'duration'), _number(body, 'calories'), _number(body, 'sets', int),
+            _number(body, 'reps', int), _number(body, 'weight'), body.get('notes'))
+
+def _number(fields, name, type_=float):
+    value = fields.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return type_(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"{name} must be a number") from None
+
+def _add_exercise(db, body):
+    if not body.get('name') or not body.get('type'):
+        raise HTTPError(400, "Missing field: name or type")
+    if not db.add_exercise(body['name'], body['type']):
+        raise HTTPError(409, f"Exercise already exists: {body['name']!r}")
+    return {'id': db.get_exercise_id(body['name']), 'name': body['name'], 'type': body['type']}
+
+def _update_exercise(db, name, body):
+    _exercise_id(db, name)
+    new_name, new_type = body.get('name') or name, body.get('type')
+    if not new_type:
+        raise HTTPError(400, "Missing field: type")
+    if not db.update_exercise(name, new_name, new_type):
+        raise HTTPError(409, f"Exercise already exists: {new_name!r}")
+    return {'name': new_name, 'type': new_type}
+
+def _delete_exercise(db, name):
+    if not db.delete_exercise(name):
+        raise HTTPError(404, f"Unknown exercise: {name!r}")
+    db.purger.start()       # Removes its logs on another connection once the undo window has passed
+    return {'deleted': name}
+
+def _list_exercises(db):
+    return [{'name': name, 'type': type_} for name, type_ in sorted(db.get_all_exercises())]
+
+def _add_log(db, body):
+    log_id = db.add_workout_log(*_log_values(db, body))
+    return {'id': log_id, 'records': dict(db.get_prs_for_log(log_id))}
+
+def _update_log(db, log_id, body):
+    if not db.update_workout_log(log_id, *_log_values(db, body)):
+        raise HTTPError(404, f"No workout log {log_id}")
+    return {'id': log_id, 'records': dict(db.get_prs_for_log(log_id))}
+
+def _delete_log(db, log_id):
+    if not db.delete_workout_log(log_id):
+        raise HTTPError(404, f"No workout log {log_id}")
+    return {'deleted': log_id}
+
+def _get_log(db, log_id):
+    row = db.get_workout_log(log_id)
+    if row is None:
+        raise HTTPError(404, f"No workout log {log_id}")
+    return _log_dict(db, row)
+
+def _query_logs(db, query):
+    order = query.get('order', 'newest')
+    if order not in LOG_ORDERS:
+        raise HTTPError(400, f"order must be one of {', '.join(LOG_ORDERS)}")
+    rows = db.query_workout_logs(
+        exercise_id=_exercise_id(db, query['exercise']) if query.get('exercise') else None,
+        exercise_type=query.get('type'), start=query.get('start'), end=query.get('end'),
+        search=query.get('search'), order=order,
+        limit=_number(query, 'limit', int) or 100, offset=_number(query, 'offset', int) or 0,
+    )
+    return [_log_dict(db, row) for row in rows]
+
+def _set_pr(db, exercise, body):
+    max_lift = _number(body, 'max_lift')
+    if max_lift is None:
+        raise HTTPError(400, "Missing field: max_lift")
+    db.add_or_update_pr(_exercise_id(db, exercise), max_lift)
+    return {'exercise': exercise, 'max_lift': max_lift}
+
+def _delete_pr(db, exercise):
+    exercise_id = _exercise_id(db, exercise)
+    if db.get_pr(exercise_id) is None:
+        raise HTTPError(404, f"No personal record for {exercise!r}")
+    db.delete_pr(exercise_id)
+    return {'deleted': exercise}
+
+def _list_prs(db):
+    return [{'exercise': name, 'max_lift': max_lift} for name, max_lift in sorted(db.get_all_prs())]
+
+def _totals(db, query):
+    exercise_id = _exercise_id(db, query['exercise']) if query.get('exercise') else None
+    rows = db.get_totals(query.get('period', 'day'), exercise_id, query.get('start'), query.get('end'))
+    return [dict(zip(('period_start', 'sessions', 'duration', 'calories'), row)) for row in rows]
+
+# --- HTTP ---
+
+# (method, path pattern, handler name); handlers take (shard, body, query, *path parameters)
+ROUTES = [(method, re.compile(pattern), name) for method, pattern, name in (
+    ('GET', r'/health', 'health'),
+    ('GET', r'/athletes', 'athletes'),
+    ('GET', r'/athletes/([^/]+)/exercises', 'get_exercises'),
+    ('POST', r'/athletes/([^/]+)/exercises', 'post_exercise'),
+    ('PUT', r'/athletes/([^/]+)/exercises/([^/]+)', 'put_exercise'),
+    ('DELETE', r'/athletes/([^/]+)/exercises/([^/]+)', 'delete_exercise'),
+    ('GET', r'/athletes/([^/]+)/logs', 'get_logs'),
+    ('POST', r'/athletes/([^/]+)/logs', 'post_log'),
+    ('GET', r'/athletes/([^/]+)/logs/(\d+)', 'get_log'),
+    ('PUT', r'/athletes/([^/]+)/logs/(\d+)', 'put_log'),
+    ('DELETE', r'/athletes/([^/]+)/logs/(\d+)', 'delete_log'),
+    ('GET', r'/athletes/([^/]+)/prs', 'get_prs'),
+    ('PUT', r'/athletes/([^/]+)/prs/([^/]+)', 'put_pr'),
+    ('DELETE', r'/athletes/([^/]+)/prs/([^/]+)', 'delete_pr'),
+    ('GET', r'/athletes/([^/]+)/totals', 'get_totals'),
+)]
+
+class Server:
+    """Routes requests to per-athlete shards under ``<data_dir>/athletes``."""
+
+    def __init__(self, data_dir=DATA_DIR, read_threads=READ_THREADS, max_queued_writes=MAX_QUEUED_WRITES):
+        self.athletes_dir = os.path.join(data_dir, 'athletes')
+        self.read_threads = read_threads
+        self.max_queued_writes = max_queued_writes
+        self.shards = {}
+
+    def shard(self, athlete):
+        """Return an athlete's shard, opening it on first use."""
+        if not ATHLETE_NAME.fullmatch(athlete):
+            raise HTTPError(400, "Athlete names are 1-64 letters, digits, '-' or '_'")
+        shard = self.shards.get(athlete)
+        if shard is None:
+            os.makedirs(self.athletes_dir, exist_ok=True)
+            shard = self.shards[athlete] = Shard(os.path.join(self.athletes_dir, f"{athlete}.db"),
+                                                 self.read_threads, self.max_queued_writes)
+        return shard
+
+    async def close(self):
+        shards, self.shards = list(self.shards.values()), {}
+        await asyncio.gather(*(asyncio.to_thread(shard.close) for shard in shards))
+
+    # --- Handlers: return (status, payload) ---
+
+    async def health(self, body, query):
+        return 200, {'status': 'ok', 'open_shards': len(self.shards)}
+
+    async def athletes(self, body, query):
+        names = set(self.shards)
+        if os.path.isdir(self.athletes_dir):
+            names.update(name[:-3] for name in os.listdir(self.athletes_dir) if name.endswith('.db'))
+        return 200, sorted(names)
+
+    async def get_exercises(self, body, query, athlete):
+        return 200, await self.shard(athlete).read(_list_exercises)
+
+    async def post_exercise(self, body, query, athlete):
+        return 201, await self.shard(athlete).write(_add_exercise, body)
+
+    async def put_exercise(self, body, query, athlete, name):
+        return 200, await self.shard(athlete).write(_update_exercise, name, body)
+
+    async def delete_exercise(self, body, query, athlete, name):
+        return 200, await self.shard(athlete).write(_delete_exercise, name)
+
+    async def get_logs(self, body, query, athlete):
+        return 200, await self.shard(athlete).read(_query_logs, query)
+
+    async def post_log(self, body, query, athlete):
+        return 201, await self.shard(athlete).write(_add_log, body)
+
+    async def get_log(self, body, query, athlete, log_id):
+        return 200, await self.shard(athlete).read(_get_log, int(log_id))
+
+    async def put_log(self, body, query, athlete, log_id):
+        return 200, await self.shard(athlete).write(_update_log, int(log_id), body)
+
+    async def delete_log(self, body, query, athlete, log_id):
+        return 200, await self.shard(athlete).write(_delete_log, int(log_id))
+
+    async def get_prs(self, body, query, athlete):
+        return 200, await self.shard(athlete).read(_list_prs)
+
+    async def put_pr(self, body, query, athlete, exercise):
+        return 200, await self.shard(athlete).write(_set_pr, exercise, body)
+
+    async def delete_pr(self, body, query, athlete, exercise):
+        return 200, await self.shard(athlete).write(_delete_pr, exercise)
+
+    async def get_totals(self, body, query, athlete):
+        return 200, await self.shard(athlete).read(_totals, query)
+
+    # --- Connections ---
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        allowed = False
+        for route_method, pattern, name in ROUTES:
+            match = pattern.fullmatch(url.path)
+            if match:
+                allowed = True
+                if route_method == method:
+                    return await getattr(self, name)(body, query, *map(unquote, match.groups()))
+        raise HTTPError(405 if allowed else 404, f"No route for {method} {url.path}")
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one keep-alive connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as error:
+                    writer.write(_response(error.status, {'error': str(error)}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                method, target, keep_alive, body = request
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except HTTPError as error:
+                    status, payload = error.status, {'error': str(error)}
+                except ValueError as error:     # Bad dates, periods and the like from Database
+                    status, payload = 400, {'error': str(error)}
+                except Exception as error:
+                    status, payload = 500, {'error': f"{type(error).__name__}: {error}"}
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def _read_request(reader):
+    """Read one request as (method, target, keep_alive, json body), or None at end of stream."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise HTTPError(400, "Bad Content-Length") from None
+    if length > MAX_BODY:
+        raise HTTPError(413, "Request body too large")
+    body = {}
+    if length:
+        try:
+            body = json.loads(await reader.readexactly(length))
+        except json.JSONDecodeError:
+            raise HTTPError(400, "Body is not valid JSON") from None
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+    return method, target, keep_alive, body
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    connection = 'keep-alive' if keep_alive else 'close'
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: {connection}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+async def serve(host='127.0.0.1', port=8080, data_dir=DATA_DIR, read_threads=READ_THREADS, ready=None):
+    """Run the service until cancelled; ``ready(port)`` is called once it is listening."""
+    server = Server(data_dir, read_threads)
+    listener = await asyncio.start_server(server.handle_connection, host, port, backlog=1024)
+    if ready:
+        ready(listener.sockets[0].getsockname()[1])
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m workout_tracker.server', description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080, help="0 picks a free port")
+    parser.add_argument('--data-dir', default=DATA_DIR, help=f"shards go in DATA_DIR/athletes (default: {DATA_DIR})")
+    parser.add_argument('--read-threads', type=int, default=READ_THREADS, help="reader threads per athlete")
+    args = parser.parse_args(argv)
+
+    def ready(port):
+        print(f"Serving on http://{args.host}:{port}", flush=True)
+    try:
+        asyncio.run(serve(args.host, args.port, args.data_dir, args.read_threads, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
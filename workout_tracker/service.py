@@ -0,0 +1,197 @@
+# workout_tracker/service.py
+
+"""Typed, GUI-free service layer over ``utils.database.Database``.
+
+Importing this module never loads tkinter, tkcalendar or matplotlib, so it is
+safe for batch jobs and servers without a display.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Callable, NamedTuple, Optional
+
+from utils import transfer
+from utils.database import Database, normalize_date
+
+if TYPE_CHECKING:
+    from utils.analytics import Analytics, E1RMTrend, Streaks, TrainingLoad, WeeklyVolume
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+DB_FILE = os.environ.get('WORKOUT_TRACKER_DB', os.path.join(DATA_DIR, 'workout_tracker.db'))
+
+class WorkoutLog(NamedTuple):
+    id: int
+    date: str
+    exercise: str
+    duration: Optional[float]
+    calories: Optional[float]
+    sets: Optional[int]
+    reps: Optional[int]
+    weight: Optional[float]
+    notes: Optional[str]
+
+class PeriodTotals(NamedTuple):
+    period_start: str
+    sessions: int
+    duration: float
+    calories: float
+
+class ExerciseTotals(NamedTuple):
+    exercise: str
+    type: str
+    sessions: int
+    duration: float
+    calories: float
+
+class Summary(NamedTuple):
+    start: Optional[str]
+    end: Optional[str]
+    sessions: int
+    active_days: int
+    duration: float
+    calories: float
+    exercises: list[ExerciseTotals]
+
+class PersonalRecord(NamedTuple):
+    exercise_id: int
+    exercise: str
+    max_lift: Optional[float]
+    records: dict[str, float]   # PR kind -> best value, see utils.records.PR_KINDS
+
+class WorkoutService:
+    """Add, query, summarize, import and export workouts without a GUI.
+
+    Use as a context manager, or call close() when done.
+    """
+
+    def __init__(self, db_path: str = DB_FILE, performance: bool = True) -> None:
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.db = Database(db_path, performance=performance)
+        self._analytics: Optional[Analytics] = None
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> WorkoutService:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _exercise_id(self, name: str) -> int:
+        exercise_id = self.db.get_exercise_id(name)
+        if exercise_id is None:
+            raise ValueError(f"Unknown exercise: {name!r}")
+        return exercise_id
+
+    # --- Exercises ---
+
+    def add_exercise(self, name: str, type_: str) -> bool:
+        """Add an exercise; returns False if the name is taken."""
+        return self.db.add_exercise(name, type_)
+
+    def exercises(self) -> list[tuple[str, str]]:
+        """Return (name, type) for every exercise."""
+        return sorted(self.db.get_all_exercises())
+
+    # --- Workout logs ---
+
+    def add_log(self, date: str, exercise: str, duration: Optional[float], calories: Optional[float],
+                sets: Optional[int] = None, reps: Optional[int] = None, weight: Optional[float] = None,
+                notes: Optional[str] = None) -> tuple[int, dict[str, float]]:
+        """Log a workout and return (log id, {PR kind: value}) for any records it set."""
+        log_id = self.db.add_workout_log(date, self._exercise_id(exercise), duration, calories,
+                                         sets, reps, weight, notes)
+        return log_id, dict(self.db.get_prs_for_log(log_id))
+
+    def logs(self, start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None,
+             exercise: Optional[str] = None, exercise_type: Optional[str] = None, search: Optional[str] = None,
+             min_duration: Optional[float] = None, max_duration: Optional[float] = None,
+             min_calories: Optional[float] = None, max_calories: Optional[float] = None,
+             order: str = 'newest', offset: int = 0) -> list[WorkoutLog]:
+        """Return workout logs matching every given filter, newest first unless ``order`` says otherwise.
+
+        ``search`` matches word prefixes in exercise names and notes; ``order`` is
+        one of utils.database.LOG_ORDERS.
+        """
+        rows = self.db.query_workout_logs(
+            exercise_id=self._exercise_id(exercise) if exercise else None, exercise_type=exercise_type,
+            start=start, end=end, min_duration=min_duration, max_duration=max_duration,
+            min_calories=min_calories, max_calories=max_calories, search=search,
+            order=order, limit=limit, offset=offset,
+        )
+        name_of = self.db.get_exercise_name
+        return [WorkoutLog(log_id, date, name_of(exercise_id), *rest) for log_id, date, exercise_id, *rest in rows]
+
+    # --- Stats ---
+
+    def totals(self, period: str = 'day', start: Optional[str] = None, end: Optional[str] = None,
+               exercise: Optional[str] = None) -> list[PeriodTotals]:
+        """Return totals per day, week or month, for one exercise or all of them."""
+        exercise_id = self._exercise_id(exercise) if exercise else None
+        return [PeriodTotals(*row) for row in self.db.get_totals(period, exercise_id, start, end)]
+
+    def summary(self, start: Optional[str] = None, end: Optional[str] = None) -> Summary:
+        """Summarize the workouts dated within [start, end]."""
+        days = self.db.get_totals('day', start=start, end=end)
+        return Summary(
+            start=normalize_date(start) if start else None,
+            end=normalize_date(end) if end else None,
+            sessions=sum(row[1] for row in days),
+            active_days=len(days),
+            duration=sum(row[2] for row in days),
+            calories=sum(row[3] for row in days),
+            exercises=[ExerciseTotals(*row) for row in self.db.get_exercise_totals(start, end)],
+        )
+
+    def personal_records(self) -> list[PersonalRecord]:
+        """Return every exercise's max lift and best value of each PR kind, by exercise name."""
+        max_lifts = {exercise_id: max_lift for exercise_id, _, max_lift in self.db.get_prs_page(limit=-1)}
+        records = []
+        for name, exercise_id in sorted(self.db.get_exercise_ids().items()):
+            best = self.db.get_best_prs(exercise_id)
+            if best or exercise_id in max_lifts:
+                records.append(PersonalRecord(exercise_id, name, max_lifts.get(exercise_id), best))
+        return records
+
+    # --- Analytics ---
+
+    @property
+    def analytics(self) -> Analytics:
+        """Vectorized metrics over this database; NumPy is imported on first use."""
+        if self._analytics is None:
+            from utils.analytics import Analytics
+            self._analytics = Analytics(self.db)
+        return self._analytics
+
+    def training_load(self, metric: str = 'duration', end: Optional[str] = None) -> TrainingLoad:
+        """Daily load with 7-day acute and 28-day chronic means and their ratio, up to end (today)."""
+        return self.analytics.training_load(metric, end=end)
+
+    def weekly_volume(self, metric: str = 'volume') -> WeeklyVolume:
+        """A metric summed per week and exercise type."""
+        return self.analytics.weekly_volume(metric)
+
+    def streaks(self, end: Optional[str] = None) -> Streaks:
+        """Current and longest runs of consecutive training days."""
+        return self.analytics.streaks(end=end)
+
+    def e1rm_trends(self, window_days: int = 90, end: Optional[str] = None) -> list[E1RMTrend]:
+        """Estimated-1RM level and weekly trend of each exercise over the last window_days."""
+        return self.analytics.e1rm_trends(window_days, end=end)
+
+    # --- Import and export ---
+
+    def import_file(self, path: str, format: Optional[str] = None, chunk_size: int = 5000,
+                    progress: Optional[Callable[[transfer.TransferStats], None]] = None) -> transfer.TransferStats:
+        """Stream workout logs from a CSV, JSON Lines or Parquet file."""
+        return transfer.import_logs(self.db, path, format, chunk_size, progress=progress)
+
+    def export_file(self, path: str, format: Optional[str] = None, chunk_size: int = 5000,
+                    start: Optional[str] = None, end: Optional[str] = None,
+                    progress: Optional[Callable[[transfer.TransferStats], None]] = None) -> transfer.TransferStats:
+        """Stream workout logs, oldest first, to a CSV, JSON Lines or Parquet file."""
+        return transfer.export_logs(self.db, path, format, chunk_size, start, end, progress=progress)